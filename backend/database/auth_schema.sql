@@ -1,3 +1,12 @@
+-- Base schema, run by setup_auth.py on every setup before the migrations, so
+-- every statement must be safe to repeat: IF NOT EXISTS for tables, columns
+-- and indexes, CREATE OR REPLACE for functions (edited in place) and
+-- DROP/CREATE for triggers. Additive objects written that way are added here.
+-- Changes that cannot be repeated blindly or must run exactly once ship as
+-- numbered files in database/migrations (see database/migrate.py): index
+-- builds that need CONCURRENTLY, constraint and view redefinitions, and
+-- rewrites of existing data.
+
 -- Users and Authentication Tables
 
 CREATE TABLE IF NOT EXISTS users (
@@ -48,6 +57,458 @@ CREATE TABLE IF NOT EXISTS equipment_failures (
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_sessions_token ON user_sessions(session_token);
-CREATE INDEX IF NOT EXISTS idx_task_assignments_user ON task_assignments(assigned_to_user_id);
 CREATE INDEX IF NOT EXISTS idx_equipment_failures_date ON equipment_failures(failure_date);
 CREATE INDEX IF NOT EXISTS idx_equipment_failures_equipment ON equipment_failures(equipment_id);
+
+-- Kanban change stream: every card change is announced on the maintenance_changes
+-- channel, which each API worker LISTENs on once (src/models/change_feed.py)
+CREATE OR REPLACE FUNCTION notify_maintenance_change() RETURNS trigger AS $$
+DECLARE
+    rec RECORD;
+    old_status TEXT;
+    reschedule BOOLEAN := TRUE;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        rec := OLD;
+    ELSE
+        rec := NEW;
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        old_status := OLD.status;
+        -- Whether the preventive scheduler must re-place this request; writes
+        -- of its own plan set gearguard.scheduler_apply and never trigger it.
+        reschedule := (OLD.status, OLD.priority, OLD.request_type, OLD.duration_hours,
+                       OLD.team_id, OLD.scheduled_date, OLD.equipment_id)
+            IS DISTINCT FROM (NEW.status, NEW.priority, NEW.request_type, NEW.duration_hours,
+                              NEW.team_id, NEW.scheduled_date, NEW.equipment_id);
+    END IF;
+    IF current_setting('gearguard.scheduler_apply', true) = 'on' THEN
+        reschedule := FALSE;
+    END IF;
+    -- NOTIFY payloads are capped at 8000 bytes, so only card fields are sent
+    PERFORM pg_notify(
+        'maintenance_changes',
+        json_build_object(
+            'op', lower(TG_OP),
+            'id', rec.id,
+            'subject', left(rec.subject, 500),
+            'status', rec.status,
+            'previous_status', old_status,
+            'priority', rec.priority,
+            'request_type', rec.request_type,
+            'equipment_id', rec.equipment_id,
+            'reschedule', reschedule
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS maintenance_requests_notify ON maintenance_requests;
+CREATE TRIGGER maintenance_requests_notify
+    AFTER INSERT OR UPDATE OR DELETE ON maintenance_requests
+    FOR EACH ROW EXECUTE FUNCTION notify_maintenance_change();
+
+-- Per-resource change counters backing the ETags of the polled read endpoints.
+-- Statement-level triggers keep the cost at one row update per write statement.
+CREATE TABLE IF NOT EXISTS resource_versions (
+    name VARCHAR(100) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO resource_versions (name)
+VALUES ('maintenance_requests'), ('equipment_health'), ('equipment')
+ON CONFLICT (name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_resource_versions() RETURNS trigger AS $$
+BEGIN
+    UPDATE resource_versions
+    SET version = version + 1, updated_at = clock_timestamp()
+    WHERE name = ANY(TG_ARGV);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS maintenance_requests_version ON maintenance_requests;
+CREATE TRIGGER maintenance_requests_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON maintenance_requests
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_resource_versions('maintenance_requests');
+
+-- equipment_health is bumped by equipment_health_scores (below), not by its sources
+DROP TRIGGER IF EXISTS equipment_failures_version ON equipment_failures;
+
+-- Equipment attributes feed the MTTF predictions cache key
+DROP TRIGGER IF EXISTS equipment_version ON equipment;
+CREATE TRIGGER equipment_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON equipment
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_resource_versions('equipment');
+
+-- Raw sensor readings written by POST /api/telemetry (COPY micro-batches),
+-- range-partitioned by month on recorded_at so time-bounded queries prune to a
+-- few partitions and old months can be detached wholesale.
+-- No FK to equipment: ids are resolved by the API and FK checks would dominate COPY cost.
+DO $$
+BEGIN
+    -- The first telemetry release created a plain table; keep its rows as the default partition
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'telemetry_readings' AND relkind = 'r') THEN
+        ALTER TABLE telemetry_readings RENAME TO telemetry_readings_default;
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS telemetry_readings (
+    equipment_id INTEGER NOT NULL,
+    recorded_at TIMESTAMPTZ NOT NULL,
+    temperature DOUBLE PRECISION,
+    pressure DOUBLE PRECISION,
+    vibration DOUBLE PRECISION,
+    humidity DOUBLE PRECISION
+) PARTITION BY RANGE (recorded_at);
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'telemetry_readings_default' AND NOT relispartition) THEN
+        ALTER TABLE telemetry_readings ATTACH PARTITION telemetry_readings_default DEFAULT;
+    END IF;
+END $$;
+
+-- Catches readings outside the pre-created months (e.g. historical backfills)
+CREATE TABLE IF NOT EXISTS telemetry_readings_default PARTITION OF telemetry_readings DEFAULT;
+
+CREATE INDEX IF NOT EXISTS idx_telemetry_equipment_time ON telemetry_readings(equipment_id, recorded_at);
+
+-- Creates monthly partitions from the current month through months_ahead;
+-- called by the rollup job at startup and twice a day. Rows that already
+-- landed in the default partition for a new month are moved into it first,
+-- since ATTACH refuses ranges the default partition still holds.
+CREATE OR REPLACE FUNCTION ensure_telemetry_partitions(months_ahead INTEGER DEFAULT 2) RETURNS void AS $$
+DECLARE
+    month_start TIMESTAMPTZ;
+    month_end TIMESTAMPTZ;
+    partition_name TEXT;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month_start := date_trunc('month', now(), 'UTC') + make_interval(months => i);
+        month_end := date_trunc('month', month_start + INTERVAL '32 days', 'UTC');
+        partition_name := format('telemetry_readings_%s', to_char(month_start AT TIME ZONE 'UTC', 'YYYY_MM'));
+        IF NOT EXISTS (SELECT 1 FROM pg_class WHERE relname = partition_name) THEN
+            EXECUTE format('CREATE TABLE %I (LIKE telemetry_readings INCLUDING DEFAULTS)', partition_name);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM telemetry_readings_default WHERE recorded_at >= %L AND recorded_at < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved',
+                month_start, month_end, partition_name
+            );
+            EXECUTE format(
+                'ALTER TABLE telemetry_readings ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end
+            );
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_telemetry_partitions();
+
+-- Downsampled telemetry: one row per equipment per minute/hour/day (UTC buckets)
+-- with min/max/avg/p95 of every metric, maintained by TelemetryRollups.
+CREATE TABLE IF NOT EXISTS telemetry_rollup_1m (
+    equipment_id INTEGER NOT NULL,
+    bucket TIMESTAMPTZ NOT NULL,
+    samples INTEGER NOT NULL,
+    temperature_min DOUBLE PRECISION,
+    temperature_max DOUBLE PRECISION,
+    temperature_avg DOUBLE PRECISION,
+    temperature_p95 DOUBLE PRECISION,
+    pressure_min DOUBLE PRECISION,
+    pressure_max DOUBLE PRECISION,
+    pressure_avg DOUBLE PRECISION,
+    pressure_p95 DOUBLE PRECISION,
+    vibration_min DOUBLE PRECISION,
+    vibration_max DOUBLE PRECISION,
+    vibration_avg DOUBLE PRECISION,
+    vibration_p95 DOUBLE PRECISION,
+    humidity_min DOUBLE PRECISION,
+    humidity_max DOUBLE PRECISION,
+    humidity_avg DOUBLE PRECISION,
+    humidity_p95 DOUBLE PRECISION,
+    PRIMARY KEY (equipment_id, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS telemetry_rollup_1h (LIKE telemetry_rollup_1m INCLUDING ALL);
+CREATE TABLE IF NOT EXISTS telemetry_rollup_1d (LIKE telemetry_rollup_1m INCLUDING ALL);
+
+-- Minutes that received readings since the last rollup pass. The COPY writer
+-- adds to it in the same transaction as the readings, so nothing is missed.
+CREATE TABLE IF NOT EXISTS telemetry_rollup_dirty (
+    equipment_id INTEGER NOT NULL,
+    bucket TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (equipment_id, bucket)
+);
+
+-- Alert coalescing: automated alerts carry an alert_key, and at most one open
+-- request exists per (equipment, alert_key). Repeats bump alert_count/last_seen_at
+-- via INSERT ... ON CONFLICT instead of adding rows (see MaintenanceRepository.upsert_alerts).
+ALTER TABLE maintenance_requests ADD COLUMN IF NOT EXISTS alert_key VARCHAR(200);
+ALTER TABLE maintenance_requests ADD COLUMN IF NOT EXISTS alert_count INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE maintenance_requests ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMPTZ;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_maintenance_requests_open_alert
+    ON maintenance_requests (COALESCE(equipment_id, 0), alert_key)
+    WHERE alert_key IS NOT NULL AND status IN ('New', 'In Progress');
+
+-- Materialized health scores: one row per equipment, refreshed only for the
+-- equipment listed in equipment_health_dirty (see HealthScoreRefresher).
+-- Scores are equipment_health_report's, keyed by id through
+-- equipment_health_by_id (migration 0006).
+CREATE TABLE IF NOT EXISTS equipment_health_scores (
+    equipment_id INTEGER PRIMARY KEY REFERENCES equipment(id) ON DELETE CASCADE,
+    name VARCHAR(200) NOT NULL,
+    health_score NUMERIC(6, 2) NOT NULL,
+    is_functional BOOLEAN,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS equipment_health_dirty (
+    equipment_id INTEGER PRIMARY KEY,
+    marked_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION mark_equipment_health_dirty() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        INSERT INTO equipment_health_dirty (equipment_id)
+        SELECT id FROM equipment
+        ON CONFLICT DO NOTHING;
+        RETURN NULL;
+    END IF;
+    -- equipment rows carry their own id; requests and failures reference it
+    IF TG_OP <> 'INSERT' THEN
+        INSERT INTO equipment_health_dirty (equipment_id)
+        SELECT (to_jsonb(OLD) ->> TG_ARGV[0])::int
+        WHERE to_jsonb(OLD) ->> TG_ARGV[0] IS NOT NULL
+        ON CONFLICT DO NOTHING;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        INSERT INTO equipment_health_dirty (equipment_id)
+        SELECT (to_jsonb(NEW) ->> TG_ARGV[0])::int
+        WHERE to_jsonb(NEW) ->> TG_ARGV[0] IS NOT NULL
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS equipment_health_dirty ON equipment;
+CREATE TRIGGER equipment_health_dirty
+    AFTER INSERT OR UPDATE OR DELETE ON equipment
+    FOR EACH ROW EXECUTE FUNCTION mark_equipment_health_dirty('id');
+
+DROP TRIGGER IF EXISTS equipment_failures_health_dirty ON equipment_failures;
+CREATE TRIGGER equipment_failures_health_dirty
+    AFTER INSERT OR UPDATE OR DELETE ON equipment_failures
+    FOR EACH ROW EXECUTE FUNCTION mark_equipment_health_dirty('equipment_id');
+
+DROP TRIGGER IF EXISTS maintenance_requests_health_dirty ON maintenance_requests;
+CREATE TRIGGER maintenance_requests_health_dirty
+    AFTER INSERT OR UPDATE OR DELETE ON maintenance_requests
+    FOR EACH ROW EXECUTE FUNCTION mark_equipment_health_dirty('equipment_id');
+
+DROP TRIGGER IF EXISTS maintenance_requests_health_dirty_truncate ON maintenance_requests;
+CREATE TRIGGER maintenance_requests_health_dirty_truncate
+    AFTER TRUNCATE ON maintenance_requests
+    FOR EACH STATEMENT EXECUTE FUNCTION mark_equipment_health_dirty();
+
+DROP TRIGGER IF EXISTS equipment_failures_health_dirty_truncate ON equipment_failures;
+CREATE TRIGGER equipment_failures_health_dirty_truncate
+    AFTER TRUNCATE ON equipment_failures
+    FOR EACH STATEMENT EXECUTE FUNCTION mark_equipment_health_dirty();
+
+DROP TRIGGER IF EXISTS equipment_health_scores_version ON equipment_health_scores;
+CREATE TRIGGER equipment_health_scores_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON equipment_health_scores
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_resource_versions('equipment_health');
+
+-- Tells every API worker to drop its cached scores (ChangeFeed health_feed);
+-- identical notifications in one transaction are delivered once.
+CREATE OR REPLACE FUNCTION notify_equipment_health_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('equipment_health_changes', json_build_object('op', lower(TG_OP))::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS equipment_health_scores_notify ON equipment_health_scores;
+CREATE TRIGGER equipment_health_scores_notify
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON equipment_health_scores
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_equipment_health_change();
+
+-- First run: score everything once
+INSERT INTO equipment_health_dirty (equipment_id)
+SELECT e.id FROM equipment e
+WHERE NOT EXISTS (SELECT 1 FROM equipment_health_scores s WHERE s.equipment_id = e.id)
+ON CONFLICT DO NOTHING;
+
+-- Daily per-equipment failure buckets behind /api/auth/reports/failures.
+-- A row trigger adds each failure to (and removes it from) its (equipment,
+-- day) bucket, so a report over any date range only sums buckets.
+CREATE INDEX IF NOT EXISTS idx_equipment_failures_equipment_date ON equipment_failures(equipment_id, failure_date);
+
+CREATE TABLE IF NOT EXISTS equipment_failure_daily (
+    equipment_id INTEGER NOT NULL REFERENCES equipment(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    failure_count INTEGER NOT NULL,
+    downtime_hours NUMERIC(12, 2) NOT NULL,
+    last_failure TIMESTAMP,
+    PRIMARY KEY (equipment_id, day)
+);
+
+-- Adds (p_sign = 1) or removes (p_sign = -1) one failure from its bucket in a
+-- single upsert, so concurrent writers to the same (equipment, day) queue on
+-- the bucket row instead of racing a delete-and-reinsert into its key.
+DROP FUNCTION IF EXISTS refresh_failure_bucket(INTEGER, DATE);
+
+CREATE OR REPLACE FUNCTION add_failure_to_bucket(
+    p_equipment_id INTEGER, p_failure_date TIMESTAMP, p_downtime NUMERIC, p_sign INTEGER
+) RETURNS void AS $$
+BEGIN
+    IF p_equipment_id IS NULL OR p_failure_date IS NULL THEN
+        RETURN;
+    END IF;
+    INSERT INTO equipment_failure_daily AS d (equipment_id, day, failure_count, downtime_hours, last_failure)
+    VALUES (p_equipment_id, p_failure_date::date, p_sign, p_sign * COALESCE(p_downtime, 0), p_failure_date)
+    ON CONFLICT (equipment_id, day) DO UPDATE SET
+        failure_count = d.failure_count + EXCLUDED.failure_count,
+        downtime_hours = d.downtime_hours + EXCLUDED.downtime_hours,
+        last_failure = CASE
+            WHEN p_sign > 0 THEN GREATEST(d.last_failure, EXCLUDED.last_failure)
+            WHEN d.last_failure > p_failure_date THEN d.last_failure
+            -- The latest failure went away: look up the new latest
+            ELSE (
+                SELECT max(f.failure_date) FROM equipment_failures f
+                WHERE f.equipment_id = p_equipment_id
+                    AND f.failure_date >= d.day AND f.failure_date < d.day + 1
+            )
+        END;
+    DELETE FROM equipment_failure_daily
+    WHERE equipment_id = p_equipment_id AND day = p_failure_date::date AND failure_count <= 0;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION equipment_failures_bucket() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        TRUNCATE equipment_failure_daily;
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'UPDATE' AND (OLD.equipment_id, OLD.failure_date, OLD.downtime_hours)
+            IS NOT DISTINCT FROM (NEW.equipment_id, NEW.failure_date, NEW.downtime_hours) THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM add_failure_to_bucket(OLD.equipment_id, OLD.failure_date, OLD.downtime_hours, -1);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM add_failure_to_bucket(NEW.equipment_id, NEW.failure_date, NEW.downtime_hours, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS equipment_failures_bucket ON equipment_failures;
+CREATE TRIGGER equipment_failures_bucket
+    AFTER INSERT OR UPDATE OR DELETE ON equipment_failures
+    FOR EACH ROW EXECUTE FUNCTION equipment_failures_bucket();
+
+DROP TRIGGER IF EXISTS equipment_failures_bucket_truncate ON equipment_failures;
+CREATE TRIGGER equipment_failures_bucket_truncate
+    AFTER TRUNCATE ON equipment_failures
+    FOR EACH STATEMENT EXECUTE FUNCTION equipment_failures_bucket();
+
+-- Backfill from existing history (idempotent)
+INSERT INTO equipment_failure_daily (equipment_id, day, failure_count, downtime_hours, last_failure)
+SELECT equipment_id, failure_date::date, count(*), COALESCE(sum(downtime_hours), 0), max(failure_date)
+FROM equipment_failures
+WHERE equipment_id IS NOT NULL AND failure_date IS NOT NULL
+GROUP BY equipment_id, failure_date::date
+ON CONFLICT (equipment_id, day) DO UPDATE SET
+    failure_count = EXCLUDED.failure_count,
+    downtime_hours = EXCLUDED.downtime_hours,
+    last_failure = EXCLUDED.last_failure;
+
+-- Batch MTTF scoring (python -m src.services.pm_scoring). A run's checkpoint
+-- (rows_consumed) is committed together with each COPY of predictions.
+CREATE TABLE IF NOT EXISTS pm_scoring_runs (
+    run_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    rows_consumed BIGINT NOT NULL DEFAULT 0,
+    rows_scored BIGINT NOT NULL DEFAULT 0,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at TIMESTAMPTZ
+);
+
+-- No PK so COPY only maintains one index
+CREATE TABLE IF NOT EXISTS pm_data_predictions (
+    run_id TEXT NOT NULL REFERENCES pm_scoring_runs(run_id) ON DELETE CASCADE,
+    uid INTEGER NOT NULL,
+    product_type VARCHAR(100),
+    predicted_mttf DOUBLE PRECISION NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_pm_data_predictions_run_uid ON pm_data_predictions(run_id, uid);
+
+-- Per-team working hours per day used by the preventive scheduler
+ALTER TABLE maintenance_teams ADD COLUMN IF NOT EXISTS daily_capacity_hours NUMERIC(5, 2) NOT NULL DEFAULT 8;
+
+CREATE INDEX IF NOT EXISTS idx_maintenance_requests_open_preventive
+    ON maintenance_requests(id)
+    WHERE request_type = 'Preventive' AND status IN ('New', 'In Progress');
+
+-- "My tasks": whether the assigned request is still open is copied onto the
+-- assignment so one partial index serves a user's open work in due order
+ALTER TABLE task_assignments ADD COLUMN IF NOT EXISTS request_open BOOLEAN NOT NULL DEFAULT true;
+
+CREATE OR REPLACE FUNCTION set_task_assignment_open() RETURNS trigger AS $$
+BEGIN
+    NEW.request_open := COALESCE(
+        (SELECT COALESCE(status, 'New') IN ('New', 'In Progress') FROM maintenance_requests WHERE id = NEW.maintenance_request_id),
+        true
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS task_assignments_open ON task_assignments;
+CREATE TRIGGER task_assignments_open
+    BEFORE INSERT OR UPDATE OF maintenance_request_id ON task_assignments
+    FOR EACH ROW EXECUTE FUNCTION set_task_assignment_open();
+
+CREATE OR REPLACE FUNCTION sync_task_assignments_open() RETURNS trigger AS $$
+BEGIN
+    UPDATE task_assignments
+    SET request_open = COALESCE(NEW.status, 'New') IN ('New', 'In Progress')
+    WHERE maintenance_request_id = NEW.id
+        AND request_open IS DISTINCT FROM (COALESCE(NEW.status, 'New') IN ('New', 'In Progress'));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS maintenance_requests_task_open ON maintenance_requests;
+CREATE TRIGGER maintenance_requests_task_open
+    AFTER UPDATE OF status ON maintenance_requests
+    FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION sync_task_assignments_open();
+
+UPDATE task_assignments ta
+SET request_open = COALESCE(mr.status, 'New') IN ('New', 'In Progress')
+FROM maintenance_requests mr
+WHERE mr.id = ta.maintenance_request_id
+    AND ta.request_open IS DISTINCT FROM (COALESCE(mr.status, 'New') IN ('New', 'In Progress'));
+
+-- Keyset order of /api/auth/my-tasks: (due_date NULLS LAST, id)
+DROP INDEX IF EXISTS idx_task_assignments_user;
+CREATE INDEX IF NOT EXISTS idx_task_assignments_user_due ON task_assignments(assigned_to_user_id, due_date, id);
+CREATE INDEX IF NOT EXISTS idx_task_assignments_user_open_due
+    ON task_assignments(assigned_to_user_id, due_date, id)
+    WHERE request_open;
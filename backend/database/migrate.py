@@ -0,0 +1,217 @@
+"""
+Versioned schema migrations.
+Run from project root:
+    python backend/database/migrate.py            # apply pending migrations
+    python backend/database/migrate.py --status   # list applied and pending migrations
+    python backend/database/migrate.py --check    # EXPLAIN the hot queries, exit 1 on a seq scan
+
+auth_schema.sql stays the idempotent base schema (setup_auth.py runs it and
+then this) and takes additive, re-runnable DDL. Changes that must run exactly
+once or cannot be written idempotently (constraint and view redefinitions,
+concurrent index builds, data rewrites) ship as numbered files in
+database/migrations (NNNN_description.sql). Each is applied once, in order,
+and recorded in schema_migrations with its checksum. A file whose first line
+is ``-- migrate: no-transaction`` runs statement by statement in autocommit
+so it can use CREATE INDEX CONCURRENTLY; such files must be safe to re-run.
+"""
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models.db import pool
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+NO_TRANSACTION = "-- migrate: no-transaction"
+# Any constant works; it only keeps two runners from interleaving
+LOCK_KEY = 20190001
+
+# Queries the API and scripts run constantly, with representative literals.
+# Each must be answerable from an index.
+HOT_QUERIES = {
+    "maintenance list page": "SELECT id FROM maintenance_requests ORDER BY id DESC LIMIT 101",
+    "maintenance list by status": """
+        SELECT id FROM maintenance_requests WHERE status = ANY('{New}') ORDER BY id DESC LIMIT 101
+    """,
+    "open requests for equipment": """
+        SELECT id FROM maintenance_requests WHERE equipment_id = 1 AND status IN ('New', 'In Progress')
+    """,
+    "open alert upsert target": """
+        SELECT id FROM maintenance_requests
+        WHERE COALESCE(equipment_id, 0) = 1 AND alert_key = 'temperature'
+            AND alert_key IS NOT NULL AND status IN ('New', 'In Progress')
+    """,
+    "equipment by name": "SELECT id FROM equipment WHERE name = 'Press 1' AND is_functional = TRUE",
+    "session token lookup": """
+        SELECT u.id, s.expires_at FROM user_sessions s JOIN users u ON s.user_id = u.id
+        WHERE s.session_token = 'token' AND s.expires_at > now() AND u.is_active = true
+    """,
+    "expired session sweep": "SELECT id FROM user_sessions WHERE expires_at < now() LIMIT 1000",
+    "user sessions": "SELECT id FROM user_sessions WHERE user_id = 1 ORDER BY expires_at DESC",
+    "equipment request stats": """
+        SELECT count(*) FILTER (WHERE status IN ('New', 'In Progress')), bool_or(status = 'Scrap')
+        FROM maintenance_requests WHERE equipment_id = 1
+    """,
+    "equipment search": """
+        SELECT id FROM equipment
+        WHERE lower(name || ' ' || coalesce(serial_number, '') || ' ' || coalesce(category, '')) LIKE '%press%'
+    """,
+    "health score for equipment": "SELECT health_score FROM equipment_health_by_id WHERE equipment_id = ANY('{1,2}')",
+    "my open tasks": """
+        SELECT id FROM task_assignments WHERE assigned_to_user_id = 1 AND request_open
+        ORDER BY due_date ASC NULLS LAST, id ASC LIMIT 51
+    """,
+}
+
+
+def migration_files() -> List[Tuple[str, Path]]:
+    """(version, path) for every migration file, in version order."""
+    return sorted((p.name.split("_", 1)[0], p) for p in MIGRATIONS_DIR.glob("[0-9]*_*.sql"))
+
+
+def checksum(sql: str) -> str:
+    return hashlib.sha256(sql.encode()).hexdigest()
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split on semicolons ending a line; migration files keep one statement per terminator line."""
+    statements, current = [], []
+    for line in sql.splitlines():
+        current.append(line)
+        if line.rstrip().endswith(";"):
+            statement = "\n".join(current).strip()
+            if any(l.strip() and not l.strip().startswith("--") for l in current):
+                statements.append(statement)
+            current = []
+    return statements
+
+
+def ensure_table(conn) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """
+    )
+    conn.commit()
+
+
+def applied_versions(conn) -> dict:
+    rows = conn.execute("SELECT version, checksum FROM schema_migrations").fetchall()
+    # End the read's transaction: autocommit can only be switched while idle
+    conn.commit()
+    return dict(rows)
+
+
+def apply_migrations(conn) -> List[str]:
+    """Apply every pending migration; returns the file names applied."""
+    ensure_table(conn)
+    conn.execute("SELECT pg_advisory_lock(%s)", (LOCK_KEY,))
+    conn.commit()
+    applied = []
+    try:
+        done = applied_versions(conn)
+        for version, path in migration_files():
+            sql = path.read_text()
+            if version in done:
+                if done[version] != checksum(sql):
+                    print(f"⚠️  {path.name} changed after it was applied; add a new migration instead")
+                continue
+            print(f"→ {path.name}")
+            if sql.lstrip().startswith(NO_TRANSACTION):
+                # Every statement so far was committed, so the connection is idle
+                conn.autocommit = True
+                try:
+                    for statement in split_statements(sql):
+                        conn.execute(statement)
+                finally:
+                    conn.autocommit = False
+            else:
+                conn.execute(sql)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (version, path.name, checksum(sql)),
+            )
+            conn.commit()
+            applied.append(path.name)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+        conn.commit()
+    return applied
+
+
+def _seq_scans(plan: dict) -> List[str]:
+    found = [plan.get("Relation Name", "?")] if plan["Node Type"] == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found += _seq_scans(child)
+    return found
+
+
+def check_hot_queries(conn) -> List[str]:
+    """EXPLAIN every hot query and return a message for each that needs a seq scan.
+
+    Sequential scans are disabled (made prohibitively expensive) for the
+    check, so the planner picks any usable index even on small dev tables;
+    a Seq Scan left in the plan means no index can serve the query.
+    """
+    failures = []
+    for name, sql in HOT_QUERIES.items():
+        try:
+            conn.execute("SET LOCAL enable_seqscan = off")
+            (plan,) = conn.execute(f"EXPLAIN (FORMAT JSON) {sql}").fetchone()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            tables = _seq_scans(plan[0]["Plan"])
+            if tables:
+                failures.append(f"{name}: seq scan on {', '.join(tables)}")
+        except Exception as e:
+            failures.append(f"{name}: {e}")
+        finally:
+            conn.rollback()
+    return failures
+
+
+def print_status(conn) -> None:
+    ensure_table(conn)
+    done = applied_versions(conn)
+    for version, path in migration_files():
+        print(f"  {'✓' if version in done else '·'} {path.name}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    parser.add_argument("--check", action="store_true", help="Fail if a hot query falls back to a seq scan")
+    args = parser.parse_args(argv)
+
+    with pool:
+        with pool.connection() as conn:
+            if args.status:
+                print_status(conn)
+                return 0
+            if args.check:
+                failures = check_hot_queries(conn)
+                for failure in failures:
+                    print(f"❌ {failure}")
+                if not failures:
+                    print(f"✅ All {len(HOT_QUERIES)} hot queries are index-backed")
+                return 1 if failures else 0
+            applied = apply_migrations(conn)
+            print(f"✅ Applied {len(applied)} migration(s)" if applied else "✅ Schema is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
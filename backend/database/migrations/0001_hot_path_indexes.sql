@@ -0,0 +1,27 @@
+-- migrate: no-transaction
+-- Indexes behind the hot read paths, built without blocking writes.
+
+-- /api/maintenance-requests?status=...: filtered pages ordered by id
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_maintenance_requests_status_id
+    ON maintenance_requests(status, id);
+
+-- Open work per equipment (health report, alert upserts, simulator)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_maintenance_requests_open_equipment
+    ON maintenance_requests(equipment_id)
+    WHERE status IN ('New', 'In Progress');
+
+-- Open work per team, for the scheduler and team boards
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_maintenance_requests_open_team
+    ON maintenance_requests(team_id, scheduled_date)
+    WHERE status IN ('New', 'In Progress');
+
+-- iot_updates.map_equipment_id and the health refresher join on name
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_equipment_name
+    ON equipment(name);
+
+-- Session expiry sweeps and per-user session lookups
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_sessions_expires_at
+    ON user_sessions(expires_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_sessions_user
+    ON user_sessions(user_id, expires_at);
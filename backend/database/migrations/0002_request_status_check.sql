@@ -0,0 +1,9 @@
+-- migrate: no-transaction
+-- The Kanban board only has these four columns; reject anything else at write time.
+-- Added NOT VALID and validated in its own statement, so the exclusive lock is
+-- released before existing rows are scanned.
+ALTER TABLE maintenance_requests DROP CONSTRAINT IF EXISTS maintenance_requests_status_check;
+ALTER TABLE maintenance_requests
+    ADD CONSTRAINT maintenance_requests_status_check
+    CHECK (status IN ('New', 'In Progress', 'Repaired', 'Scrap')) NOT VALID;
+ALTER TABLE maintenance_requests VALIDATE CONSTRAINT maintenance_requests_status_check;
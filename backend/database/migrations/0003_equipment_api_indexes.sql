@@ -0,0 +1,14 @@
+-- migrate: no-transaction
+-- /api/equipment: per-equipment request stats and substring search.
+
+-- Open/scrapped counts and maintenance dates per equipment from one index
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_maintenance_requests_equipment_status
+    ON maintenance_requests(equipment_id, status) INCLUDE (scheduled_date);
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Must match EQUIPMENT_SEARCH_EXPR in src/models/repository.py
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_equipment_search_trgm
+    ON equipment USING gin (
+        (lower(name || ' ' || coalesce(serial_number, '') || ' ' || coalesce(category, ''))) gin_trgm_ops
+    );
@@ -0,0 +1,15 @@
+-- Audit events written in batches by src/models/audit.py (COPY)
+CREATE TABLE IF NOT EXISTS audit_log (
+    id BIGSERIAL PRIMARY KEY,
+    occurred_at TIMESTAMPTZ NOT NULL,
+    user_id INTEGER,
+    action VARCHAR(50) NOT NULL,
+    resource_type VARCHAR(100) NOT NULL,
+    resource_id INTEGER,
+    details JSONB,
+    ip_address VARCHAR(64),
+    user_agent TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_occurred_at ON audit_log(occurred_at);
+CREATE INDEX IF NOT EXISTS idx_audit_log_resource ON audit_log(resource_type, resource_id, occurred_at);
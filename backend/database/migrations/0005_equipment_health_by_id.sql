@@ -0,0 +1,36 @@
+-- Health score per equipment id, computed from the base tables. The
+-- refresher (src/models/health.py) selects just the dirty ids from this view;
+-- the id predicate reaches the equipment scan and each lateral is an index
+-- lookup, so a pass costs the size of the batch, not of the fleet. Keyed by
+-- id, so equipment sharing a name get separate scores.
+--
+-- Score out of 100, from the last 90 days of failures and the open requests:
+--   -8 per failure (at most -40), -0.5 per downtime hour (at most -30),
+--   -5 per open request (at most -20), -10 while the equipment is down.
+CREATE OR REPLACE VIEW equipment_health_by_id AS
+SELECT
+    e.id AS equipment_id,
+    e.name,
+    e.is_functional,
+    GREATEST(0, 100
+        - LEAST(40, 8 * f.failures)
+        - LEAST(30, 0.5 * f.downtime_hours)
+        - LEAST(20, 5 * r.open_requests)
+        - CASE WHEN COALESCE(e.is_functional, true) THEN 0 ELSE 10 END
+    )::NUMERIC(6, 2) AS health_score
+FROM equipment e
+CROSS JOIN LATERAL (
+    SELECT count(*) AS failures, COALESCE(sum(ef.downtime_hours), 0) AS downtime_hours
+    FROM equipment_failures ef
+    WHERE ef.equipment_id = e.id AND ef.failure_date >= now() - interval '90 days'
+) f
+CROSS JOIN LATERAL (
+    SELECT count(*) AS open_requests
+    FROM maintenance_requests mr
+    WHERE mr.equipment_id = e.id AND mr.status IN ('New', 'In Progress')
+) r;
+
+-- Rescore every equipment under this definition
+INSERT INTO equipment_health_dirty (equipment_id)
+SELECT id FROM equipment
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,24 @@
+-- Score equipment by id with the existing equipment_health_report definition.
+-- 0005 wrote out a new formula, which changed the scores; the materialized
+-- table must hold exactly what the report returns. The report is keyed by
+-- name, so each equipment takes the report row for its name (equipment
+-- sharing a name share that row, as they always have in the report) while
+-- equipment_health_scores stays keyed by id. The report aggregates by name,
+-- so the refresher's id filter cannot reach inside it: a pass evaluates the
+-- report once, not once per id.
+DROP VIEW IF EXISTS equipment_health_by_id;
+
+CREATE VIEW equipment_health_by_id AS
+SELECT DISTINCT ON (e.id)
+    e.id AS equipment_id,
+    e.name,
+    h.is_functional,
+    h.health_score
+FROM equipment e
+JOIN equipment_health_report h ON h.name = e.name
+ORDER BY e.id;
+
+-- Rescore every equipment under the report's definition
+INSERT INTO equipment_health_dirty (equipment_id)
+SELECT id FROM equipment
+ON CONFLICT DO NOTHING;
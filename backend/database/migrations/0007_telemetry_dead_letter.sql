@@ -0,0 +1,14 @@
+-- Readings the database refused during a telemetry flush (see TelemetryBuffer
+-- in src/models/telemetry.py), kept with the error instead of being dropped.
+-- Columns are wider than telemetry_readings so any rejected row fits.
+CREATE TABLE IF NOT EXISTS telemetry_dead_letter (
+    id BIGSERIAL PRIMARY KEY,
+    equipment_id BIGINT,
+    recorded_at TIMESTAMPTZ,
+    temperature DOUBLE PRECISION,
+    pressure DOUBLE PRECISION,
+    vibration DOUBLE PRECISION,
+    humidity DOUBLE PRECISION,
+    error TEXT NOT NULL,
+    failed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -1,6 +1,7 @@
 """
 Execute this script to set up authentication tables in Neon DB
 Run from project root: python backend/database/setup_auth.py
+Afterwards pending migrations (database/migrate.py) are applied.
 """
 import sys
 import os
@@ -11,6 +12,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from dotenv import load_dotenv
 from src.models.db import pool
+from database.migrate import apply_migrations, check_hot_queries
 
 load_dotenv()
 
@@ -28,6 +30,11 @@ def execute_schema():
             conn.commit()
             print("✅ Authentication schema created successfully!")
 
+            applied = apply_migrations(conn)
+            print(f"✅ Applied {len(applied)} migration(s)" if applied else "✅ Migrations up to date")
+            for failure in check_hot_queries(conn):
+                print(f"⚠️  {failure}")
+
             # Verify tables were created
             cur.execute("""
                 SELECT table_name 
@@ -44,7 +51,8 @@ def execute_schema():
 
 if __name__ == "__main__":
     try:
-        execute_schema()
+        with pool:
+            execute_schema()
     except Exception as e:
         print(f"❌ Error setting up schema: {e}")
         sys.exit(1)
@@ -21,15 +21,20 @@ Already loaded (skipped):
 Usage:
     cd backend
     python3 load_all_data.py
+    python3 load_all_data.py --bulk                      # TRUNCATE + COPY, tables loaded in parallel
+    python3 load_all_data.py --bulk --anomaly-csv CSV/equipment_anomaly_data.csv
 """
 
+import argparse
 import os
 import csv
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
 import random
-import hashlib
 
 # Load environment before importing db module
 from dotenv import load_dotenv, find_dotenv
@@ -42,11 +47,15 @@ if backend_env.exists():
     load_dotenv(backend_env, override=False)
 
 from src.models.db import pool
+from src.models.passwords import hash_password
 
 # Paths to CSV files
 CSV_DIR = Path(__file__).parent / "CSV"
 PM_TESTING_CSV = CSV_DIR / "PM Data Testing.csv"
 
+# Bytes read per COPY write when streaming raw CSV files
+COPY_CHUNK_SIZE = 1 << 20
+
 # ============================================================
 # SEED DATA - Indian and American names/locations
 # ============================================================
@@ -90,31 +99,81 @@ DEPARTMENTS = [
 ]
 
 
-def clear_all_dependent_tables():
-    """Clear all tables in correct order to avoid FK violations."""
-    print_header("Clearing existing data (respecting FK constraints)")
-    
-    # Order matters - delete from child tables first
-    tables_to_clear = [
-        'task_assignments',
-        'equipment_failures', 
-        'maintenance_requests',
-        'user_sessions',
-        'equipment',
-        'maintenance_teams',
-        # 'users',  # Keep existing users
-        # Don't clear: equipment_anomaly_data, pm_data_training (already loaded)
-    ]
-    
-    with pool.connection() as conn:
-        with conn.cursor() as cur:
-            for table in tables_to_clear:
-                try:
-                    cur.execute(f"DELETE FROM {table}")
-                    print(f"  ✓ Cleared {table}")
-                except Exception as e:
-                    print(f"  ✗ Failed to clear {table}: {e}")
-            conn.commit()
+# Maintenance request subjects by request type
+SUBJECTS_PREVENTIVE = [
+    "Routine inspection required",
+    "Scheduled lubrication",
+    "Annual calibration check",
+    "Filter replacement due",
+    "Belt tension adjustment",
+    "Bearing greasing schedule",
+    "Quarterly safety inspection"
+]
+
+SUBJECTS_CORRECTIVE = [
+    "Unusual vibration detected",
+    "Temperature warning alert",
+    "Pressure anomaly reported",
+    "Bearing noise issue",
+    "Electrical fault detected",
+    "Oil leak observed",
+    "Motor overheating",
+    "Critical failure - immediate attention",
+    "Equipment shutdown required",
+    "Safety hazard identified"
+]
+
+FAILURE_TYPES = [
+    "Mechanical Failure", "Electrical Failure", "Overheating",
+    "Wear and Tear", "Calibration Drift", "Component Breakdown",
+    "Corrosion", "Vibration Damage", "Pressure Fault", "Lubrication Failure"
+]
+
+ASSIGNMENT_NOTES = [
+    "Please complete ASAP",
+    "Check with supervisor before starting",
+    "Safety gear required",
+    "Coordinate with production team",
+    None
+]
+
+# Tables reseeded on every run, children first
+TABLES_TO_CLEAR = [
+    'task_assignments',
+    'equipment_failures',
+    'maintenance_requests',
+    'user_sessions',
+    'equipment',
+    'maintenance_teams',
+    # 'users',  # Keep existing users
+    # Don't clear: equipment_anomaly_data, pm_data_training (already loaded)
+]
+
+# (--bulk) Tables derived from the reseeded ones; cleared with them and
+# rebuilt after the load. TRUNCATE names every table it empties, so a new
+# foreign key into a reseeded table fails the load instead of being emptied.
+BULK_DERIVED_TABLES = ['equipment_failure_daily', 'equipment_health_scores']
+
+# (--bulk) Row triggers that would fire once per COPYed row (a pg_notify, a
+# bucket recompute, a dirty mark). They are disabled for the load and replaced
+# by one set-based rebuild in finish_bulk_load().
+BULK_DISABLED_TRIGGERS = {
+    'maintenance_requests': ['maintenance_requests_notify', 'maintenance_requests_health_dirty'],
+    'equipment': ['equipment_health_dirty'],
+    'equipment_failures': ['equipment_failures_bucket', 'equipment_failures_health_dirty'],
+}
+
+TEAM_COLUMNS = ("name", "technician_name")
+EQUIPMENT_COLUMNS = ("name", "serial_number", "category", "department", "purchase_date",
+                     "warranty_expiry", "location", "team_id", "is_functional")
+PM_TESTING_COLUMNS = ("uid", "product_type", "humidity", "temperature", "age", "quantity")
+REQUEST_COLUMNS = ("subject", "description", "request_type", "status", "priority",
+                   "equipment_id", "team_id", "scheduled_date", "duration_hours")
+USER_COLUMNS = ("email", "password_hash", "full_name", "role", "department", "is_active")
+ASSIGNMENT_COLUMNS = ("maintenance_request_id", "assigned_to_user_id", "assigned_by_user_id",
+                      "department", "due_date", "notes")
+FAILURE_COLUMNS = ("equipment_id", "failure_date", "failure_type", "downtime_hours",
+                   "resolved_by_user_id", "notes")
 
 
 def print_header(title):
@@ -123,12 +182,18 @@ def print_header(title):
     print("=" * 60)
 
 
-def load_maintenance_teams():
-    """Load maintenance_teams with Indian and American technicians."""
-    print_header("Loading MAINTENANCE_TEAMS table")
-    
-    # Combine Indian and American team data
-    teams_data = [
+def insert_sql(table, columns):
+    placeholders = ", ".join(["%s"] * len(columns))
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+# ============================================================
+# ROW BUILDERS - shared by the row-by-row and bulk loaders
+# ============================================================
+
+def team_rows():
+    """Maintenance teams with Indian and American technicians."""
+    return [
         # Indian Teams
         ("Alpha India", "Rajesh Kumar"),
         ("Beta India", "Priya Sharma"),
@@ -142,333 +207,472 @@ def load_maintenance_teams():
         ("Delta US", "James Wilson"),
         ("Epsilon US", "Emily Brown"),
     ]
-    
+
+
+def equipment_rows(team_ids):
+    """3-5 units per category at Indian and American locations."""
+    all_locations = INDIAN_LOCATIONS + AMERICAN_LOCATIONS
+    rows = []
+    for category in EQUIPMENT_CATEGORIES:
+        num_units = random.randint(3, 5)
+        for unit in range(1, num_units + 1):
+            name = f"{category} Unit {unit}"
+            serial_number = f"SN-{category[:3].upper()}-{random.randint(10000, 99999)}"
+            department = random.choice(DEPARTMENTS)
+            location = random.choice(all_locations)
+            is_functional = random.choices([True, False], weights=[85, 15])[0]
+            purchase_date = datetime.now() - timedelta(days=random.randint(365, 2000))
+            warranty_expiry = purchase_date + timedelta(days=random.randint(365, 1095))
+            team_id = random.choice(team_ids)
+            rows.append((name, serial_number, category, department, purchase_date.date(),
+                         warranty_expiry.date(), location, team_id, is_functional))
+    return rows
+
+
+def pm_testing_rows(csv_path):
+    """Typed rows of PM Data Testing.csv, skipping malformed lines (streamed, not materialized)."""
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            try:
+                yield (
+                    int(row.get('UID', 0)),
+                    row.get('ProductType', '').strip(),
+                    float(row.get('Humidity', 0)),
+                    float(row.get('Temperature', 0)),
+                    # Handle 'Age ' with trailing space
+                    int(row.get('Age ', row.get('Age', 0))),
+                    int(row.get('Quantity', 0)),
+                )
+            except (ValueError, KeyError):
+                continue
+
+
+def request_rows(equipment_list, team_ids):
+    """2-5 preventive/corrective requests per equipment."""
+    # Only 'Preventive' and 'Corrective' are allowed by DB constraint
+    request_types = ['Preventive', 'Corrective']
+    statuses = ['New', 'In Progress', 'Repaired', 'Scrap']
+    rows = []
+    for eq_id, eq_name in equipment_list:
+        for _ in range(random.randint(2, 5)):
+            request_type = random.choice(request_types)
+            if request_type == 'Preventive':
+                subject = random.choice(SUBJECTS_PREVENTIVE)
+                priority = random.choice([1, 2])  # Low, Medium
+                status = random.choice(['New', 'In Progress', 'Repaired'])
+            else:  # Corrective
+                subject = random.choice(SUBJECTS_CORRECTIVE)
+                priority = random.choice([2, 3, 4])  # Medium, High, Critical
+                status = random.choice(statuses)
+
+            subject = f"{subject} - {eq_name}"
+            description = f"Maintenance request for {eq_name}. Type: {request_type}."
+            team_id = random.choice(team_ids)
+            scheduled_date = datetime.now() + timedelta(days=random.randint(-30, 60))
+            duration_hours = round(random.uniform(0.5, 8), 2)
+            rows.append((subject, description, request_type, status, priority,
+                         eq_id, team_id, scheduled_date, duration_hours))
+    return rows
+
+
+def user_rows(existing_emails):
+    """Indian and American users not already present."""
+    roles = ['Admin', 'Technician', 'Manager', 'Operator', 'Supervisor']
+    people = [(name, "@gearguard.in") for name in INDIAN_NAMES[:8]]
+    people += [(name, "@gearguard.com") for name in AMERICAN_NAMES[:8]]
+    rows = []
+    for i, (name, domain) in enumerate(people):
+        email = name.lower().replace(' ', '.') + domain
+        role = roles[(i % 8) % len(roles)]
+        dept = random.choice(DEPARTMENTS)
+        if email in existing_emails:
+            continue
+        password_hash = hash_password(f"password123_{email}")
+        rows.append((email, password_hash, name, role, dept, True))
+    return rows
+
+
+def assignment_rows(users, managers, request_ids):
+    """Assign ~70% of open requests to technicians/operators/supervisors."""
+    rows = []
+    if not users:
+        return rows
+    for request_id in request_ids:
+        if random.random() < 0.7:
+            assigned_to, department = random.choice(users)
+            assigned_by = random.choice(managers)
+            due_date = datetime.now() + timedelta(days=random.randint(1, 14))
+            notes = random.choice(ASSIGNMENT_NOTES)
+            rows.append((request_id, assigned_to, assigned_by, department, due_date, notes))
+    return rows
+
+
+def failure_rows(equipment_list, technicians):
+    """0-3 historical failures per equipment over the past year."""
+    rows = []
+    for eq_id, eq_name in equipment_list:
+        num_failures = random.choices([0, 1, 2, 3], weights=[30, 40, 20, 10])[0]
+        for _ in range(num_failures):
+            failure_date = datetime.now() - timedelta(days=random.randint(1, 365))
+            failure_type = random.choice(FAILURE_TYPES)
+            downtime_hours = round(random.uniform(1, 48), 2)
+            resolved_by = random.choice(technicians)
+            notes = f"Failure on {eq_name}: {failure_type}. Resolved after {downtime_hours} hours."
+            rows.append((eq_id, failure_date, failure_type, downtime_hours, resolved_by, notes))
+    return rows
+
+
+# Lookups the builders depend on
+def fetch_team_ids(cur):
+    cur.execute("SELECT id FROM maintenance_teams")
+    return [row[0] for row in cur.fetchall()] or [None]
+
+
+def fetch_equipment(cur):
+    cur.execute("SELECT id, name FROM equipment")
+    return cur.fetchall()
+
+
+def fetch_assignable_users(cur):
+    # Technicians and operators do the work; managers hand it out
+    cur.execute("SELECT id, department FROM users WHERE role IN ('Technician', 'Operator', 'Supervisor')")
+    users = cur.fetchall()
+    cur.execute("SELECT id FROM users WHERE role IN ('Manager', 'Admin', 'Supervisor')")
+    managers = [row[0] for row in cur.fetchall()] or [1]
+    return users, managers
+
+
+def fetch_open_request_ids(cur):
+    cur.execute("SELECT id FROM maintenance_requests WHERE status IN ('New', 'In Progress')")
+    return [row[0] for row in cur.fetchall()]
+
+
+def fetch_technician_ids(cur):
+    cur.execute("SELECT id FROM users WHERE role = 'Technician'")
+    return [row[0] for row in cur.fetchall()] or [None]
+
+
+def fetch_user_emails(cur):
+    cur.execute("SELECT email FROM users")
+    return {row[0] for row in cur.fetchall()}
+
+
+# ============================================================
+# ROW-BY-ROW LOADER (default)
+# ============================================================
+
+def clear_all_dependent_tables():
+    """Clear all tables in correct order to avoid FK violations."""
+    print_header("Clearing existing data (respecting FK constraints)")
+
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            for table in TABLES_TO_CLEAR:
+                try:
+                    cur.execute(f"DELETE FROM {table}")
+                    print(f"  ✓ Cleared {table}")
+                except Exception as e:
+                    print(f"  ✗ Failed to clear {table}: {e}")
+            conn.commit()
+
+
+def load_maintenance_teams():
+    """Load maintenance_teams with Indian and American technicians."""
+    print_header("Loading MAINTENANCE_TEAMS table")
+
     with pool.connection() as conn:
         with conn.cursor() as cur:
-            inserted = 0
-            for name, technician_name in teams_data:
-                cur.execute("""
-                    INSERT INTO maintenance_teams (name, technician_name)
-                    VALUES (%s, %s)
-                """, (name, technician_name))
-                inserted += 1
-            
+            rows = team_rows()
+            cur.executemany(insert_sql("maintenance_teams", TEAM_COLUMNS), rows)
             conn.commit()
-            print(f"  ✓ Inserted {inserted} maintenance_teams records")
+            print(f"  ✓ Inserted {len(rows)} maintenance_teams records")
 
 
 def load_equipment():
     """Load equipment with Indian and American locations."""
     print_header("Loading EQUIPMENT table")
-    
-    all_locations = INDIAN_LOCATIONS + AMERICAN_LOCATIONS
-    
+
     with pool.connection() as conn:
         with conn.cursor() as cur:
-            # Get team IDs
-            cur.execute("SELECT id FROM maintenance_teams")
-            team_ids = [row[0] for row in cur.fetchall()] or [None]
-            
-            inserted = 0
-            
-            for category in EQUIPMENT_CATEGORIES:
-                # Create 3-5 units per category
-                num_units = random.randint(3, 5)
-                for unit in range(1, num_units + 1):
-                    name = f"{category} Unit {unit}"
-                    serial_number = f"SN-{category[:3].upper()}-{random.randint(10000, 99999)}"
-                    department = random.choice(DEPARTMENTS)
-                    location = random.choice(all_locations)
-                    is_functional = random.choices([True, False], weights=[85, 15])[0]
-                    purchase_date = datetime.now() - timedelta(days=random.randint(365, 2000))
-                    warranty_expiry = purchase_date + timedelta(days=random.randint(365, 1095))
-                    team_id = random.choice(team_ids)
-                    
-                    cur.execute("""
-                        INSERT INTO equipment 
-                        (name, serial_number, category, department, purchase_date, warranty_expiry, location, team_id, is_functional)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (name, serial_number, category, department, purchase_date.date(), 
-                          warranty_expiry.date(), location, team_id, is_functional))
-                    inserted += 1
-            
+            rows = equipment_rows(fetch_team_ids(cur))
+            cur.executemany(insert_sql("equipment", EQUIPMENT_COLUMNS), rows)
             conn.commit()
-            print(f"  ✓ Inserted {inserted} equipment records")
+            print(f"  ✓ Inserted {len(rows)} equipment records")
 
 
 def load_pm_data_testing():
     """Load PM Data Testing.csv into pm_data_testing table."""
     print_header("Loading PM_DATA_TESTING table")
-    
+
     if not PM_TESTING_CSV.exists():
         print(f"  ✗ File not found: {PM_TESTING_CSV}")
         return
-    
+
     with pool.connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT COUNT(*) FROM pm_data_testing")
             existing = cur.fetchone()[0]
-            
+
             if existing > 0:
                 print(f"  Already has {existing} records. Skipping...")
                 return
-            
-            inserted = 0
-            with open(PM_TESTING_CSV, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    try:
-                        uid = int(row.get('UID', 0))
-                        product_type = row.get('ProductType', '').strip()
-                        humidity = float(row.get('Humidity', 0))
-                        temperature = float(row.get('Temperature', 0))
-                        # Handle 'Age ' with trailing space
-                        age = int(row.get('Age ', row.get('Age', 0)))
-                        quantity = int(row.get('Quantity', 0))
-                        
-                        cur.execute("""
-                            INSERT INTO pm_data_testing (uid, product_type, humidity, temperature, age, quantity)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                        """, (uid, product_type, humidity, temperature, age, quantity))
-                        inserted += 1
-                    except (ValueError, KeyError) as e:
-                        continue
-            
+
+            rows = list(pm_testing_rows(PM_TESTING_CSV))
+            cur.executemany(insert_sql("pm_data_testing", PM_TESTING_COLUMNS), rows)
             conn.commit()
-            print(f"  ✓ Inserted {inserted} pm_data_testing records")
+            print(f"  ✓ Inserted {len(rows)} pm_data_testing records")
 
 
 def load_maintenance_requests():
     """Load maintenance_requests with varied data."""
     print_header("Loading MAINTENANCE_REQUESTS table")
-    
-    # Only 'Preventive' and 'Corrective' are allowed by DB constraint
-    request_types = ['Preventive', 'Corrective']
-    statuses = ['New', 'In Progress', 'Repaired', 'Scrap']
-    
-    # Sample maintenance subjects for Preventive
-    subjects_preventive = [
-        "Routine inspection required",
-        "Scheduled lubrication",
-        "Annual calibration check",
-        "Filter replacement due",
-        "Belt tension adjustment",
-        "Bearing greasing schedule",
-        "Quarterly safety inspection"
-    ]
-    
-    # Sample maintenance subjects for Corrective
-    subjects_corrective = [
-        "Unusual vibration detected",
-        "Temperature warning alert",
-        "Pressure anomaly reported",
-        "Bearing noise issue",
-        "Electrical fault detected",
-        "Oil leak observed",
-        "Motor overheating",
-        "Critical failure - immediate attention",
-        "Equipment shutdown required",
-        "Safety hazard identified"
-    ]
-    
+
     with pool.connection() as conn:
         with conn.cursor() as cur:
-            # Get equipment and team IDs
-            cur.execute("SELECT id, name FROM equipment")
-            equipment_list = cur.fetchall()
-            
-            cur.execute("SELECT id FROM maintenance_teams")
-            team_ids = [row[0] for row in cur.fetchall()] or [None]
-            
+            equipment_list = fetch_equipment(cur)
             if not equipment_list:
                 print("  ✗ No equipment found. Run equipment loading first.")
                 return
-            
-            inserted = 0
-            
-            # Create requests for each equipment
-            for eq_id, eq_name in equipment_list:
-                num_requests = random.randint(2, 5)
-                
-                for _ in range(num_requests):
-                    request_type = random.choice(request_types)
-                    
-                    if request_type == 'Preventive':
-                        subject = random.choice(subjects_preventive)
-                        priority = random.choice([1, 2])  # Low, Medium
-                        status = random.choice(['New', 'In Progress', 'Repaired'])
-                    else:  # Corrective
-                        subject = random.choice(subjects_corrective)
-                        priority = random.choice([2, 3, 4])  # Medium, High, Critical
-                        status = random.choice(statuses)
-                    
-                    subject = f"{subject} - {eq_name}"
-                    description = f"Maintenance request for {eq_name}. Type: {request_type}."
-                    team_id = random.choice(team_ids)
-                    scheduled_date = datetime.now() + timedelta(days=random.randint(-30, 60))
-                    duration_hours = round(random.uniform(0.5, 8), 2)
-                    
-                    cur.execute("""
-                        INSERT INTO maintenance_requests 
-                        (subject, description, request_type, status, priority, equipment_id, team_id, scheduled_date, duration_hours)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (subject, description, request_type, status, priority, 
-                          eq_id, team_id, scheduled_date, duration_hours))
-                    inserted += 1
-            
+
+            rows = request_rows(equipment_list, fetch_team_ids(cur))
+            cur.executemany(insert_sql("maintenance_requests", REQUEST_COLUMNS), rows)
             conn.commit()
-            print(f"  ✓ Inserted {inserted} maintenance_requests records")
+            print(f"  ✓ Inserted {len(rows)} maintenance_requests records")
 
 
 def load_users():
     """Load users with Indian and American data."""
     print_header("Loading USERS table")
-    
-    roles = ['Admin', 'Technician', 'Manager', 'Operator', 'Supervisor']
-    
-    # Create user data mixing Indian and American
-    users_data = []
-    
-    # Indian users
-    for i, name in enumerate(INDIAN_NAMES[:8]):
-        email = name.lower().replace(' ', '.') + "@gearguard.in"
-        role = roles[i % len(roles)]
-        dept = random.choice(DEPARTMENTS)
-        users_data.append((email, name, role, dept))
-    
-    # American users
-    for i, name in enumerate(AMERICAN_NAMES[:8]):
-        email = name.lower().replace(' ', '.') + "@gearguard.com"
-        role = roles[i % len(roles)]
-        dept = random.choice(DEPARTMENTS)
-        users_data.append((email, name, role, dept))
-    
+
     with pool.connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("SELECT COUNT(*) FROM users")
-            existing = cur.fetchone()[0]
-            
-            if existing > 0:
-                print(f"  Already has {existing} records. Adding more...")
-            
-            inserted = 0
-            for email, full_name, role, department in users_data:
-                # Check if user already exists
-                cur.execute("SELECT id FROM users WHERE email = %s", (email,))
-                if cur.fetchone():
-                    continue
-                
-                # Simple password hash (in production use proper hashing)
-                password_hash = hashlib.sha256(f"password123_{email}".encode()).hexdigest()
-                
-                cur.execute("""
-                    INSERT INTO users (email, password_hash, full_name, role, department, is_active)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (email, password_hash, full_name, role, department, True))
-                inserted += 1
-            
+            existing = fetch_user_emails(cur)
+            if existing:
+                print(f"  Already has {len(existing)} records. Adding more...")
+
+            rows = user_rows(existing)
+            cur.executemany(insert_sql("users", USER_COLUMNS), rows)
             conn.commit()
-            print(f"  ✓ Inserted {inserted} new users records")
+            print(f"  ✓ Inserted {len(rows)} new users records")
 
 
 def load_task_assignments():
     """Load task_assignments linking users to maintenance requests."""
     print_header("Loading TASK_ASSIGNMENTS table")
-    
+
     with pool.connection() as conn:
         with conn.cursor() as cur:
-            # Get users (technicians and operators)
-            cur.execute("SELECT id, department FROM users WHERE role IN ('Technician', 'Operator', 'Supervisor')")
-            users = cur.fetchall()
-            
-            # Get all users for assigned_by
-            cur.execute("SELECT id FROM users WHERE role IN ('Manager', 'Admin', 'Supervisor')")
-            managers = [row[0] for row in cur.fetchall()] or [1]
-            
-            # Get maintenance requests
-            cur.execute("SELECT id FROM maintenance_requests WHERE status IN ('New', 'In Progress')")
-            request_ids = [row[0] for row in cur.fetchall()]
-            
+            users, managers = fetch_assignable_users(cur)
+            request_ids = fetch_open_request_ids(cur)
             if not users or not request_ids:
                 print("  ✗ No users or requests found. Run those first.")
                 return
-            
-            inserted = 0
-            
-            # Assign tasks to requests
-            for request_id in request_ids:
-                if random.random() < 0.7:  # 70% of requests get assigned
-                    user = random.choice(users)
-                    assigned_to = user[0]
-                    department = user[1]
-                    assigned_by = random.choice(managers)
-                    due_date = datetime.now() + timedelta(days=random.randint(1, 14))
-                    notes = random.choice([
-                        "Please complete ASAP",
-                        "Check with supervisor before starting",
-                        "Safety gear required",
-                        "Coordinate with production team",
-                        None
-                    ])
-                    
-                    cur.execute("""
-                        INSERT INTO task_assignments 
-                        (maintenance_request_id, assigned_to_user_id, assigned_by_user_id, department, due_date, notes)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (request_id, assigned_to, assigned_by, department, due_date, notes))
-                    inserted += 1
-            
+
+            rows = assignment_rows(users, managers, request_ids)
+            cur.executemany(insert_sql("task_assignments", ASSIGNMENT_COLUMNS), rows)
             conn.commit()
-            print(f"  ✓ Inserted {inserted} task_assignments records")
+            print(f"  ✓ Inserted {len(rows)} task_assignments records")
 
 
 def load_equipment_failures():
     """Load equipment_failures with historical data."""
     print_header("Loading EQUIPMENT_FAILURES table")
-    
-    failure_types = [
-        "Mechanical Failure", "Electrical Failure", "Overheating",
-        "Wear and Tear", "Calibration Drift", "Component Breakdown",
-        "Corrosion", "Vibration Damage", "Pressure Fault", "Lubrication Failure"
-    ]
-    
+
     with pool.connection() as conn:
         with conn.cursor() as cur:
-            # Get equipment IDs
-            cur.execute("SELECT id, name FROM equipment")
-            equipment_list = cur.fetchall()
-            
-            # Get technician user IDs
-            cur.execute("SELECT id FROM users WHERE role = 'Technician'")
-            technicians = [row[0] for row in cur.fetchall()] or [None]
-            
+            equipment_list = fetch_equipment(cur)
             if not equipment_list:
                 print("  ✗ No equipment found.")
                 return
-            
-            inserted = 0
-            
-            # Create historical failures
-            for eq_id, eq_name in equipment_list:
-                # 0-3 failures per equipment
-                num_failures = random.choices([0, 1, 2, 3], weights=[30, 40, 20, 10])[0]
-                
-                for _ in range(num_failures):
-                    failure_date = datetime.now() - timedelta(days=random.randint(1, 365))
-                    failure_type = random.choice(failure_types)
-                    downtime_hours = round(random.uniform(1, 48), 2)
-                    resolved_by = random.choice(technicians)
-                    notes = f"Failure on {eq_name}: {failure_type}. Resolved after {downtime_hours} hours."
-                    
-                    cur.execute("""
-                        INSERT INTO equipment_failures 
-                        (equipment_id, failure_date, failure_type, downtime_hours, resolved_by_user_id, notes)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (eq_id, failure_date, failure_type, downtime_hours, resolved_by, notes))
-                    inserted += 1
-            
+
+            rows = failure_rows(equipment_list, fetch_technician_ids(cur))
+            cur.executemany(insert_sql("equipment_failures", FAILURE_COLUMNS), rows)
             conn.commit()
-            print(f"  ✓ Inserted {inserted} equipment_failures records")
+            print(f"  ✓ Inserted {len(rows)} equipment_failures records")
+
+
+# ============================================================
+# BULK LOADER (--bulk): TRUNCATE + COPY, independent tables in parallel
+# ============================================================
+
+class LoadReport:
+    """Thread-safe per-table timing and throughput report."""
+
+    def __init__(self):
+        self.results = []
+        self._lock = threading.Lock()
+
+    def record(self, table, rows, seconds):
+        rate = rows / seconds if seconds > 0 else float("inf")
+        with self._lock:
+            self.results.append((table, rows, seconds))
+            print(f"  ✓ {table}: {rows:,} rows in {seconds:.2f}s ({rate:,.0f} rows/s)")
+
+    def summary(self, elapsed):
+        total = sum(rows for _, rows, _ in self.results)
+        print_header("BULK LOAD SUMMARY")
+        for table, rows, seconds in sorted(self.results, key=lambda r: -r[2]):
+            print(f"  {table:<25} {rows:>12,} rows {seconds:>8.2f}s")
+        print(f"  {'total':<25} {total:>12,} rows {elapsed:>8.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def copy_rows(cur, table, columns, rows):
+    """Stream Python rows into ``table`` with COPY FROM STDIN; returns the row count."""
+    count = 0
+    with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+            count += 1
+    return count
+
+
+def copy_csv_file(cur, table, csv_path):
+    """Stream a CSV file whose header matches the table's columns straight into COPY.
+
+    The file is forwarded in fixed-size chunks and parsed by the server, so
+    memory use is constant however many rows it holds.
+    """
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        header = next(csv.reader([f.readline()]))
+        columns = ", ".join(col.strip().lower() for col in header)
+        with cur.copy(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)") as copy:
+            while chunk := f.read(COPY_CHUNK_SIZE):
+                copy.write(chunk)
+    return cur.rowcount
+
+
+def truncate_dependent_tables():
+    """Empty every reseeded table in one statement (no per-row work, no dead tuples).
+
+    No CASCADE: a table outside this list that references one of them makes
+    the TRUNCATE fail rather than be emptied silently.
+    """
+    print_header("Truncating existing data")
+    tables = TABLES_TO_CLEAR + BULK_DERIVED_TABLES
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"TRUNCATE {', '.join(tables)}")
+        conn.commit()
+    print(f"  ✓ Truncated {', '.join(tables)}")
+
+
+def set_bulk_triggers(enabled):
+    """Enable or disable BULK_DISABLED_TRIGGERS (committed, so every loader connection sees it)."""
+    action = "ENABLE" if enabled else "DISABLE"
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            for table, triggers in BULK_DISABLED_TRIGGERS.items():
+                for trigger in triggers:
+                    cur.execute(f"ALTER TABLE {table} {action} TRIGGER {trigger}")
+        conn.commit()
+
+
+def finish_bulk_load():
+    """Do once, set-based, what the disabled row triggers would have done per row."""
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO equipment_failure_daily (equipment_id, day, failure_count, downtime_hours, last_failure)
+                SELECT equipment_id, failure_date::date, count(*), COALESCE(sum(downtime_hours), 0), max(failure_date)
+                FROM equipment_failures
+                WHERE equipment_id IS NOT NULL AND failure_date IS NOT NULL
+                GROUP BY equipment_id, failure_date::date
+            """)
+            cur.execute("""
+                INSERT INTO equipment_health_dirty (equipment_id)
+                SELECT id FROM equipment
+                ON CONFLICT DO NOTHING
+            """)
+            # One resync instead of a notification per request: every API
+            # worker reloads its board and streams a fresh snapshot
+            cur.execute("""SELECT pg_notify('maintenance_changes', '{"op": "resync"}')""")
+        conn.commit()
+    print("  ✓ Rebuilt failure buckets, queued health rescoring, notified API workers")
+
+
+def bulk_load_table(report, table, columns, build_rows):
+    """Build rows with a fresh cursor and COPY them into ``table`` in one transaction."""
+    started = time.perf_counter()
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            count = copy_rows(cur, table, columns, build_rows(cur))
+        conn.commit()
+    report.record(table, count, time.perf_counter() - started)
+
+
+def bulk_load_pm_data_testing(report):
+    if not PM_TESTING_CSV.exists():
+        print(f"  ✗ File not found: {PM_TESTING_CSV}")
+        return
+    started = time.perf_counter()
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE pm_data_testing")
+            count = copy_rows(cur, "pm_data_testing", PM_TESTING_COLUMNS, pm_testing_rows(PM_TESTING_CSV))
+        conn.commit()
+    report.record("pm_data_testing", count, time.perf_counter() - started)
+
+
+def bulk_load_csv(report, table, csv_path):
+    started = time.perf_counter()
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"TRUNCATE {table}")
+            count = copy_csv_file(cur, table, csv_path)
+        conn.commit()
+    report.record(table, count, time.perf_counter() - started)
+
+
+def run_stage(executor, jobs):
+    """Run independent load jobs concurrently and re-raise the first failure."""
+    futures = [executor.submit(job, *args) for job, *args in jobs]
+    for future in futures:
+        future.result()
+
+
+def bulk_load(anomaly_csv=None, workers=4):
+    report = LoadReport()
+    started = time.perf_counter()
+    truncate_dependent_tables()
+
+    set_bulk_triggers(enabled=False)
+    try:
+        print_header(f"Bulk loading with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Stage 1: tables with no dependencies on reseeded data
+            stage = [
+                (bulk_load_table, report, "maintenance_teams", TEAM_COLUMNS, lambda cur: team_rows()),
+                (bulk_load_table, report, "users", USER_COLUMNS, lambda cur: user_rows(fetch_user_emails(cur))),
+                (bulk_load_pm_data_testing, report),
+            ]
+            if anomaly_csv:
+                stage.append((bulk_load_csv, report, "equipment_anomaly_data", anomaly_csv))
+            run_stage(executor, stage)
+
+            # Stage 2: equipment needs teams
+            run_stage(executor, [
+                (bulk_load_table, report, "equipment", EQUIPMENT_COLUMNS,
+                 lambda cur: equipment_rows(fetch_team_ids(cur))),
+            ])
+
+            # Stage 3: requests and failures both only need equipment/teams/users
+            run_stage(executor, [
+                (bulk_load_table, report, "maintenance_requests", REQUEST_COLUMNS,
+                 lambda cur: request_rows(fetch_equipment(cur), fetch_team_ids(cur))),
+                (bulk_load_table, report, "equipment_failures", FAILURE_COLUMNS,
+                 lambda cur: failure_rows(fetch_equipment(cur), fetch_technician_ids(cur))),
+            ])
+
+            # Stage 4: assignments need requests
+            run_stage(executor, [
+                (bulk_load_table, report, "task_assignments", ASSIGNMENT_COLUMNS,
+                 lambda cur: assignment_rows(*fetch_assignable_users(cur), fetch_open_request_ids(cur))),
+            ])
+    finally:
+        set_bulk_triggers(enabled=True)
+    finish_bulk_load()
+
+    report.summary(time.perf_counter() - started)
 
 
 def verify_all_tables():
@@ -502,38 +706,56 @@ def verify_all_tables():
                     print(f"  ✗ {table}: Error - {e}")
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the GearGuard database")
+    parser.add_argument("--bulk", action="store_true",
+                        help="TRUNCATE and reload with COPY, loading independent tables in parallel")
+    parser.add_argument("--anomaly-csv", type=Path,
+                        help="(bulk) also reload equipment_anomaly_data from this CSV")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="(bulk) concurrent table loads (default 4)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
     print("\n" + "=" * 60)
     print("  GearGuard Database Data Loader")
     print("  Loading Indian & American Data")
     print("=" * 60)
-    
-    try:
-        # Clear existing data first (respects FK constraints)
-        clear_all_dependent_tables()
-        
-        # Load in correct order (dependencies matter)
-        load_maintenance_teams()
-        load_equipment()
-        load_pm_data_testing()
-        load_users()
-        load_maintenance_requests()
-        load_task_assignments()
-        load_equipment_failures()
-        
-        # Verify
-        verify_all_tables()
-        
-        print("\n" + "=" * 60)
-        print("  ✓ Data loading complete!")
-        print("=" * 60 + "\n")
-        
-    except Exception as e:
-        print(f"\n✗ Error: {e}")
-        import traceback
-        traceback.print_exc()
-        return 1
-    
+
+    # The shared pool is created closed; open it for the duration of the run
+    with pool:
+        try:
+            if args.bulk:
+                bulk_load(anomaly_csv=args.anomaly_csv, workers=args.workers)
+            else:
+                # Clear existing data first (respects FK constraints)
+                clear_all_dependent_tables()
+
+                # Load in correct order (dependencies matter)
+                load_maintenance_teams()
+                load_equipment()
+                load_pm_data_testing()
+                load_users()
+                load_maintenance_requests()
+                load_task_assignments()
+                load_equipment_failures()
+
+            # Verify
+            verify_all_tables()
+
+            print("\n" + "=" * 60)
+            print("  ✓ Data loading complete!")
+            print("=" * 60 + "\n")
+
+        except Exception as e:
+            print(f"\n✗ Error: {e}")
+            import traceback
+            traceback.print_exc()
+            return 1
+
     return 0
 
 
@@ -11,8 +11,23 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 sys.path.insert(0, str(Path(__file__).parent))
 
 from backend.src.api.endpoints import router
+from backend.src.api.equipment import equipment_router
 from backend.src.api.simulator import run_simulator
 from backend.src.api.auth import auth_router
+from backend.src.api.metrics import MetricsMiddleware, metrics_router
+from backend.src.api.telemetry import telemetry_router
+from src.models.audit import audit_log
+from src.models.auth_repository import last_login_recorder, session_cache
+from src.models.change_feed import change_feed, health_feed, session_feed
+from src.models.db import apool
+from src.models.health import health_refresher
+from src.models.repository import invalidate_health_cache, invalidate_maintenance_caches
+from src.models.rollups import telemetry_rollups
+from src.models.sessions import session_sweeper
+from src.models.telemetry import telemetry_buffer
+from src.services.alerts import alert_coalescer, telemetry_alerts
+from src.services.mttf import mttf_service
+from src.services.preventive import preventive_scheduler
 
 load_dotenv()
 
@@ -23,26 +38,78 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag", "Last-Modified"],
 )
+# Outermost, so latency covers CORS and every other middleware
+app.add_middleware(MetricsMiddleware)
 app.include_router(router, prefix="/api")
+app.include_router(equipment_router, prefix="/api")
 app.include_router(auth_router, prefix="/api/auth")
+app.include_router(telemetry_router, prefix="/api")
+app.include_router(metrics_router)
 
 stop_event = asyncio.Event()
-sim_task: asyncio.Task | None = None
+background_tasks: list[asyncio.Task] = []
+
+
+async def _revoke_cached_sessions(event: dict):
+    if "user_id" in event:
+        session_cache.invalidate_user(event["user_id"])
+    else:
+        # Reconnected after a gap: revocations may have been missed
+        session_cache.clear()
 
 
 @app.on_event("startup")
 async def startup():
-    global sim_task
+    await apool.open()
+    # Trained once offline (python -m src.services.mttf); only loaded here
+    await asyncio.to_thread(mttf_service.load)
     # Start simulator if enabled via env
-    sim_task = asyncio.create_task(run_simulator(stop_event))
+    background_tasks.append(asyncio.create_task(run_simulator(stop_event)))
+    # Deletes expired sessions in bounded batches
+    background_tasks.append(asyncio.create_task(
+        session_sweeper.run(stop_event, interval=float(os.getenv("SESSION_SWEEP_SECONDS", "300")))
+    ))
+    # Single LISTEN connection shared by every /api/maintenance/stream client;
+    # it also expires this worker's cached boards when another process writes.
+    change_feed.add_listener(lambda event: invalidate_maintenance_caches())
+    # Repairs the preventive plan for each rescheduled request
+    change_feed.add_listener(preventive_scheduler.on_change)
+    background_tasks.append(asyncio.create_task(change_feed.run(stop_event)))
+    # Evict revoked sessions from this worker's token cache
+    session_feed.add_listener(_revoke_cached_sessions)
+    background_tasks.append(asyncio.create_task(session_feed.run(stop_event)))
+    # Expire this worker's cached health scores when any worker refreshes them
+    health_feed.add_listener(lambda event: invalidate_health_cache())
+    background_tasks.append(asyncio.create_task(health_feed.run(stop_event)))
+    # Micro-batch COPY writer behind POST /api/telemetry; each written batch
+    # is run through the alert rules
+    telemetry_buffer.add_listener(telemetry_alerts.on_flush)
+    background_tasks.append(asyncio.create_task(telemetry_buffer.run(stop_event)))
+    # Rescores only the equipment whose failures/requests changed
+    background_tasks.append(asyncio.create_task(
+        health_refresher.run(stop_event, interval=float(os.getenv("HEALTH_REFRESH_SECONDS", "2")))
+    ))
+    # Keeps the 1m/1h/1d telemetry rollups and monthly partitions current
+    background_tasks.append(asyncio.create_task(
+        telemetry_rollups.run(stop_event, interval=float(os.getenv("TELEMETRY_ROLLUP_SECONDS", "5")))
+    ))
+    # Writes coalesced last_login times; drained on shutdown
+    background_tasks.append(asyncio.create_task(
+        last_login_recorder.run(stop_event, interval=float(os.getenv("LAST_LOGIN_FLUSH_SECONDS", "5")))
+    ))
+    # Batches queued audit events into audit_log with COPY
+    background_tasks.append(asyncio.create_task(audit_log.run(stop_event)))
+    # Folds repeated alerts from telemetry and the simulator into their open requests
+    background_tasks.append(asyncio.create_task(alert_coalescer.run(stop_event)))
 
 
 @app.on_event("shutdown")
 async def shutdown():
     stop_event.set()
-    if sim_task:
-        await sim_task
+    await asyncio.gather(*background_tasks)
+    await apool.close()
 
 
 @app.get("/", tags=["root"])
@@ -1,68 +1,69 @@
-from fastapi import APIRouter, HTTPException, Header, Depends, Query
-from typing import Optional, List
-from src.models.auth_repository import UserRepository, TaskRepository, ReportRepository
-from src.models.auth_schemas import UserCreate, UserLogin, TokenResponse, UserOut, TaskAssignment, EquipmentFailureReport
+from datetime import date, datetime
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import Optional, List, Tuple
+from src.api.dependencies import bearer_token, current_user, require_admin
+from src.models.auth_repository import UserRepository, TaskRepository, ReportRepository, last_login_recorder, session_cache
+from src.models.auth_schemas import UserCreate, UserLogin, TokenResponse, UserOut, TaskAssignment, BulkTaskAssignment, EquipmentFailureReport
+from src.models.passwords import HasherBusy, password_hasher
+from src.models.sessions import session_sweeper
 
 auth_router = APIRouter()
 
 
 @auth_router.post("/register", response_model=TokenResponse, tags=["auth"])
-def register(user_data: UserCreate):
+async def register(user_data: UserCreate):
     """Register a new user"""
-    user = UserRepository.create_user(
-        email=user_data.email,
-        password=user_data.password,
-        full_name=user_data.full_name,
-        role=user_data.role,
-        department=user_data.department,
-    )
+    try:
+        user = await UserRepository.create_user(
+            email=user_data.email,
+            password=user_data.password,
+            full_name=user_data.full_name,
+            role=user_data.role,
+            department=user_data.department,
+        )
+    except HasherBusy:
+        raise HTTPException(status_code=503, detail="Too many logins in progress, retry shortly", headers={"Retry-After": "1"})
     if not user:
         raise HTTPException(status_code=400, detail="User already exists or registration failed")
 
-    token = UserRepository.create_session(user["id"])
+    token = await UserRepository.create_session(user["id"])
     return TokenResponse(access_token=token, user=UserOut(**user))
 
 
 @auth_router.post("/login", response_model=TokenResponse, tags=["auth"])
-def login(credentials: UserLogin):
+async def login(credentials: UserLogin):
     """Login user"""
-    user = UserRepository.authenticate_user(credentials.email, credentials.password)
-    if not user:
+    try:
+        result = await UserRepository.login(credentials.email, credentials.password)
+    except HasherBusy:
+        raise HTTPException(status_code=503, detail="Too many logins in progress, retry shortly", headers={"Retry-After": "1"})
+    if not result:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    token = UserRepository.create_session(user["id"])
+    user, token = result
     return TokenResponse(access_token=token, user=UserOut(**user))
 
 
-@auth_router.get("/me", response_model=UserOut, tags=["auth"])
-def get_current_user(authorization: Optional[str] = Header(None)):
-    """Get current logged-in user"""
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
+@auth_router.post("/logout", tags=["auth"])
+async def logout(token: str = Depends(bearer_token)):
+    """Logout the current session"""
+    await UserRepository.delete_session(token)
+    return {"success": True}
 
-    token = authorization.replace("Bearer ", "")
-    user = UserRepository.get_user_by_token(token)
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+@auth_router.get("/me", response_model=UserOut, tags=["auth"])
+async def get_current_user(user: dict = Depends(current_user)):
+    """Get current logged-in user"""
     return UserOut(**user)
 
 
 @auth_router.post("/admin/assign-task", tags=["admin"])
-def assign_task(task: TaskAssignment, authorization: Optional[str] = Header(None)):
+async def assign_task(task: TaskAssignment, admin: dict = Depends(require_admin)):
     """Admin assigns a maintenance task to a user"""
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
-
-    token = authorization.replace("Bearer ", "")
-    current_user = UserRepository.get_user_by_token(token)
-    if not current_user or current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Admin access required")
-
-    TaskRepository.assign_task(
+    await TaskRepository.assign_task(
         maintenance_request_id=task.maintenance_request_id,
         assigned_to_user_id=task.assigned_to_user_id,
-        assigned_by_user_id=current_user["id"],
+        assigned_by_user_id=admin["id"],
         department=task.department,
         due_date=task.due_date,
         notes=task.notes,
@@ -70,35 +71,88 @@ def assign_task(task: TaskAssignment, authorization: Optional[str] = Header(None
     return {"success": True, "message": "Task assigned successfully"}
 
 
-@auth_router.get("/my-tasks", tags=["tasks"])
-def get_my_tasks(authorization: Optional[str] = Header(None)):
-    """Get tasks assigned to current user"""
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
+@auth_router.post("/admin/assign-tasks", tags=["admin"])
+async def assign_tasks(payload: BulkTaskAssignment, admin: dict = Depends(require_admin)):
+    """Admin assigns many tasks at once, listed explicitly and/or selected by a rule"""
+    if not payload.assignments and not payload.rule:
+        raise HTTPException(status_code=400, detail="Provide assignments or a rule")
+    results = await TaskRepository.assign_tasks_bulk(
+        [a.model_dump() for a in payload.assignments],
+        assigned_by_user_id=admin["id"],
+        rule=payload.rule.model_dump() if payload.rule else None,
+    )
+    assigned = sum(r["success"] for r in results)
+    return {"assigned": assigned, "failed": len(results) - assigned, "results": results}
 
-    token = authorization.replace("Bearer ", "")
-    current_user = UserRepository.get_user_by_token(token)
-    if not current_user:
-        raise HTTPException(status_code=401, detail="Invalid token")
 
-    tasks = TaskRepository.get_user_tasks(current_user["id"])
-    return tasks
+@auth_router.post("/admin/users/{user_id}/deactivate", tags=["admin"])
+async def deactivate_user(user_id: int, admin: dict = Depends(require_admin)):
+    """Admin deactivates a user, revoking their sessions immediately"""
+    if not await UserRepository.deactivate_user(user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"success": True}
 
 
-@auth_router.get("/reports/failures", response_model=List[EquipmentFailureReport], tags=["reports"])
-def equipment_failure_report(
-    start_date: Optional[str] = Query(None),
-    end_date: Optional[str] = Query(None),
-    authorization: Optional[str] = Header(None),
+@auth_router.get("/admin/sessions/stats", tags=["admin"])
+async def session_stats(admin: dict = Depends(require_admin)):
+    """Live session counts, sweeper progress and this worker's token cache"""
+    return {
+        **await session_sweeper.stats(),
+        "cache": session_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "last_login": last_login_recorder.stats(),
+    }
+
+
+@auth_router.get("/my-tasks", tags=["tasks"])
+async def get_my_tasks(
+    request: Request,
+    response: Response,
+    include_closed: bool = Query(False, description="Also return repaired/scrapped work"),
+    status: Optional[List[str]] = Query(None),
+    due_from: Optional[datetime] = Query(None),
+    due_to: Optional[datetime] = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    user: dict = Depends(current_user),
 ):
-    """Generate equipment failure report (filtered by date range)"""
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    """Get tasks assigned to current user, earliest due first"""
+    try:
+        page_after = _decode_task_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    tasks, next_cursor = await TaskRepository.get_user_tasks(
+        user["id"],
+        include_closed=include_closed,
+        status=status,
+        due_from=due_from,
+        due_to=due_to,
+        cursor=page_after,
+        limit=limit,
+    )
+    # The body stays a plain list for existing clients; paging rides in headers.
+    if next_cursor is not None:
+        token = _encode_task_cursor(*next_cursor)
+        response.headers["X-Next-Cursor"] = token
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=token)}>; rel="next"'
+    return tasks
 
-    token = authorization.replace("Bearer ", "")
-    current_user = UserRepository.get_user_by_token(token)
-    if not current_user:
-        raise HTTPException(status_code=401, detail="Invalid token")
 
-    report = ReportRepository.get_equipment_failure_report(start_date, end_date)
+def _encode_task_cursor(due_date: Optional[datetime], task_id: int) -> str:
+    return f"{due_date.isoformat() if due_date else ''}~{task_id}"
+
+
+def _decode_task_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    due, _, task_id = cursor.rpartition("~")
+    return (datetime.fromisoformat(due) if due else None), int(task_id)
+
+
+@auth_router.get("/reports/failures", response_model=List[EquipmentFailureReport], tags=["reports"])
+async def equipment_failure_report(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    user: dict = Depends(current_user),
+):
+    """Generate equipment failure report (filtered by an inclusive date range)"""
+    report = await ReportRepository.get_equipment_failure_report(start_date, end_date)
     return report
@@ -0,0 +1,26 @@
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException
+
+from src.models.auth_repository import UserRepository
+
+
+def bearer_token(authorization: Optional[str] = Header(None)) -> str:
+    """Extract the session token from an ``Authorization: Bearer`` header."""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return authorization[len("Bearer "):]
+
+
+async def current_user(token: str = Depends(bearer_token)) -> dict:
+    """Resolve the logged-in user; cached per token by UserRepository."""
+    user = await UserRepository.get_user_by_token(token)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return user
+
+
+async def require_admin(user: dict = Depends(current_user)) -> dict:
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
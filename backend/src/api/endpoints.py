@@ -1,14 +1,30 @@
-from fastapi import APIRouter, HTTPException, Header, Depends
-from src.models.repository import MaintenanceRepository, EquipmentRepository
+import asyncio
+import hashlib
+import json
+from datetime import datetime
+from email.utils import format_datetime
+from typing import List, Optional, Sequence, Union
+
+from fastapi import APIRouter, HTTPException, Header, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from src.models.audit import audit_log
+from src.models.cache import cache
+from src.models.change_feed import change_feed
+from src.models.repository import MaintenanceRepository, EquipmentRepository, VersionRepository
 from src.models.schemas import (
     StatusUpdate,
     MaintenanceBoard,
     MaintenanceSnapshot,
     EquipmentHealth,
 )
+from src.services.mttf import mttf_service
+from src.services.preventive import preventive_scheduler
 
 router = APIRouter()
 
+STREAM_HEARTBEAT_SECONDS = 15
+
 
 def require_role(allowed: list[str]):
     async def checker(x_user_role: str | None = Header(None)):
@@ -21,13 +37,26 @@ def require_role(allowed: list[str]):
 
 
 @router.get("/health", tags=["health"])
-def health():
+async def health():
     return {"status": "healthy"}
 
 
+@router.get("/cache/stats", tags=["health"])
+async def cache_stats():
+    return await cache.stats()
+
+
+@router.get("/audit/stats", tags=["health"])
+async def audit_stats():
+    return audit_log.stats()
+
+
 @router.get("/kanban", response_model=MaintenanceBoard, tags=["maintenance"])
-def get_kanban():
-    board = MaintenanceRepository.get_kanban_board()
+async def get_kanban(request: Request, response: Response):
+    not_modified = await conditional_get(request, response, "maintenance_requests", "kanban")
+    if not_modified:
+        return not_modified
+    board = await MaintenanceRepository.get_kanban_board()
     return {"board": board}
 
 
@@ -37,20 +66,137 @@ def get_kanban():
     tags=["maintenance"],
     summary="Near-realtime maintenance snapshot",
 )
-def maintenance_live():
-    snapshot = MaintenanceRepository.live_snapshot()
+async def maintenance_live():
+    snapshot = await MaintenanceRepository.live_snapshot()
     return snapshot
 
 
+async def conditional_get(
+    request: Request, response: Response, resource: Union[str, Sequence[str]], variant: str = ""
+) -> Optional[Response]:
+    """Answer a conditional GET from the resource's version counter alone.
+
+    Sets ETag/Last-Modified on ``response`` and returns a ready 304 when the
+    client's If-None-Match names the current ETag, so callers can skip their
+    query entirely.
+    ``resource`` may name several resources when a response joins them.
+    ``variant`` distinguishes representations of the same resource (e.g. filters).
+    """
+    if isinstance(resource, str):
+        version, updated_at = await VersionRepository.get_version(resource)
+        etag = f'"{resource}-{version}'
+    else:
+        versions = await VersionRepository.get_versions(list(resource))
+        updated_at = max(u for _, u in versions)
+        etag = f'"{"+".join(resource)}-{".".join(str(v) for v, _ in versions)}'
+    if variant:
+        etag += "-" + hashlib.sha1(variant.encode()).hexdigest()[:12]
+    etag += '"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(updated_at, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+    # Only If-None-Match can prove the client's copy current. Last-Modified
+    # has whole-second precision, so a change later in the same second would
+    # pass an If-Modified-Since check. Every response here has an ETag, so
+    # If-Modified-Since is ignored; a full 200 is always a valid answer.
+    if_none_match = request.headers.get("if-none-match")
+    fresh = False
+    if if_none_match is not None:
+        tags = {t.strip() for t in if_none_match.split(",")}
+        fresh = "*" in tags or etag in tags
+
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+@router.get(
+    "/maintenance/stream",
+    tags=["maintenance"],
+    summary="Kanban snapshot followed by per-card deltas (Server-Sent Events)",
+)
+async def maintenance_stream(request: Request):
+    # Subscribe before taking the snapshot so no change can slip in between.
+    queue = change_feed.subscribe()
+
+    async def events():
+        try:
+            snapshot = await MaintenanceRepository.live_snapshot()
+            yield _sse("snapshot", snapshot)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event.get("op") == "resync":
+                    snapshot = await MaintenanceRepository.live_snapshot()
+                    yield _sse("snapshot", snapshot)
+                else:
+                    yield _sse("delta", event)
+        finally:
+            change_feed.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/maintenance-requests", tags=["maintenance"])
-def list_requests(role: str = Depends(require_role(["viewer", "technician", "admin"]))):
-    return MaintenanceRepository.list_requests()
+async def list_requests(
+    request: Request,
+    response: Response,
+    cursor: Optional[int] = Query(None, description="Return requests with id below this cursor"),
+    limit: int = Query(100, ge=1, le=1000),
+    status: Optional[List[str]] = Query(None),
+    priority: Optional[List[str]] = Query(None),
+    equipment_id: Optional[int] = Query(None),
+    team_id: Optional[int] = Query(None),
+    scheduled_from: Optional[datetime] = Query(None),
+    scheduled_to: Optional[datetime] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    role: str = Depends(require_role(["viewer", "technician", "admin"])),
+):
+    variant = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    not_modified = await conditional_get(request, response, "maintenance_requests", "list?" + variant)
+    if not_modified:
+        return not_modified
+    try:
+        rows, next_cursor = await MaintenanceRepository.list_requests(
+            cursor=cursor,
+            limit=limit,
+            status=status,
+            priority=priority,
+            equipment_id=equipment_id,
+            team_id=team_id,
+            scheduled_from=scheduled_from,
+            scheduled_to=scheduled_to,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # The body stays a plain list for existing clients; paging rides in headers.
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return rows
 
 
 @router.put("/maintenance/{request_id}/status", tags=["maintenance"])
-def update_status(request_id: int, payload: StatusUpdate, role: str = Depends(require_role(["technician", "admin"]))):
+async def update_status(request_id: int, payload: StatusUpdate, role: str = Depends(require_role(["technician", "admin"]))):
     try:
-        MaintenanceRepository.update_status(request_id, payload.status)
+        await MaintenanceRepository.update_status(request_id, payload.status)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     return {"success": True}
@@ -61,6 +207,50 @@ def update_status(request_id: int, payload: StatusUpdate, role: str = Depends(re
     response_model=list[EquipmentHealth],
     tags=["equipment"],
 )
-def equipment_health():
-    rows = EquipmentRepository.get_health_scores()
+async def equipment_health(request: Request, response: Response):
+    not_modified = await conditional_get(request, response, "equipment_health")
+    if not_modified:
+        return not_modified
+    rows = await EquipmentRepository.get_health_scores()
     return [EquipmentHealth(**row) for row in rows]
+
+
+@router.get("/equipment/predicted-mttf", tags=["equipment"])
+async def predicted_mttf_all():
+    """Predicted MTTF for every equipment, scored in one vectorized call."""
+    return await mttf_service.predict_all()
+
+
+@router.get("/equipment/{equipment_id}/predicted-mttf", tags=["equipment"])
+async def predicted_mttf(equipment_id: int):
+    prediction = await mttf_service.predict_one(equipment_id)
+    if prediction is None:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    return prediction
+
+
+@router.get("/schedule/preventive", tags=["maintenance"])
+async def preventive_schedule(
+    team_id: Optional[int] = Query(None),
+    limit: Optional[int] = Query(None, ge=1),
+    role: str = Depends(require_role(["viewer", "technician", "admin"])),
+):
+    """Current preventive plan: one row per open request with its team and days."""
+    try:
+        rows = await preventive_scheduler.rows(team_id=team_id, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**preventive_scheduler.stats(), "assignments": rows}
+
+
+@router.post("/schedule/preventive", tags=["maintenance"])
+async def rebuild_preventive_schedule(
+    apply: bool = Query(False, description="Write the plan's team and date onto the requests"),
+    role: str = Depends(require_role(["admin"])),
+):
+    try:
+        await preventive_scheduler.rebuild()
+        updated = await preventive_scheduler.apply() if apply else 0
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**preventive_scheduler.stats(), "updated": updated}
@@ -1,60 +1,15 @@
-from flask import Blueprint, jsonify, request
-from src.models.models import EquipmentModel, MaintenanceRequestModel
+from typing import Optional
 
-equipment_bp = Blueprint('equipment', __name__, url_prefix='/api/equipment')
-
-# =============================================================================
-# HELPER FUNCTIONS - Response Formatting
-# =============================================================================
-
-def api_response(success: bool, data=None, message: str = None, error: str = None, status_code: int = 200):
-    """
-    Consistent API response formatter.
-    Returns: tuple(response_json, status_code)
-    """
-    response = {
-        "success": success,
-        "data": data,
-        "message": message,
-        "error": error
-    }
-    return jsonify(response), status_code
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 
+from src.api.endpoints import conditional_get
+from src.models.audit import audit_log
+from src.models.repository import EquipmentRepository
 
-def format_equipment(eq) -> dict:
-    """Format equipment tuple to dict"""
-    return {
-        'id': eq[0],
-        'name': eq[1],
-        'status': eq[2]
-    }
-
-
-# =============================================================================
-# EQUIPMENT SAFETY CHECK HELPERS
-# =============================================================================
-
-def get_equipment_or_none(equipment_id: int):
-    """
-    Fetch equipment by ID and return formatted dict or None.
-    """
-    try:
-        equipment = EquipmentModel.get_equipment_by_id(equipment_id)
-        if equipment and len(equipment) > 0:
-            return format_equipment(equipment[0])
-        return None
-    except Exception:
-        return None
-
-
-def is_equipment_scrapped(equipment: dict) -> bool:
-    """
-    Check if equipment status is SCRAP.
-    """
-    if not equipment:
-        return False
-    return equipment.get('status', '').upper() == 'SCRAP'
+equipment_router = APIRouter()
 
+# Every listed resource can change what /api/equipment returns
+EQUIPMENT_RESOURCES = ("equipment", "equipment_health", "maintenance_requests")
 
 # =============================================================================
 # ACCESS CONTROL & AUDIT HELPERS
@@ -68,142 +23,122 @@ ROLE_PERMISSIONS = {
 }
 
 
-def check_user_permission(user_id: int, resource: str, action: str) -> bool:
+def check_user_permission(action: str):
     """
-    Check if user has permission for action on resource.
-    
-    Args:
-        user_id: The ID of the user making the request
-        resource: The resource being accessed (e.g., 'equipment', 'maintenance')
-        action: The action being performed (e.g., 'read', 'write', 'delete')
-    
-    Returns:
-        bool: True if user has permission, False otherwise
+    Dependency enforcing that the caller's role (X-User-Role header, default
+    viewer) may perform ``action``; resolves to the caller's user id
+    (X-User-ID header, 0 when absent).
     """
-    # Get user role from request headers (would typically come from auth token)
-    user_role = request.headers.get('X-User-Role', 'viewer').lower()
-    
-    # Check if role exists and has the required permission
-    if user_role not in ROLE_PERMISSIONS:
+    def checker(
+        x_user_role: Optional[str] = Header(None),
+        x_user_id: Optional[str] = Header(None),
+    ) -> int:
+        user_role = (x_user_role or 'viewer').lower()
+        if action not in ROLE_PERMISSIONS.get(user_role, []):
+            raise HTTPException(
+                status_code=403,
+                detail='Unauthorized: Insufficient permissions to access equipment data',
+            )
+        return int(x_user_id) if x_user_id and x_user_id.isdigit() else 0
+
+    return checker
+
+
+def is_equipment_scrapped(equipment: Optional[dict]) -> bool:
+    """
+    Check if equipment status is SCRAP.
+    """
+    if not equipment:
         return False
-    
-    allowed_actions = ROLE_PERMISSIONS.get(user_role, [])
-    return action in allowed_actions
+    return (equipment.get('status') or '').upper() == 'SCRAP'
 
 
-def log_audit_event(user_id: int, action: str, resource_type: str, resource_id: int, details: dict = None):
+def log_audit_event(request: Request, user_id: int, action: str, resource_type: str, resource_id: int, details: dict = None):
     """
-    Log an audit event for tracking changes.
-    
-    Args:
-        user_id: The ID of the user performing the action
-        action: The action performed (e.g., 'read', 'create', 'update', 'delete')
-        resource_type: The type of resource (e.g., 'equipment', 'maintenance_request')
-        resource_id: The ID of the resource being accessed
-        details: Optional additional details about the event
+    Queue an audit event; the audit_log writer stores it in the background.
     """
-    from datetime import datetime
-    import logging
-    
-    audit_entry = {
-        'timestamp': datetime.utcnow().isoformat(),
-        'user_id': user_id,
-        'action': action,
-        'resource_type': resource_type,
-        'resource_id': resource_id,
-        'details': details or {},
-        'ip_address': request.remote_addr,
-        'user_agent': request.headers.get('User-Agent', 'Unknown')
-    }
-    
-    # Log to application logger (could be extended to write to database/file)
-    logger = logging.getLogger('audit')
-    logger.info(f"AUDIT: {audit_entry}")
+    audit_log.record(
+        action=action,
+        resource_type=resource_type,
+        resource_id=resource_id,
+        user_id=user_id,
+        details=details,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get('User-Agent', 'Unknown'),
+    )
 
 
 # =============================================================================
 # ROUTES
 # =============================================================================
 
-@equipment_bp.route('/', methods=['GET'])
-def get_all_equipment():
-    """Get all functional equipment"""
-    # Get user ID from request headers (would typically come from auth token)
-    user_id = request.headers.get('X-User-ID', 0)
-    
-    # Role-based access control
-    if not check_user_permission(user_id, 'equipment', 'read'):
-        return api_response(
-            success=False,
-            error='Unauthorized: Insufficient permissions to access equipment data',
-            status_code=403
-        )
-    
-    try:
-        equipment = EquipmentModel.get_all_equipment()
-        data = [format_equipment(eq) for eq in equipment] if equipment else []
-        
-        # Audit logging for data access
-        log_audit_event(
-            user_id=int(user_id) if user_id else 0,
-            action='read',
-            resource_type='equipment',
-            resource_id=0,  # 0 indicates all resources
-            details={'count': len(data), 'action': 'list_all'}
-        )
-        
-        return api_response(
-            success=True,
-            data=data,
-            message=f"Retrieved {len(data)} equipment items"
-        )
-    except Exception as e:
-        return api_response(
-            success=False,
-            error=str(e),
-            status_code=500
-        )
-
-
-@equipment_bp.route('/<int:equipment_id>', methods=['GET'])
-def get_equipment(equipment_id):
-    """Get equipment by ID"""
-    # Get user ID from request headers (would typically come from auth token)
-    user_id = request.headers.get('X-User-ID', 0)
-    
-    # Role-based access control
-    if not check_user_permission(user_id, 'equipment', 'read'):
-        return api_response(
-            success=False,
-            error='Unauthorized: Insufficient permissions to access equipment data',
-            status_code=403
-        )
-    
-    try:
-        equipment = EquipmentModel.get_equipment_by_id(equipment_id)
-        if equipment and len(equipment) > 0:
-            # Audit logging for data access
-            log_audit_event(
-                user_id=int(user_id) if user_id else 0,
-                action='read',
-                resource_type='equipment',
-                resource_id=equipment_id,
-                details={'action': 'get_by_id'}
-            )
-            
-            return api_response(
-                success=True,
-                data=format_equipment(equipment[0]),
-                message="Equipment found"
-            )
-        return api_response(
-            success=False,
-            error='Equipment not found',
-            status_code=404
-        )
-    except Exception as e:
-        return api_response(
-            success=False,
-            error=str(e),
-            status_code=500
-        )
+def _set_paging_headers(request: Request, response: Response, next_cursor: Optional[int]) -> None:
+    # The body stays a plain list for existing clients; paging rides in headers.
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+
+@equipment_router.get("/equipment", tags=["equipment"])
+async def list_equipment(
+    request: Request,
+    response: Response,
+    cursor: Optional[int] = Query(None, description="Return equipment with id above this cursor"),
+    limit: int = Query(200, ge=1, le=1000),
+    include_scrapped: bool = Query(False),
+    user_id: int = Depends(check_user_permission('read')),
+):
+    """Equipment with health score, MTTR and open request counts (scrapped units hidden by default)"""
+    variant = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    not_modified = await conditional_get(request, response, EQUIPMENT_RESOURCES, "list?" + variant)
+    if not_modified:
+        return not_modified
+    data, next_cursor = await EquipmentRepository.list_equipment(
+        cursor=cursor, limit=limit, include_scrapped=include_scrapped
+    )
+    log_audit_event(request, user_id, 'read', 'equipment', 0, {'count': len(data), 'action': 'list_all'})
+    _set_paging_headers(request, response, next_cursor)
+    return data
+
+
+@equipment_router.get("/equipment/search", tags=["equipment"])
+async def search_equipment(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=2, description="Substring of name, serial number or category"),
+    cursor: Optional[int] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    include_scrapped: bool = Query(False),
+    user_id: int = Depends(check_user_permission('read')),
+):
+    variant = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    not_modified = await conditional_get(request, response, EQUIPMENT_RESOURCES, "search?" + variant)
+    if not_modified:
+        return not_modified
+    data, next_cursor = await EquipmentRepository.list_equipment(
+        cursor=cursor, limit=limit, include_scrapped=include_scrapped, search=q
+    )
+    log_audit_event(request, user_id, 'read', 'equipment', 0, {'count': len(data), 'action': 'search', 'q': q})
+    _set_paging_headers(request, response, next_cursor)
+    return data
+
+
+@equipment_router.get("/equipment/{equipment_id}", tags=["equipment"])
+async def get_equipment(
+    equipment_id: int,
+    request: Request,
+    response: Response,
+    user_id: int = Depends(check_user_permission('read')),
+):
+    """Get equipment by ID (scrapped equipment is still readable, with status SCRAP)"""
+    not_modified = await conditional_get(request, response, EQUIPMENT_RESOURCES, f"detail/{equipment_id}")
+    if not_modified:
+        return not_modified
+    equipment = await EquipmentRepository.get_equipment(equipment_id)
+    if not equipment:
+        raise HTTPException(status_code=404, detail='Equipment not found')
+    log_audit_event(
+        request, user_id, 'read', 'equipment', equipment_id,
+        {'action': 'get_by_id', 'scrapped': is_equipment_scrapped(equipment)},
+    )
+    return equipment
@@ -0,0 +1,100 @@
+import time
+from typing import List
+
+from fastapi import APIRouter, Response
+
+from src.models import metrics
+from src.models.db import apool
+
+metrics_router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# apool.get_stats() keys exported as gauges; the rest are running totals
+POOL_GAUGES = {
+    "pool_min": "Configured minimum connections",
+    "pool_max": "Configured maximum connections",
+    "pool_size": "Connections open, in use or idle",
+    "pool_available": "Idle connections ready to hand out",
+    "requests_waiting": "Callers queued for a connection",
+}
+
+
+def _route_template(scope) -> str:
+    """Path template of the route that served the request, e.g. /api/equipment/{equipment_id}.
+
+    The router stores the matched route in the shared scope. Depending on the
+    FastAPI version an included route's path may lack the router prefix, so
+    the prefix is recovered as the part of the request path in front of the
+    longest suffix the route matches.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+    path = scope["path"]
+    for i, char in enumerate(path):
+        if char == "/" and route.path_regex.match(path[i:]):
+            return path[:i] + template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    Records latency, response size and in-flight count for every HTTP request.
+
+    Plain ASGI rather than BaseHTTPMiddleware so streamed responses
+    (/api/maintenance/stream) pass through unbuffered; their latency is the
+    stream's lifetime.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        metrics.http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.http_requests_in_flight.dec()
+            path = _route_template(scope)
+            method = scope["method"]
+            metrics.http_request_duration.observe(time.perf_counter() - started, method, path, str(status))
+            metrics.http_response_size.observe(size, method, path)
+
+
+def _pool_lines() -> List[str]:
+    stats = apool.get_stats()
+    lines = []
+    for key, value in sorted(stats.items()):
+        if key in POOL_GAUGES:
+            name = f"db_pool_{key}"
+            lines += [f"# HELP {name} {POOL_GAUGES[key]}", f"# TYPE {name} gauge", f"{name} {value}"]
+        else:
+            name = f"db_pool_{key}_total"
+            lines += [f"# TYPE {name} counter", f"{name} {value}"]
+    in_use = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+    lines += ["# HELP db_pool_in_use Connections checked out", "# TYPE db_pool_in_use gauge", f"db_pool_in_use {in_use}"]
+    return lines
+
+
+@metrics_router.get("/metrics", tags=["metrics"], include_in_schema=False)
+async def prometheus_metrics():
+    """Request, query and connection-pool metrics in the Prometheus text format"""
+    return Response(content=metrics.render(_pool_lines()), media_type=PROMETHEUS_CONTENT_TYPE)
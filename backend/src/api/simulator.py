@@ -4,6 +4,9 @@ Configuration via env vars:
 - SIM_ENABLE=1 to turn on
 - SIM_DATA_PATH=/path/to/data.csv (optional; if absent, uses synthetic rows)
 - SIM_INTERVAL_SECONDS=20 (default 20)
+
+Rows are offered to the alert coalescer, so a recurring simulated alert bumps
+the counter on its open request instead of adding a new card every interval.
 """
 
 import asyncio
@@ -11,9 +14,12 @@ import csv
 import os
 import random
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from src.services.alerts import alert_coalescer
 
-from src.models.repository import MaintenanceRepository
+# maintenance_requests.priority is 1-4; simulated rows may name the level
+PRIORITY_LEVELS = {"low": 1, "medium": 2, "high": 3, "critical": 4}
 
 
 def _load_csv_rows(csv_path: Path) -> List[Dict[str, Any]]:
@@ -30,6 +36,15 @@ def _pick_batch(rows: List[Dict[str, Any]], batch_size: int) -> List[Dict[str, A
     return random.sample(rows, min(batch_size, len(rows)))
 
 
+def _priority_level(value: Any) -> Optional[int]:
+    if value in (None, ""):
+        return None
+    try:
+        return min(max(int(value), 1), 4)
+    except (TypeError, ValueError):
+        return PRIORITY_LEVELS.get(str(value).strip().lower())
+
+
 def _row_to_request(row: Dict[str, Any]) -> Dict[str, Any]:
     # Handle general maintenance-like rows with subject/priority
     subject = row.get("subject") or row.get("issue") or row.get("title")
@@ -68,7 +83,7 @@ def _row_to_request(row: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "subject": subject,
         "status": status,
-        "priority": priority,
+        "priority": _priority_level(priority),
         "equipment_id": equipment_id,
         "description": description,
     }
@@ -103,15 +118,13 @@ async def run_simulator(stop_event: asyncio.Event):
             batch = _synthetic_rows()
         for row in batch:
             payload = _row_to_request(row)
-            try:
-                MaintenanceRepository.insert_request(
-                    subject=payload["subject"],
-                    status=payload["status"],
-                    priority=payload.get("priority"),
-                    equipment_id=payload.get("equipment_id"),
-                    description=payload.get("description"),
-                )
-            except Exception as e:
-                # Log and continue; avoid crashing the simulator
-                print(f"Simulator insert failed: {e}")
+            # The coalescer owns the database write and its error handling
+            alert_coalescer.offer(
+                equipment_id=payload.get("equipment_id"),
+                alert_key=payload["subject"],
+                subject=payload["subject"],
+                priority=payload.get("priority"),
+                description=payload.get("description"),
+                status=payload["status"],
+            )
         await asyncio.sleep(interval)
@@ -0,0 +1,167 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from src.models.rollups import METRICS, TelemetryHistoryRepository, telemetry_rollups
+from src.models.telemetry import BufferFull, equipment_directory, telemetry_buffer
+from src.services.alerts import alert_coalescer
+
+telemetry_router = APIRouter()
+
+# Per-request cap on how many rejected readings are echoed back
+MAX_REPORTED_ERRORS = 20
+# telemetry_readings.equipment_id is an INTEGER
+MAX_EQUIPMENT_ID = 2**31 - 1
+
+
+def _parse_body(body: bytes, content_type: str) -> List[Any]:
+    """Accept NDJSON, a JSON array, or an object with a ``readings`` array."""
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    payload = json.loads(body)
+    if isinstance(payload, dict):
+        payload = payload.get("readings", [payload])
+    if not isinstance(payload, list):
+        raise ValueError("Expected a JSON array of readings")
+    return payload
+
+
+def _equipment_id(value) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise TypeError(f"equipment_id must be an integer, got {value!r}")
+    equipment_id = int(value)
+    if not 0 < equipment_id <= MAX_EQUIPMENT_ID:
+        raise ValueError(f"equipment_id out of range: {value!r}")
+    return equipment_id
+
+
+def _equipment_name(reading: dict) -> str:
+    name = reading.get("equipment") or reading.get("equipment_name") or reading.get("name")
+    if not isinstance(name, str):
+        raise TypeError(f"Equipment name must be a string, got {name!r}")
+    return name
+
+
+def _metric(value) -> Optional[float]:
+    return None if value is None or value == "" else float(value)
+
+
+def _as_utc(ts: datetime) -> datetime:
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _timestamp(value, default: datetime) -> datetime:
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value, timezone.utc)
+        except (OverflowError, OSError):
+            raise ValueError(f"Epoch timestamp out of range: {value!r}")
+    return _as_utc(datetime.fromisoformat(value))
+
+
+@telemetry_router.post("/telemetry", status_code=202, tags=["telemetry"])
+async def ingest_telemetry(request: Request):
+    """Queue a batch of sensor readings for the next COPY flush.
+
+    Each reading carries ``equipment_id`` or an equipment ``name``, an optional
+    ``recorded_at`` (ISO-8601 or epoch seconds, default now) and any of
+    temperature/pressure/vibration/humidity. Invalid readings, including ones
+    for equipment that does not exist, are rejected individually and reported
+    by index; a batch with no valid reading is a 422.
+    """
+    try:
+        readings = _parse_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed telemetry payload: {e}")
+
+    # Look up every referenced name and id in one pass; malformed ones are
+    # reported per reading below
+    names, claimed = set(), set()
+    for r in readings:
+        if not isinstance(r, dict):
+            continue
+        try:
+            if r.get("equipment_id") is None:
+                names.add(_equipment_name(r))
+            else:
+                claimed.add(_equipment_id(r["equipment_id"]))
+        except (TypeError, ValueError):
+            pass
+    ids = await equipment_directory.resolve(list(names)) if names else {}
+    known = await equipment_directory.known(claimed) if claimed else set()
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    errors = []
+    for index, r in enumerate(readings):
+        try:
+            if r.get("equipment_id") is None:
+                name = _equipment_name(r)
+                equipment_id = ids.get(name)
+                if equipment_id is None:
+                    raise ValueError(f"Unknown equipment {name!r}")
+            else:
+                equipment_id = _equipment_id(r["equipment_id"])
+                if equipment_id not in known:
+                    raise ValueError(f"Unknown equipment id {equipment_id}")
+            rows.append((
+                equipment_id,
+                _timestamp(r.get("recorded_at", r.get("timestamp")), now),
+                _metric(r.get("temperature")),
+                _metric(r.get("pressure")),
+                _metric(r.get("vibration")),
+                _metric(r.get("humidity")),
+            ))
+        except (AttributeError, TypeError, ValueError) as e:
+            errors.append({"index": index, "error": str(e)})
+
+    if errors and not rows:
+        raise HTTPException(
+            status_code=422,
+            detail={"accepted": 0, "rejected": len(errors), "errors": errors[:MAX_REPORTED_ERRORS]},
+        )
+    try:
+        telemetry_buffer.add(rows)
+    except BufferFull as e:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": f"Telemetry backlog full: {e}"},
+            headers={"Retry-After": "1"},
+        )
+    return {"accepted": len(rows), "rejected": len(errors), "errors": errors[:MAX_REPORTED_ERRORS]}
+
+
+@telemetry_router.get("/telemetry/stats", tags=["telemetry"])
+async def telemetry_stats():
+    return {
+        **telemetry_buffer.stats(),
+        "alerts": alert_coalescer.stats(),
+        "rollups": telemetry_rollups.stats(),
+    }
+
+
+@telemetry_router.get("/equipment/{equipment_id}/telemetry", tags=["telemetry"])
+async def equipment_telemetry(
+    equipment_id: int,
+    start: Optional[datetime] = Query(None, description="Defaults to 24 hours before end"),
+    end: Optional[datetime] = Query(None, description="Defaults to now"),
+    metrics: Optional[str] = Query(None, description="Comma-separated subset of " + ",".join(METRICS)),
+    max_points: int = Query(500, ge=10, le=5000, description="Upper bound on buckets returned"),
+    resolution: Optional[str] = Query(None, pattern="^(raw|1m|1h|1d)$", description="Override the automatic choice"),
+):
+    """Sensor history for charts, served from the coarsest rollup that still fits ``max_points``."""
+    end = _as_utc(end) if end else datetime.now(timezone.utc)
+    start = _as_utc(start) if start else end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    selected = [m.strip() for m in metrics.split(",") if m.strip()] if metrics else list(METRICS)
+    try:
+        return await TelemetryHistoryRepository.history(
+            equipment_id, start, end, metrics=selected, max_points=max_points, resolution=resolution
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
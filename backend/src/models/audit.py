@@ -0,0 +1,120 @@
+"""Asynchronous audit log: handlers enqueue events, one task COPYs them in batches.
+
+Configuration via env vars:
+- AUDIT_BATCH_SIZE=1000 (write as soon as this many events are pending)
+- AUDIT_FLUSH_MS=500 (write at least this often)
+- AUDIT_MAX_PENDING=50000 (events beyond this backlog are dropped and counted)
+
+Recording an event is a tuple append, so auditing adds microseconds to a
+request. When the database falls behind, the bounded queue sheds new events
+rather than slowing requests down; ``stats()`` reports what was dropped.
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from .db import apool
+
+AUDIT_COLUMNS = (
+    "occurred_at", "user_id", "action", "resource_type", "resource_id", "details", "ip_address", "user_agent",
+)
+
+
+class AuditRepository:
+    @staticmethod
+    async def copy_events(rows: List[tuple]) -> int:
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                async with cur.copy(f"COPY audit_log ({', '.join(AUDIT_COLUMNS)}) FROM STDIN") as copy:
+                    for row in rows:
+                        await copy.write_row(row)
+            await conn.commit()
+        return len(rows)
+
+
+class AuditLog:
+    def __init__(self, batch_size: int = 1000, flush_interval: float = 0.5, max_pending: int = 50000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self._pending: List[tuple] = []
+        self._wakeup = asyncio.Event()
+
+    def record(
+        self,
+        action: str,
+        resource_type: str,
+        resource_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        details: Optional[dict] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> bool:
+        """Queue one event; returns False if it was dropped because the backlog is full."""
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return False
+        # details stay a dict until the writer serializes the batch
+        self._pending.append(
+            (datetime.now(timezone.utc), user_id, action, resource_type, resource_id, details, ip_address, user_agent)
+        )
+        self.recorded += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> None:
+        while self._pending:
+            batch = self._pending[: self.batch_size]
+            del self._pending[: self.batch_size]
+            rows = [row[:5] + (json.dumps(row[5]) if row[5] else None,) + row[6:] for row in batch]
+            try:
+                self.written += await AuditRepository.copy_events(rows)
+                self.flushes += 1
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"Audit flush failed, lost {len(batch)} events: {e}")
+                break
+            if len(self._pending) < self.batch_size:
+                break
+
+    async def run(self, stop_event: asyncio.Event):
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+        # Drain whatever arrived before shutdown
+        while self._pending:
+            await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "pending": self.pending,
+            "flushes": self.flushes,
+        }
+
+
+audit_log = AuditLog(
+    batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "1000")),
+    flush_interval=int(os.getenv("AUDIT_FLUSH_MS", "500")) / 1000,
+    max_pending=int(os.getenv("AUDIT_MAX_PENDING", "50000")),
+)
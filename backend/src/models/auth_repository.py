@@ -1,24 +1,193 @@
-import hashlib
+import asyncio
+import os
 import secrets
-from datetime import datetime, timedelta, timezone
-from typing import Optional, List
-from .db import pool
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, List, Set, Tuple
+from .db import apool
+from .passwords import hash_password, password_hasher
+
+SESSION_CHANNEL = "session_revocations"
+# Oldest sessions beyond this many per user are revoked at login
+SESSION_MAX_PER_USER = int(os.getenv("SESSION_MAX_PER_USER", "10"))
+
+
+class SessionCache:
+    """Bounded LRU of session token -> user, never trusted past the session's expires_at.
+
+    Entries live for at most ``ttl`` seconds so a revocation made by another
+    process is picked up even if its notification is missed.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._drop(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token: str, user: dict, expires_at: datetime) -> None:
+        remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+        if remaining <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (time.monotonic() + min(self.ttl, remaining), user)
+            self._entries.move_to_end(token)
+            self._tokens_by_user.setdefault(user["id"], set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_token(self, token: str) -> None:
+        with self._lock:
+            self._drop(token)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._drop(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _drop(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[1]["id"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[1]["id"]]
+
+
+session_cache = SessionCache(
+    max_entries=int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("SESSION_CACHE_TTL_SECONDS", "60")),
+)
+
+
+class LastLoginRecorder:
+    """Coalesces last_login writes: logins update an in-memory map and a
+    background task writes it back in one UPDATE per interval, so a shift
+    change of logins costs one statement instead of one commit each.
+    """
+
+    def __init__(self):
+        self.recorded = 0
+        self.written = 0
+        self.flushes = 0
+        self._pending: Dict[int, datetime] = {}
+
+    def record(self, user_id: int, at: Optional[datetime] = None) -> None:
+        self._pending[user_id] = at or datetime.now(timezone.utc)
+        self.recorded += 1
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        try:
+            async with apool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(
+                        """
+                        UPDATE users u
+                        SET last_login = v.at
+                        FROM unnest(%s::int[], %s::timestamptz[]) AS v(id, at)
+                        WHERE u.id = v.id AND (u.last_login IS NULL OR u.last_login < v.at)
+                        """,
+                        (list(batch), list(batch.values())),
+                    )
+                await conn.commit()
+        except Exception:
+            # Keep them for the next pass; logins recorded meanwhile are newer
+            for user_id, at in batch.items():
+                self._pending.setdefault(user_id, at)
+            raise
+        self.written += len(batch)
+        self.flushes += 1
+        return len(batch)
+
+    async def run(self, stop_event: asyncio.Event, interval: float = 5.0):
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"last_login flush failed: {e}")
+
+    def stats(self) -> dict:
+        return {"recorded": self.recorded, "written": self.written, "pending": len(self._pending), "flushes": self.flushes}
+
+
+last_login_recorder = LastLoginRecorder()
+
+# One statement opens a session, evicts the user's oldest ones past the cap
+# and, when given a new hash, upgrades a legacy password hash. The DELETE
+# sees the table as it was before the INSERT, so it keeps
+# SESSION_MAX_PER_USER - 1 existing sessions. Identical notifications within
+# a transaction are delivered once.
+OPEN_SESSION_SQL = """
+    WITH rehashed AS (
+        UPDATE users SET password_hash = %(new_hash)s
+        WHERE id = %(user_id)s AND %(new_hash)s::text IS NOT NULL
+    ),
+    created AS (
+        INSERT INTO user_sessions (user_id, session_token, expires_at)
+        VALUES (%(user_id)s, %(token)s, %(expires_at)s)
+    ),
+    evicted AS (
+        DELETE FROM user_sessions
+        WHERE id IN (
+            SELECT id FROM user_sessions
+            WHERE user_id = %(user_id)s
+            ORDER BY expires_at DESC, id DESC
+            OFFSET %(keep)s
+        )
+        RETURNING session_token
+    )
+    SELECT session_token, pg_notify(%(channel)s, %(payload)s) FROM evicted
+"""
 
 
 class UserRepository:
     @staticmethod
     def hash_password(password: str) -> str:
-        """Simple password hashing (use bcrypt in production)"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Salted scrypt hash (blocking; request handlers go through password_hasher)"""
+        return hash_password(password)
 
     @staticmethod
-    def create_user(email: str, password: str, full_name: str, role: str = "viewer", department: Optional[str] = None) -> Optional[dict]:
+    async def create_user(email: str, password: str, full_name: str, role: str = "viewer", department: Optional[str] = None) -> Optional[dict]:
         """Register a new user"""
-        password_hash = UserRepository.hash_password(password)
-        with pool.connection() as conn:
-            with conn.cursor() as cur:
+        password_hash = await password_hasher.hash(password)
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
                 try:
-                    cur.execute(
+                    await cur.execute(
                         """
                         INSERT INTO users (email, password_hash, full_name, role, department)
                         VALUES (%s, %s, %s, %s, %s)
@@ -26,8 +195,8 @@ class UserRepository:
                         """,
                         (email, password_hash, full_name, role, department),
                     )
-                    row = cur.fetchone()
-                    conn.commit()
+                    row = await cur.fetchone()
+                    await conn.commit()
                     if row:
                         return {
                             "id": row[0],
@@ -38,73 +207,112 @@ class UserRepository:
                             "is_active": row[5],
                         }
                 except Exception as e:
-                    conn.rollback()
+                    await conn.rollback()
                     print(f"User creation error: {e}")
                     return None
 
     @staticmethod
-    def authenticate_user(email: str, password: str) -> Optional[dict]:
-        """Authenticate user and return user data"""
-        password_hash = UserRepository.hash_password(password)
-        with pool.connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+    async def login(email: str, password: str) -> Optional[Tuple[dict, str]]:
+        """Check credentials and open a session; returns (user, token) or None.
+
+        Two round trips on two short pool checkouts: the user lookup, then one
+        write statement (session, evictions, optional rehash) in its own
+        transaction. The ~60ms password check runs between them, because
+        holding a connection through it would cap concurrent logins at the
+        pool size; login is therefore not one connection and one transaction
+        end to end. last_login is recorded in memory and written by
+        LastLoginRecorder.
+        """
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
-                    SELECT id, email, full_name, role, department, is_active
+                    SELECT id, email, full_name, role, department, is_active, password_hash
                     FROM users
-                    WHERE email = %s AND password_hash = %s AND is_active = true
+                    WHERE email = %s AND is_active = true
                     """,
-                    (email, password_hash),
+                    (email,),
                 )
-                row = cur.fetchone()
-                if row:
-                    # Update last login
-                    cur.execute("UPDATE users SET last_login = %s WHERE id = %s", (datetime.now(timezone.utc), row[0]))
-                    conn.commit()
-                    return {
-                        "id": row[0],
-                        "email": row[1],
-                        "full_name": row[2],
-                        "role": row[3],
-                        "department": row[4],
-                        "is_active": row[5],
-                    }
-                return None
+                row = await cur.fetchone()
+        if not row:
+            # Same work as a wrong password, so timing does not reveal accounts
+            await password_hasher.verify_dummy(password)
+            return None
+        # Hashing runs off the event loop and without holding a pooled connection
+        ok, needs_rehash = await password_hasher.verify(password, row[6])
+        if not ok:
+            return None
+        new_hash = await password_hasher.hash(password) if needs_rehash else None
+
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                token, evicted = await UserRepository._open_session(cur, row[0], new_hash)
+            await conn.commit()
+        for old_token in evicted:
+            session_cache.invalidate_token(old_token)
+        last_login_recorder.record(row[0])
+        user = {
+            "id": row[0],
+            "email": row[1],
+            "full_name": row[2],
+            "role": row[3],
+            "department": row[4],
+            "is_active": row[5],
+        }
+        return user, token
 
     @staticmethod
-    def create_session(user_id: int) -> str:
-        """Create a session token for user"""
+    async def _open_session(cur, user_id: int, new_hash: Optional[str] = None) -> Tuple[str, List[str]]:
+        """Insert a session, evict past the cap and store ``new_hash`` if given, in one statement.
+
+        Returns (token, evicted tokens).
+        """
         token = secrets.token_urlsafe(32)
-        expires_at = datetime.now(timezone.utc) + timedelta(days=7)
-        with pool.connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO user_sessions (user_id, session_token, expires_at)
-                    VALUES (%s, %s, %s)
-                    """,
-                    (user_id, token, expires_at),
-                )
-                conn.commit()
+        await cur.execute(
+            OPEN_SESSION_SQL,
+            {
+                "user_id": user_id,
+                "new_hash": new_hash,
+                "token": token,
+                "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
+                "keep": max(SESSION_MAX_PER_USER - 1, 0),
+                "channel": SESSION_CHANNEL,
+                "payload": f'{{"user_id": {user_id}}}',
+            },
+        )
+        return token, [r[0] for r in await cur.fetchall()]
+
+    @staticmethod
+    async def create_session(user_id: int) -> str:
+        """Create a session token for user, revoking their oldest sessions past the cap"""
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                token, evicted = await UserRepository._open_session(cur, user_id)
+            await conn.commit()
+        for old_token in evicted:
+            session_cache.invalidate_token(old_token)
         return token
 
     @staticmethod
-    def get_user_by_token(token: str) -> Optional[dict]:
-        """Get user by session token"""
-        with pool.connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+    async def get_user_by_token(token: str) -> Optional[dict]:
+        """Get user by session token, served from the session cache when possible"""
+        user = session_cache.get(token)
+        if user is not None:
+            return user
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
-                    SELECT u.id, u.email, u.full_name, u.role, u.department, u.is_active
+                    SELECT u.id, u.email, u.full_name, u.role, u.department, u.is_active, s.expires_at
                     FROM users u
                     JOIN user_sessions s ON u.id = s.user_id
                     WHERE s.session_token = %s AND s.expires_at > %s AND u.is_active = true
                     """,
                     (token, datetime.now(timezone.utc)),
                 )
-                row = cur.fetchone()
+                row = await cur.fetchone()
                 if row:
-                    return {
+                    user = {
                         "id": row[0],
                         "email": row[1],
                         "full_name": row[2],
@@ -112,76 +320,258 @@ class UserRepository:
                         "department": row[4],
                         "is_active": row[5],
                     }
+                    # expires_at is a naive TIMESTAMP written as UTC by create_session
+                    expires_at = row[6] if row[6].tzinfo else row[6].replace(tzinfo=timezone.utc)
+                    session_cache.put(token, user, expires_at)
+                    return user
                 return None
 
+    @staticmethod
+    async def delete_session(token: str) -> bool:
+        """Log out a single session and revoke it in every worker's cache"""
+        session_cache.invalidate_token(token)
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "DELETE FROM user_sessions WHERE session_token = %s RETURNING user_id",
+                    (token,),
+                )
+                row = await cur.fetchone()
+                if row:
+                    await cur.execute("SELECT pg_notify(%s, %s)", (SESSION_CHANNEL, f'{{"user_id": {row[0]}}}'))
+                await conn.commit()
+        return row is not None
+
+    @staticmethod
+    async def deactivate_user(user_id: int) -> bool:
+        """Deactivate a user and revoke all of their cached sessions"""
+        session_cache.invalidate_user(user_id)
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "UPDATE users SET is_active = false WHERE id = %s RETURNING id",
+                    (user_id,),
+                )
+                row = await cur.fetchone()
+                if row:
+                    await cur.execute("SELECT pg_notify(%s, %s)", (SESSION_CHANNEL, f'{{"user_id": {user_id}}}'))
+                await conn.commit()
+        return row is not None
+
 
 class TaskRepository:
     @staticmethod
-    def assign_task(maintenance_request_id: int, assigned_to_user_id: int, assigned_by_user_id: int, department: Optional[str], due_date: Optional[str], notes: Optional[str]) -> bool:
+    async def assign_task(maintenance_request_id: int, assigned_to_user_id: int, assigned_by_user_id: int, department: Optional[str], due_date: Optional[str], notes: Optional[str]) -> bool:
         """Admin assigns a task to a user"""
-        with pool.connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     INSERT INTO task_assignments (maintenance_request_id, assigned_to_user_id, assigned_by_user_id, department, due_date, notes)
                     VALUES (%s, %s, %s, %s, %s, %s)
                     """,
                     (maintenance_request_id, assigned_to_user_id, assigned_by_user_id, department, due_date, notes),
                 )
-                conn.commit()
+                await conn.commit()
         return True
 
     @staticmethod
-    def get_user_tasks(user_id: int) -> List[dict]:
-        """Get tasks assigned to a user"""
-        with pool.connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+    async def assign_tasks_bulk(assignments: List[dict], assigned_by_user_id: int, rule: Optional[dict] = None) -> List[dict]:
+        """Validate and insert many assignments in one transaction; returns one result per item.
+
+        ``assignments`` carry the TaskAssignment fields. ``rule`` (TaskAssignmentRule
+        fields) adds the matching open requests, dealt round-robin to its assignees.
+        Items referencing a missing request, a missing/inactive user or an
+        unparseable due date are reported and skipped; the rest are inserted
+        together.
+        """
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                items = list(assignments)
+                if rule:
+                    await cur.execute(
+                        """
+                        SELECT mr.id FROM maintenance_requests mr
+                        WHERE mr.status = ANY(%(status)s)
+                            AND (%(priority)s::text[] IS NULL OR mr.priority::text = ANY(%(priority)s::text[]))
+                            AND (%(team_id)s::int IS NULL OR mr.team_id = %(team_id)s::int)
+                            AND (%(equipment_id)s::int IS NULL OR mr.equipment_id = %(equipment_id)s::int)
+                            AND (NOT %(unassigned_only)s OR NOT EXISTS (
+                                SELECT 1 FROM task_assignments ta WHERE ta.maintenance_request_id = mr.id
+                            ))
+                        ORDER BY mr.id
+                        LIMIT %(limit)s
+                        """,
+                        rule,
+                    )
+                    assignees = rule["assignee_ids"]
+                    items += [
+                        {
+                            "maintenance_request_id": r[0],
+                            "assigned_to_user_id": assignees[i % len(assignees)],
+                            "department": rule.get("department"),
+                            "due_date": rule.get("due_date"),
+                            "notes": rule.get("notes"),
+                        }
+                        for i, r in enumerate(await cur.fetchall())
+                    ]
+                if not items:
+                    return []
+
+                results = [
+                    {"index": i, "maintenance_request_id": a["maintenance_request_id"],
+                     "assigned_to_user_id": a["assigned_to_user_id"], "success": False}
+                    for i, a in enumerate(items)
+                ]
+                due_dates = []
+                for a, result in zip(items, results):
+                    try:
+                        due_dates.append(datetime.fromisoformat(a["due_date"]) if a.get("due_date") else None)
+                    except (TypeError, ValueError):
+                        due_dates.append(None)
+                        result["error"] = "Invalid due_date"
+
+                # Every referenced request and user checked in one round trip
+                await cur.execute(
                     """
-                    SELECT ta.id, ta.maintenance_request_id, mr.subject, mr.status, ta.due_date, ta.notes
+                    SELECT mr.id IS NOT NULL, u.id IS NOT NULL AND u.is_active
+                    FROM unnest(%s::int[], %s::int[]) WITH ORDINALITY AS i(request_id, user_id, ord)
+                    LEFT JOIN maintenance_requests mr ON mr.id = i.request_id
+                    LEFT JOIN users u ON u.id = i.user_id
+                    ORDER BY i.ord
+                    """,
+                    ([a["maintenance_request_id"] for a in items], [a["assigned_to_user_id"] for a in items]),
+                )
+                for result, (request_ok, user_ok) in zip(results, await cur.fetchall()):
+                    if "error" in result:
+                        continue
+                    if not request_ok:
+                        result["error"] = "Maintenance request not found"
+                    elif not user_ok:
+                        result["error"] = "User not found or inactive"
+
+                valid = [i for i, r in enumerate(results) if "error" not in r]
+                if valid:
+                    await cur.execute(
+                        """
+                        INSERT INTO task_assignments
+                            (maintenance_request_id, assigned_to_user_id, assigned_by_user_id, department, due_date, notes)
+                        SELECT i.request_id, i.user_id, %s, i.department, i.due_date, i.notes
+                        FROM unnest(%s::int[], %s::int[], %s::text[], %s::timestamp[], %s::text[])
+                            WITH ORDINALITY AS i(request_id, user_id, department, due_date, notes, ord)
+                        ORDER BY i.ord
+                        RETURNING id
+                        """,
+                        (
+                            assigned_by_user_id,
+                            [items[i]["maintenance_request_id"] for i in valid],
+                            [items[i]["assigned_to_user_id"] for i in valid],
+                            [items[i].get("department") for i in valid],
+                            [due_dates[i] for i in valid],
+                            [items[i].get("notes") for i in valid],
+                        ),
+                    )
+                    # Serial ids are drawn in insertion (ord) order
+                    for i, (new_id,) in zip(valid, sorted(await cur.fetchall())):
+                        results[i].update(success=True, id=new_id)
+            await conn.commit()
+        return results
+
+    @staticmethod
+    async def get_user_tasks(
+        user_id: int,
+        include_closed: bool = False,
+        status: Optional[List[str]] = None,
+        due_from: Optional[datetime] = None,
+        due_to: Optional[datetime] = None,
+        cursor: Optional[Tuple[Optional[datetime], int]] = None,
+        limit: int = 50,
+    ) -> Tuple[List[dict], Optional[Tuple[Optional[datetime], int]]]:
+        """One page of a user's tasks ordered by (due_date NULLS LAST, id), plus the next cursor.
+
+        Open work is served from the partial index on (assigned_to_user_id,
+        due_date, id) WHERE request_open, so a page costs the same however many
+        finished tasks the user has. ``cursor`` is the (due_date, id) of the
+        last row of the previous page.
+        """
+        where = ["ta.assigned_to_user_id = %s"]
+        params: list = [user_id]
+        if not include_closed:
+            where.append("ta.request_open")
+        if status:
+            where.append("mr.status = ANY(%s)")
+            params.append(status)
+        if due_from is not None:
+            where.append("ta.due_date >= %s")
+            params.append(due_from)
+        if due_to is not None:
+            where.append("ta.due_date <= %s")
+            params.append(due_to)
+        if cursor is not None:
+            cursor_due, cursor_id = cursor
+            if cursor_due is None:
+                # Already into the undated tail
+                where.append("ta.due_date IS NULL AND ta.id > %s")
+                params.append(cursor_id)
+            else:
+                where.append("((ta.due_date, ta.id) > (%s, %s) OR ta.due_date IS NULL)")
+                params += [cursor_due, cursor_id]
+        params.append(limit + 1)
+
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    f"""
+                    SELECT ta.id, ta.maintenance_request_id, mr.subject, mr.status, ta.due_date, ta.notes, ta.department
                     FROM task_assignments ta
                     JOIN maintenance_requests mr ON ta.maintenance_request_id = mr.id
-                    WHERE ta.assigned_to_user_id = %s
-                    ORDER BY ta.due_date ASC NULLS LAST
+                    WHERE {" AND ".join(where)}
+                    ORDER BY ta.due_date ASC NULLS LAST, ta.id ASC
+                    LIMIT %s
                     """,
-                    (user_id,),
+                    params,
                 )
-                rows = cur.fetchall()
-                return [
-                    {"id": r[0], "request_id": r[1], "subject": r[2], "status": r[3], "due_date": r[4], "notes": r[5]}
-                    for r in rows
-                ]
+                rows = await cur.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][4], rows[-1][0])
+        return [
+            {"id": r[0], "request_id": r[1], "subject": r[2], "status": r[3], "due_date": r[4], "notes": r[5], "department": r[6]}
+            for r in rows
+        ], next_cursor
 
 
 class ReportRepository:
     @staticmethod
-    def get_equipment_failure_report(start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[dict]:
-        """Generate equipment failure report"""
-        with pool.connection() as conn:
-            with conn.cursor() as cur:
-                query = """
-                    SELECT 
+    async def get_equipment_failure_report(start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[dict]:
+        """Generate equipment failure report from the daily buckets (both bounds inclusive).
+
+        Range filters sit in the join condition so equipment without failures
+        in the period still appears with zero counts.
+        """
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    SELECT
                         e.id,
                         e.name,
-                        COUNT(ef.id) as failure_count,
-                        COALESCE(SUM(ef.downtime_hours), 0) as total_downtime,
-                        MAX(ef.failure_date) as last_failure
+                        COALESCE(SUM(b.failure_count), 0) as failure_count,
+                        COALESCE(SUM(b.downtime_hours), 0) as total_downtime,
+                        MAX(b.last_failure) as last_failure
                     FROM equipment e
-                    LEFT JOIN equipment_failures ef ON e.id = ef.equipment_id
-                    WHERE 1=1
-                """
-                params = []
-                if start_date:
-                    query += " AND ef.failure_date >= %s"
-                    params.append(start_date)
-                if end_date:
-                    query += " AND ef.failure_date <= %s"
-                    params.append(end_date)
-
-                query += " GROUP BY e.id, e.name ORDER BY failure_count DESC"
-
-                cur.execute(query, params)
-                rows = cur.fetchall()
+                    LEFT JOIN equipment_failure_daily b
+                        ON b.equipment_id = e.id
+                        AND (%(start)s::date IS NULL OR b.day >= %(start)s::date)
+                        AND (%(end)s::date IS NULL OR b.day <= %(end)s::date)
+                    GROUP BY e.id, e.name
+                    ORDER BY failure_count DESC, e.id
+                    """,
+                    {"start": start_date, "end": end_date},
+                )
+                rows = await cur.fetchall()
                 return [
                     {
                         "equipment_id": r[0],
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -38,6 +38,25 @@ class TaskAssignment(BaseModel):
     notes: Optional[str] = None
 
 
+class TaskAssignmentRule(BaseModel):
+    """Select open requests by filter and deal them round-robin to ``assignee_ids``."""
+    assignee_ids: List[int] = Field(min_length=1)
+    status: List[str] = ["New"]
+    priority: Optional[List[str]] = None
+    team_id: Optional[int] = None
+    equipment_id: Optional[int] = None
+    unassigned_only: bool = True
+    limit: int = Field(500, ge=1, le=5000)
+    department: Optional[str] = None
+    due_date: Optional[str] = None
+    notes: Optional[str] = None
+
+
+class BulkTaskAssignment(BaseModel):
+    assignments: List[TaskAssignment] = Field(default_factory=list, max_length=5000)
+    rule: Optional[TaskAssignmentRule] = None
+
+
 class EquipmentFailureReport(BaseModel):
     equipment_id: int
     equipment_name: str
@@ -0,0 +1,152 @@
+"""Read-through cache for hot repository reads.
+
+Configuration via env vars:
+- CACHE_BACKEND=memory|redis (default memory)
+- CACHE_REDIS_URL=redis://localhost:6379/0 (redis backend only)
+- CACHE_TTL_SECONDS=5 (default 5)
+- CACHE_MAX_ENTRIES=256 (memory backend only)
+
+The memory backend is per-process; the redis backend is shared by every
+uvicorn worker, so an invalidation in one worker is seen by all of them.
+Both expose the same coroutine API so callers never block the event loop.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+MISSING = object()
+
+
+class MemoryBackend:
+    """Size-bounded LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared backend; values must be JSON-serializable."""
+
+    def __init__(self, url: str, prefix: str = "gearguard:cache:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        self.prefix = prefix
+        self.evictions = 0  # Redis evicts on its own maxmemory policy
+        self._client = redis.Redis.from_url(url)
+
+    async def get(self, key: str) -> Any:
+        raw = await self._client.get(self.prefix + key)
+        return MISSING if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self._client.set(self.prefix + key, json.dumps(value, default=str), px=int(ttl * 1000))
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self.prefix + key)
+
+    async def size(self) -> int:
+        return len([key async for key in self._client.scan_iter(match=self.prefix + "*")])
+
+
+class Cache:
+    def __init__(self, backend, default_ttl: float = 5.0):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        value = await self.backend.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await loader()
+        await self.backend.set(key, value, self.default_ttl if ttl is None else ttl)
+        return value
+
+    async def get_or_load_versioned(
+        self, key: str, version: int, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None
+    ) -> Any:
+        """Like get_or_load, but an entry only counts as a hit for the same ``version``.
+
+        ``version`` must be read before the loader runs, so the stored body is
+        never older than the version it is filed under. A loader that races a
+        newer write at worst files a fresh body under an old version, which
+        the next caller skips; a stale body can never be served for a
+        version it predates, whichever worker cached it.
+        """
+        entry = await self.backend.get(key)
+        if entry is not MISSING and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = await loader()
+        await self.backend.set(key, [version, value], self.default_ttl if ttl is None else ttl)
+        return value
+
+    async def invalidate(self, *keys: str) -> None:
+        for key in keys:
+            await self.backend.delete(key)
+        self.invalidations += len(keys)
+
+    async def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.backend.evictions,
+            "entries": await self.backend.size(),
+        }
+
+
+def _build_cache() -> Cache:
+    ttl = float(os.getenv("CACHE_TTL_SECONDS", "5"))
+    if os.getenv("CACHE_BACKEND", "memory").lower() == "redis":
+        backend = RedisBackend(os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+    else:
+        backend = MemoryBackend(int(os.getenv("CACHE_MAX_ENTRIES", "256")))
+    return Cache(backend, default_ttl=ttl)
+
+
+cache = _build_cache()
@@ -0,0 +1,89 @@
+"""Process-wide maintenance change feed.
+
+One LISTEN connection per API worker receives the ``maintenance_changes``
+notifications emitted by the ``maintenance_requests_notify`` trigger (see
+``database/auth_schema.sql``) and fans them out to every connected stream
+client, so the database only ever sees a single subscription per worker no
+matter how many dashboards are open.
+"""
+
+import asyncio
+import json
+from typing import Awaitable, Callable, List, Set
+
+import psycopg
+
+from .db import DATABASE_URL
+
+CHANNEL = "maintenance_changes"
+RESYNC = {"op": "resync"}
+
+
+class ChangeFeed:
+    def __init__(self, channel: str = CHANNEL, queue_size: int = 256):
+        self.channel = channel
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._listeners: List[Callable[[dict], Awaitable[None]]] = []
+
+    def add_listener(self, listener: Callable[[dict], Awaitable[None]]) -> None:
+        """Run ``listener`` for every change, e.g. to invalidate this worker's caches."""
+        self._listeners.append(listener)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, event: dict) -> None:
+        """Fan an event out to all subscribers without ever blocking the listener."""
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # The client fell too far behind: drop its backlog and ask it to
+                # reload a full snapshot instead of replaying every delta.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    async def _dispatch(self, event: dict) -> None:
+        for listener in self._listeners:
+            try:
+                await listener(event)
+            except Exception as e:
+                print(f"Change feed listener failed: {e}")
+        self.publish(event)
+
+    async def run(self, stop_event: asyncio.Event, retry_seconds: float = 5.0):
+        """Hold the LISTEN connection open until ``stop_event`` is set, reconnecting on failure."""
+        while not stop_event.is_set():
+            try:
+                async with await psycopg.AsyncConnection.connect(DATABASE_URL, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {self.channel}")
+                    # Anything may have changed while we were disconnected.
+                    await self._dispatch(RESYNC)
+                    while not stop_event.is_set():
+                        async for notify in conn.notifies(timeout=1.0):
+                            try:
+                                event = json.loads(notify.payload)
+                            except ValueError:
+                                print(f"Change feed: ignoring malformed payload {notify.payload!r}")
+                                continue
+                            await self._dispatch(event)
+            except Exception as e:
+                print(f"Change feed connection lost: {e}")
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=retry_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+
+change_feed = ChangeFeed()
+# Logout/deactivation notices (see UserRepository.delete_session/deactivate_user)
+session_feed = ChangeFeed("session_revocations")
+# Health score refreshes (see the equipment_health_scores_notify trigger)
+health_feed = ChangeFeed("equipment_health_changes")
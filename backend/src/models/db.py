@@ -1,8 +1,26 @@
+"""Database connection pools.
+
+Pool sizing via env vars (shared by both pools):
+- DB_POOL_MIN_SIZE=1
+- DB_POOL_MAX_SIZE=10
+- DB_POOL_TIMEOUT=30 (seconds a caller waits for a connection)
+- DB_POOL_MAX_WAITING=0 (callers allowed to queue; 0 means unbounded)
+- DB_POOL_MAX_LIFETIME=3600 (seconds before a connection is recycled)
+- DB_POOL_MAX_IDLE=600 (seconds an idle connection above min_size is kept)
+- METRICS_QUERY_TIMINGS=1 (0 stops timing API queries)
+
+``apool`` serves the API, is opened/closed by the app's startup/shutdown
+hooks and times every query it runs (see metrics.TimedCursor). ``pool`` is the
+blocking pool for the CLI scripts, which open it with ``with pool:``.
+"""
+
 import os
 from pathlib import Path
-from psycopg_pool import ConnectionPool
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 from dotenv import load_dotenv, find_dotenv
 
+from .metrics import TimedCursor
+
 # Load environment variables from nearest .env or backend/.env
 found = find_dotenv()
 if found:
@@ -15,16 +33,27 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set; configure backend/.env")
 
+POOL_SETTINGS = {
+    "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+    "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "max_waiting": int(os.getenv("DB_POOL_MAX_WAITING", "0")),
+    "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+    "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "600")),
+}
+
 # Neon requires sslmode=require (included in the URL)
-pool = ConnectionPool(conninfo=DATABASE_URL, min_size=1, max_size=10)
+pool = ConnectionPool(conninfo=DATABASE_URL, open=False, **POOL_SETTINGS)
+API_CONNECT_KWARGS = {"cursor_factory": TimedCursor} if os.getenv("METRICS_QUERY_TIMINGS", "1") != "0" else {}
+apool = AsyncConnectionPool(conninfo=DATABASE_URL, open=False, kwargs=API_CONNECT_KWARGS, **POOL_SETTINGS)
 
 
 def get_conn():
     """Acquire a pooled connection."""
-    return pool.connection()
+    return apool.connection()
 
 
-def get_db_conn():
+async def get_db_conn():
     """Dependency-style context manager for FastAPI."""
-    with pool.connection() as conn:
+    async with apool.connection() as conn:
         yield conn
@@ -0,0 +1,96 @@
+"""Incremental refresh of the materialized equipment health scores.
+
+Configuration via env vars:
+- HEALTH_REFRESH_SECONDS=2 (how often dirty equipment is rescored)
+- HEALTH_REFRESH_BATCH=500 (equipment rescored per pass)
+
+Triggers on equipment, equipment_failures and maintenance_requests add the
+affected equipment ids to ``equipment_health_dirty`` (see
+``database/auth_schema.sql``). Telemetry reaches the score through the
+maintenance requests its alerts raise or bump. Each pass claims a batch of
+dirty ids, scores just those ids with the ``equipment_health_by_id`` view
+(``equipment_health_report`` keyed by id, see
+``database/migrations/0006_equipment_health_by_id_report.sql``) and upserts them
+into ``equipment_health_scores`` with a fresh ``computed_at``. That write
+bumps the ``equipment_health`` version and notifies
+``equipment_health_changes``, which every worker's ``health_feed`` turns into
+a cache invalidation.
+"""
+
+import asyncio
+import os
+
+from .db import apool
+
+
+class HealthScoreRefresher:
+    def __init__(self, batch_size: int = 500):
+        self.batch_size = batch_size
+        self.refreshed = 0
+
+    async def refresh(self) -> int:
+        """Rescore one batch of dirty equipment; returns how many were claimed."""
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    DELETE FROM equipment_health_dirty d
+                    USING (
+                        SELECT equipment_id FROM equipment_health_dirty
+                        ORDER BY marked_at LIMIT %s FOR UPDATE SKIP LOCKED
+                    ) c
+                    WHERE d.equipment_id = c.equipment_id
+                    RETURNING d.equipment_id
+                    """,
+                    (self.batch_size,),
+                )
+                ids = [r[0] for r in await cur.fetchall()]
+                if ids:
+                    await cur.execute(
+                        """
+                        INSERT INTO equipment_health_scores (equipment_id, name, health_score, is_functional, computed_at)
+                        SELECT h.equipment_id, h.name, h.health_score, h.is_functional, now()
+                        FROM equipment_health_by_id h
+                        WHERE h.equipment_id = ANY(%s)
+                        ON CONFLICT (equipment_id) DO UPDATE SET
+                            name = EXCLUDED.name,
+                            health_score = EXCLUDED.health_score,
+                            is_functional = EXCLUDED.is_functional,
+                            computed_at = EXCLUDED.computed_at
+                        RETURNING equipment_id
+                        """,
+                        (ids,),
+                    )
+                    scored = {r[0] for r in await cur.fetchall()}
+                    # Deleted equipment, or equipment the report no longer lists,
+                    # has no score
+                    unscored = [i for i in ids if i not in scored]
+                    if unscored:
+                        await cur.execute(
+                            "DELETE FROM equipment_health_scores WHERE equipment_id = ANY(%s)",
+                            (unscored,),
+                        )
+            await conn.commit()
+        self.refreshed += len(ids)
+        return len(ids)
+
+    async def pending(self) -> int:
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT count(*) FROM equipment_health_dirty")
+                return (await cur.fetchone())[0]
+
+    async def run(self, stop_event: asyncio.Event, interval: float = 2.0):
+        while not stop_event.is_set():
+            try:
+                while await self.refresh() >= self.batch_size and not stop_event.is_set():
+                    pass
+            except Exception as e:
+                print(f"Health score refresh failed: {e}")
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+health_refresher = HealthScoreRefresher(batch_size=int(os.getenv("HEALTH_REFRESH_BATCH", "500")))
@@ -0,0 +1,161 @@
+"""In-process metrics rendered in the Prometheus text format.
+
+Request metrics are recorded by ``MetricsMiddleware`` (src/api/metrics.py)
+and labelled by route template, so /api/equipment/{equipment_id} is one
+series however many ids are polled. Query timings come from ``TimedCursor``,
+the cursor class of the API pool (unless METRICS_QUERY_TIMINGS=0, see db.py):
+every execute is timed and labelled with the qualified name of the function
+that ran it, e.g. ``EquipmentRepository.list_equipment``, so no call site
+names its queries.
+Each metric is a few dict updates on the event loop; the values are per
+process and reset on restart, which Prometheus rate() handles.
+"""
+
+import sys
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from psycopg import AsyncCursor
+
+# Seconds; the same spread as the Prometheus client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Iterable) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels) -> None:
+        self._values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total:g}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte",
+    ("method", "route", "status"),
+)
+http_response_size = Histogram(
+    "http_response_size_bytes", "Response body size", ("method", "route"), buckets=SIZE_BUCKETS,
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "Requests currently being served")
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "Time to execute a query and receive its results, by calling function",
+    ("query",),
+)
+db_query_errors = Counter("db_query_errors_total", "Queries that raised, by calling function", ("query",))
+
+REGISTRY = (http_request_duration, http_response_size, http_requests_in_flight, db_query_duration, db_query_errors)
+
+
+def render(extra: Iterable[str] = ()) -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    lines += extra
+    return "\n".join(lines) + "\n"
+
+
+def _caller() -> str:
+    """Qualified name of the first function outside psycopg on the stack.
+
+    Must run before the cursor's first await, while the awaiting coroutine
+    is still reachable through f_back.
+    """
+    frame = sys._getframe(2)
+    while frame and frame.f_globals.get("__name__", "").startswith("psycopg"):
+        frame = frame.f_back
+    return frame.f_code.co_qualname if frame else "unknown"
+
+
+class TimedCursor(AsyncCursor):
+    """AsyncCursor that records each execute in ``db_query_duration``."""
+
+    async def execute(self, query, params=None, **kwargs):
+        name = _caller()
+        started = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        except Exception:
+            db_query_errors.inc(name)
+            raise
+        finally:
+            db_query_duration.observe(time.perf_counter() - started, name)
+
+    async def executemany(self, query, params_seq, **kwargs):
+        name = _caller()
+        started = time.perf_counter()
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        except Exception:
+            db_query_errors.inc(name)
+            raise
+        finally:
+            db_query_duration.observe(time.perf_counter() - started, name)
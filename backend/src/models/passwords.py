@@ -0,0 +1,160 @@
+"""Salted scrypt password hashing on a bounded worker pool.
+
+Configuration via env vars:
+- PASSWORD_SCRYPT_N=16384, PASSWORD_SCRYPT_R=8, PASSWORD_SCRYPT_P=1 (cost of new hashes)
+- PASSWORD_HASH_WORKERS=<cpu count> (hashes computed at once)
+- PASSWORD_HASH_MAX_WAITING=256 (logins queued behind them before 503s)
+
+Hashes are stored as ``scrypt$n$r$p$salt$hash`` (base64). Rows still holding
+the old unsalted SHA-256 hex digest verify against it once and are flagged
+for rehashing, so users migrate on their next login. scrypt runs in
+OpenSSL without the GIL, so a small thread pool keeps every core busy while
+the event loop stays free; the semaphore caps both running and queued work
+so a login storm is shed instead of starving the rest of the API. Unknown
+accounts and legacy rows are checked at the same cost as current hashes, so
+response times do not reveal which emails are registered.
+
+Benchmark:
+    python -m src.models.passwords [seconds]
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", "16384"))
+SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + (1 << 20), dklen=KEY_BYTES
+    )
+
+
+def hash_password(password: str) -> str:
+    """Salted scrypt hash with the configured cost (blocking; see PasswordHasher)."""
+    salt = secrets.token_bytes(SALT_BYTES)
+    key = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    b64 = lambda b: base64.b64encode(b).decode()
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${b64(salt)}${b64(key)}"
+
+
+def verify_password(password: str, stored: str) -> Tuple[bool, bool]:
+    """Return (matches, needs_rehash) for ``password`` against a stored hash of either scheme."""
+    if stored.startswith("scrypt$"):
+        try:
+            _, n, r, p, salt, key = stored.split("$")
+            n, r, p = int(n), int(r), int(p)
+            expected = base64.b64decode(key)
+            actual = _scrypt(password, base64.b64decode(salt), n, r, p)
+        except (ValueError, TypeError):
+            return False, False
+        ok = hmac.compare_digest(actual, expected)
+        return ok, ok and (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    # Legacy unsalted SHA-256 hex digest. Spend a scrypt anyway so legacy
+    # rows take as long to reject as current ones.
+    _scrypt(password, bytes(SALT_BYTES), SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    ok = hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+    return ok, ok
+
+
+class HasherBusy(Exception):
+    """Raised when more hashes are queued than ``max_waiting`` allows."""
+
+
+class PasswordHasher:
+    """Runs hashing on a dedicated thread pool with bounded concurrency and queueing."""
+
+    def __init__(self, workers: Optional[int] = None, max_waiting: int = 256):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_waiting = max_waiting
+        self.hashed = 0
+        self.verified = 0
+        self.rejected = 0
+        self._waiting = 0
+        self._dummy_hash: Optional[str] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _run(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            self._semaphore = asyncio.Semaphore(self.workers)
+        if self._waiting >= self.workers + self.max_waiting:
+            self.rejected += 1
+            raise HasherBusy("Too many password checks in progress")
+        self._waiting += 1
+        try:
+            async with self._semaphore:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._waiting -= 1
+
+    async def hash(self, password: str) -> str:
+        result = await self._run(hash_password, password)
+        self.hashed += 1
+        return result
+
+    async def verify(self, password: str, stored: str) -> Tuple[bool, bool]:
+        result = await self._run(verify_password, password, stored)
+        self.verified += 1
+        return result
+
+    async def verify_dummy(self, password: str) -> None:
+        """Verify against a throwaway hash so an unknown account costs as much as a known one."""
+        if self._dummy_hash is None:
+            self._dummy_hash = await self._run(hash_password, secrets.token_urlsafe(16))
+        await self.verify(password, self._dummy_hash)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self._waiting,
+            "hashed": self.hashed,
+            "verified": self.verified,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or None,
+    max_waiting=int(os.getenv("PASSWORD_HASH_MAX_WAITING", "256")),
+)
+
+
+def _benchmark(seconds: float) -> None:
+    stored = hash_password("correct horse battery staple")
+    print(f"scrypt n={SCRYPT_N} r={SCRYPT_R} p={SCRYPT_P}")
+
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        verify_password("correct horse battery staple", stored)
+        count += 1
+    single = count / (time.perf_counter() - started)
+    print(f"  1 thread:  {single:,.1f} logins/s ({1000 / single:.1f} ms each)")
+
+    async def storm() -> Tuple[float, int]:
+        hasher = PasswordHasher()
+        total, began = 0, time.perf_counter()
+        while time.perf_counter() - began < seconds:
+            await asyncio.gather(*(hasher.verify("correct horse battery staple", stored) for _ in range(hasher.workers * 4)))
+            total += hasher.workers * 4
+        return total / (time.perf_counter() - began), hasher.workers
+
+    rate, workers = asyncio.run(storm())
+    print(f"  {workers} workers: {rate:,.1f} logins/s ({rate / workers:,.1f} per core)")
+
+
+if __name__ == "__main__":
+    _benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
@@ -1,93 +1,455 @@
-from datetime import datetime, timezone
-from typing import Dict, List
-from .db import pool
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from .cache import cache
+from .db import apool
+
+KANBAN_CACHE_KEY = "kanban_board"
+HEALTH_CACHE_KEY = "equipment_health"
+
+
+async def invalidate_maintenance_caches() -> None:
+    """Drop every cached read derived from maintenance_requests."""
+    await cache.invalidate(KANBAN_CACHE_KEY)
+
+
+async def invalidate_health_cache() -> None:
+    """Drop the cached health scores; run for each equipment_health_changes notice."""
+    await cache.invalidate(HEALTH_CACHE_KEY)
 
 
 class MaintenanceRepository:
     @staticmethod
-    def get_kanban_board() -> Dict[str, List[dict]]:
-        with pool.connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT id, subject, status, priority, equipment_id FROM maintenance_requests"
+    async def get_kanban_board() -> Dict[str, List[dict]]:
+        # Filed under the version the ETag is built from, so no worker serves
+        # a board older than the version it advertises
+        version, _ = await VersionRepository.get_version("maintenance_requests")
+        return await cache.get_or_load_versioned(KANBAN_CACHE_KEY, version, MaintenanceRepository._load_kanban_board)
+
+    @staticmethod
+    async def _load_kanban_board() -> Dict[str, List[dict]]:
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "SELECT id, subject, status, priority, equipment_id, request_type FROM maintenance_requests"
                 )
-                rows = cur.fetchall()
+                rows = await cur.fetchall()
                 board = {"New": [], "In Progress": [], "Repaired": [], "Scrap": []}
                 for r in rows:
-                    board[r[2]].append({"id": r[0], "subject": r[1], "priority": r[3]})
+                    # Same card fields as the change-feed deltas, so stream clients
+                    # can apply a snapshot without refetching the list
+                    board[r[2]].append({
+                        "id": r[0], "subject": r[1], "priority": r[3],
+                        "equipment_id": r[4], "request_type": r[5],
+                    })
                 return board
 
     @staticmethod
-    def update_status(request_id: int, new_status: str) -> None:
-        with pool.connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+    async def update_status(request_id: int, new_status: str) -> None:
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     "UPDATE maintenance_requests SET status = %s WHERE id = %s",
                     (new_status, request_id),
                 )
-                conn.commit()
+                await conn.commit()
+        await invalidate_maintenance_caches()
 
     @staticmethod
-    def insert_request(subject: str, status: str, priority: str | None, equipment_id: int | None, description: str | None) -> None:
+    async def insert_request(subject: str, status: str, priority: str | None, equipment_id: int | None, description: str | None) -> None:
         """Insert a simulated maintenance request row."""
-        with pool.connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     INSERT INTO maintenance_requests (subject, status, priority, equipment_id, description)
                     VALUES (%s, %s, %s, %s, %s)
                     """,
                     (subject, status, priority, equipment_id, description),
                 )
-                conn.commit()
+                await conn.commit()
+        await invalidate_maintenance_caches()
 
     @staticmethod
-    def live_snapshot() -> dict:
-        board = MaintenanceRepository.get_kanban_board()
-        return {"server_time": datetime.now(timezone.utc), "board": board}
+    async def upsert_alerts(alerts: List) -> None:
+        """Write coalesced alerts, folding each into its open request when one exists.
 
-    @staticmethod
-    def list_requests() -> List[dict]:
-        """Return maintenance requests with sensible defaults for frontend."""
-        with pool.connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    SELECT id, subject, status, priority, equipment_id, description
-                    FROM maintenance_requests
-                    ORDER BY id DESC
+        ``alerts`` carry equipment_id, alert_key, subject, status, priority,
+        description, count and last_seen (see services.alerts.PendingAlert).
+        """
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.executemany(
                     """
+                    INSERT INTO maintenance_requests
+                        (subject, request_type, status, priority, equipment_id, description, alert_key, alert_count, last_seen_at)
+                    VALUES (%s, 'Corrective', %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (COALESCE(equipment_id, 0), alert_key)
+                        WHERE alert_key IS NOT NULL AND status IN ('New', 'In Progress')
+                    DO UPDATE SET
+                        alert_count = maintenance_requests.alert_count + EXCLUDED.alert_count,
+                        last_seen_at = GREATEST(maintenance_requests.last_seen_at, EXCLUDED.last_seen_at),
+                        description = EXCLUDED.description
+                    """,
+                    [
+                        (a.subject, a.status, a.priority, a.equipment_id, a.description, a.alert_key, a.count, a.last_seen)
+                        for a in alerts
+                    ],
                 )
-                rows = cur.fetchall()
+                await conn.commit()
+        await invalidate_maintenance_caches()
+
+    @staticmethod
+    async def live_snapshot() -> dict:
+        board = await MaintenanceRepository.get_kanban_board()
+        return {"server_time": datetime.now(timezone.utc), "board": board}
+
+    @staticmethod
+    async def list_requests(
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        status: Optional[List[str]] = None,
+        priority: Optional[List[str]] = None,
+        equipment_id: Optional[int] = None,
+        team_id: Optional[int] = None,
+        scheduled_from: Optional[datetime] = None,
+        scheduled_to: Optional[datetime] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """Return one page of maintenance requests, newest first, plus the cursor for the next page.
+
+        Pages are keyset-based on ``id`` so every page costs the same regardless of
+        table size. ``fields`` restricts the columns selected and returned; ``id``
+        is always included because it is the cursor.
+        """
+        fields = fields or list(REQUEST_FIELDS)
+        unknown = [f for f in fields if f not in REQUEST_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        if "id" not in fields:
+            fields = ["id"] + fields
+        columns = [f for f in fields if REQUEST_FIELDS[f]]
+
+        where = []
+        params: list = []
+        if cursor is not None:
+            where.append("id < %s")
+            params.append(cursor)
+        if status:
+            where.append("status = ANY(%s)")
+            params.append(status)
+        if priority:
+            where.append("priority::text = ANY(%s)")
+            params.append(priority)
+        if equipment_id is not None:
+            where.append("equipment_id = %s")
+            params.append(equipment_id)
+        if team_id is not None:
+            where.append("team_id = %s")
+            params.append(team_id)
+        if scheduled_from is not None:
+            where.append("scheduled_date >= %s")
+            params.append(scheduled_from)
+        if scheduled_to is not None:
+            where.append("scheduled_date <= %s")
+            params.append(scheduled_to)
+
+        query = f"SELECT {', '.join(REQUEST_FIELDS[c] for c in columns)} FROM maintenance_requests"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        # Fetch one extra row to learn whether another page exists
+        query += " ORDER BY id DESC LIMIT %s"
+        params.append(limit + 1)
+
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(query, params)
+                rows = await cur.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1][0]
 
         results: List[dict] = []
         for r in rows:
-            results.append(
-                {
-                    "id": r[0],
-                    "subject": r[1],
-                    "status": r[2],
-                    "priority": int(r[3]) if r[3] is not None else 1,
-                    "equipment_id": r[4] if r[4] is not None else 0,
-                    "description": r[5],
-                    "request_type": "Corrective",
-                    "created_at": datetime.now(timezone.utc).isoformat(),
-                    "scheduled_date": None,
-                }
-            )
-        return results
+            values = dict(zip(columns, r))
+            results.append({f: _format_request_field(f, values.get(f)) for f in fields})
+        return results, next_cursor
+
+
+# Projectable fields of /api/maintenance-requests mapped to their column.
+# Fields mapped to None are synthesized for the frontend rather than selected.
+REQUEST_FIELDS: Dict[str, Optional[str]] = {
+    "id": "id",
+    "subject": "subject",
+    "status": "status",
+    "priority": "priority",
+    "equipment_id": "equipment_id",
+    "description": "description",
+    "request_type": "request_type",
+    "team_id": "team_id",
+    "scheduled_date": "scheduled_date",
+    "duration_hours": "duration_hours",
+    "alert_count": "alert_count",
+    "last_seen_at": "last_seen_at",
+    "created_at": None,
+}
+
+
+def _format_request_field(field: str, value):
+    """Apply the frontend defaults for a single request field."""
+    if field == "priority":
+        return int(value) if value is not None else 1
+    if field == "equipment_id":
+        return value if value is not None else 0
+    if field == "request_type":
+        return value or "Corrective"
+    if field in ("scheduled_date", "last_seen_at"):
+        return value.isoformat() if value is not None else None
+    if field == "duration_hours":
+        return float(value) if value is not None else None
+    if field == "created_at":
+        return datetime.now(timezone.utc).isoformat()
+    return value
+
+
+# Trigram-indexed (migration 0003) text that /api/equipment/search matches against
+EQUIPMENT_SEARCH_EXPR = "lower(e.name || ' ' || coalesce(e.serial_number, '') || ' ' || coalesce(e.category, ''))"
+
+EQUIPMENT_SELECT = """
+    SELECT
+        e.id, e.name, e.serial_number, e.category, e.department, e.location, e.is_functional, e.team_id,
+        h.health_score, f.mttr, r.open_requests, r.scrapped, r.last_maintenance, r.next_maintenance
+    FROM equipment e
+    LEFT JOIN equipment_health_scores h ON h.equipment_id = e.id
+    LEFT JOIN LATERAL (
+        SELECT
+            count(*) FILTER (WHERE mr.status IN ('New', 'In Progress')) AS open_requests,
+            COALESCE(bool_or(mr.status = 'Scrap'), false) AS scrapped,
+            max(mr.scheduled_date) FILTER (WHERE mr.status = 'Repaired') AS last_maintenance,
+            min(mr.scheduled_date) FILTER (WHERE mr.status IN ('New', 'In Progress')) AS next_maintenance
+        FROM maintenance_requests mr
+        WHERE mr.equipment_id = e.id
+    ) r ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT sum(b.downtime_hours) / NULLIF(sum(b.failure_count), 0) AS mttr
+        FROM equipment_failure_daily b
+        WHERE b.equipment_id = e.id
+    ) f ON TRUE
+"""
+
+
+def _format_equipment(r) -> dict:
+    scrapped = r[11]
+    return {
+        "id": r[0],
+        "name": r[1],
+        "serial_number": r[2],
+        "category": r[3],
+        "department": r[4],
+        "location": r[5],
+        "is_functional": r[6],
+        "team_id": r[7],
+        "status": "SCRAP" if scrapped else ("ACTIVE" if r[6] else "DOWN"),
+        "health_score": float(r[8]) if r[8] is not None else None,
+        "mttr": round(float(r[9]), 2) if r[9] is not None else 0.0,
+        "open_requests_count": r[10],
+        "last_maintenance": r[12].date().isoformat() if r[12] else None,
+        "next_maintenance": r[13].date().isoformat() if r[13] else None,
+    }
 
 
 class EquipmentRepository:
     @staticmethod
-    def get_health_scores() -> List[dict]:
-        with pool.connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT name, health_score, is_functional FROM equipment_health_report"
+    async def list_equipment(
+        cursor: Optional[int] = None,
+        limit: int = 200,
+        include_scrapped: bool = False,
+        search: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """One page of equipment by id with health and request stats, plus the next cursor.
+
+        ``search`` is a case-insensitive substring of name, serial number or
+        category. Scrapped equipment (any request moved to Scrap) is left out
+        unless ``include_scrapped``.
+        """
+        where = []
+        params: list = []
+        if cursor is not None:
+            where.append("e.id > %s")
+            params.append(cursor)
+        if search:
+            escaped = search.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where.append(f"{EQUIPMENT_SEARCH_EXPR} LIKE %s")
+            params.append(f"%{escaped}%")
+        if not include_scrapped:
+            where.append("NOT r.scrapped")
+        query = EQUIPMENT_SELECT
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY e.id LIMIT %s"
+        params.append(limit + 1)
+
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(query, params)
+                rows = await cur.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1][0]
+        return [_format_equipment(r) for r in rows], next_cursor
+
+    @staticmethod
+    async def get_equipment(equipment_id: int) -> Optional[dict]:
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(EQUIPMENT_SELECT + " WHERE e.id = %s", (equipment_id,))
+                row = await cur.fetchone()
+        return _format_equipment(row) if row else None
+
+    @staticmethod
+    async def get_health_scores() -> List[dict]:
+        version, _ = await VersionRepository.get_version("equipment_health")
+        return await cache.get_or_load_versioned(HEALTH_CACHE_KEY, version, EquipmentRepository._load_health_scores)
+
+    @staticmethod
+    async def _load_health_scores() -> List[dict]:
+        """Read the materialized scores kept current by HealthScoreRefresher."""
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    SELECT name, health_score, is_functional, computed_at
+                    FROM equipment_health_scores
+                    ORDER BY equipment_id
+                    """
                 )
-                rows = cur.fetchall()
+                rows = await cur.fetchall()
                 return [
-                    {"name": r[0], "score": float(r[1]), "status": r[2]}
+                    {
+                        "name": r[0],
+                        "score": float(r[1]),
+                        "status": r[2],
+                        "computed_at": r[3].isoformat(),
+                    }
                     for r in rows
                 ]
+
+
+    @staticmethod
+    async def get_prediction_features(window_end: datetime) -> List[tuple]:
+        """Rows of (id, name, category, age_years, temperature, humidity) for every equipment.
+
+        Sensor values are averages over the 7 days before ``window_end`` from
+        the hourly telemetry rollups; None when the equipment has no telemetry.
+        """
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    SELECT
+                        e.id,
+                        e.name,
+                        e.category,
+                        (%(end)s::date - e.purchase_date) / 365.25 AS age_years,
+                        t.temperature,
+                        t.humidity
+                    FROM equipment e
+                    LEFT JOIN LATERAL (
+                        SELECT
+                            sum(r.temperature_avg * r.samples) / NULLIF(sum(r.samples) FILTER (WHERE r.temperature_avg IS NOT NULL), 0) AS temperature,
+                            sum(r.humidity_avg * r.samples) / NULLIF(sum(r.samples) FILTER (WHERE r.humidity_avg IS NOT NULL), 0) AS humidity
+                        FROM telemetry_rollup_1h r
+                        WHERE r.equipment_id = e.id
+                            AND r.bucket >= %(end)s::timestamptz - INTERVAL '7 days'
+                            AND r.bucket < %(end)s::timestamptz
+                    ) t ON TRUE
+                    ORDER BY e.id
+                    """,
+                    {"end": window_end},
+                )
+                return await cur.fetchall()
+
+
+class SchedulingRepository:
+    @staticmethod
+    async def load_preventive_jobs(request_id: Optional[int] = None) -> List[tuple]:
+        """Open preventive requests as (id, duration_hours, priority, team_id, scheduled_date, health_score)."""
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    SELECT m.id, m.duration_hours, m.priority, m.team_id, m.scheduled_date, h.health_score
+                    FROM maintenance_requests m
+                    LEFT JOIN equipment_health_scores h ON h.equipment_id = m.equipment_id
+                    WHERE m.request_type = 'Preventive'
+                        AND m.status IN ('New', 'In Progress')
+                        AND (%(id)s::int IS NULL OR m.id = %(id)s::int)
+                    """,
+                    {"id": request_id},
+                )
+                return await cur.fetchall()
+
+    @staticmethod
+    async def load_team_capacities() -> Dict[int, float]:
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT id, daily_capacity_hours FROM maintenance_teams")
+                return {r[0]: float(r[1]) for r in await cur.fetchall()}
+
+    @staticmethod
+    async def apply_plan(request_ids: List[int], team_ids: List[int], dates: List[date]) -> int:
+        """Write planned team/date back in one statement without re-triggering the scheduler."""
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SET LOCAL gearguard.scheduler_apply = 'on'")
+                await cur.execute(
+                    """
+                    UPDATE maintenance_requests m
+                    SET team_id = p.team_id, scheduled_date = p.day
+                    FROM unnest(%s::int[], %s::int[], %s::date[]) AS p(id, team_id, day)
+                    WHERE m.id = p.id
+                        AND (m.team_id, m.scheduled_date::date) IS DISTINCT FROM (p.team_id, p.day)
+                    """,
+                    (request_ids, team_ids, dates),
+                )
+                updated = cur.rowcount
+            await conn.commit()
+        await invalidate_maintenance_caches()
+        return updated
+
+
+class VersionRepository:
+    @staticmethod
+    async def get_versions(resources: List[str]) -> List[Tuple[int, datetime]]:
+        """Change counter and last-change time for each of ``resources``, in one query."""
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    SELECT r.version, r.updated_at
+                    FROM unnest(%s::text[]) WITH ORDINALITY AS n(name, ord)
+                    LEFT JOIN resource_versions r ON r.name = n.name
+                    ORDER BY n.ord
+                    """,
+                    (resources,),
+                )
+                rows = await cur.fetchall()
+        epoch = datetime.fromtimestamp(0, timezone.utc)
+        return [(v or 0, u.astimezone(timezone.utc) if u else epoch) for v, u in rows]
+
+    @staticmethod
+    async def get_version(resource: str) -> Tuple[int, datetime]:
+        """Return the change counter and last-change time kept by the resource_versions triggers."""
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "SELECT version, updated_at FROM resource_versions WHERE name = %s",
+                    (resource,),
+                )
+                row = await cur.fetchone()
+        if not row:
+            return 0, datetime.fromtimestamp(0, timezone.utc)
+        return row[0], row[1].astimezone(timezone.utc)
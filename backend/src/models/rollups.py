@@ -0,0 +1,273 @@
+"""Downsampled telemetry history: 1-minute/1-hour/1-day rollups and their refresh job.
+
+Configuration via env vars:
+- TELEMETRY_ROLLUP_SECONDS=5 (how often the rollup job runs)
+- TELEMETRY_ROLLUP_BATCH=5000 (dirty minutes folded per pass)
+
+The COPY writer records every (equipment, minute) it touches in
+``telemetry_rollup_dirty``. Each pass claims a batch of those minutes and, in
+one transaction, recomputes exactly the affected minute buckets from raw
+readings, then the enclosing hour buckets from minutes and day buckets from
+hours. min/max/avg are exact at every level; hourly and daily p95 is the p95
+of the finer buckets' p95, which is close for evenly sampled sensors.
+
+Backfill rollups for readings that bypassed the API (e.g. a bulk import):
+    python -m src.models.rollups --backfill
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from .db import apool
+
+METRICS = ("temperature", "pressure", "vibration", "humidity")
+STATS = ("min", "max", "avg", "p95")
+ROLLUP_COLUMNS = ("samples",) + tuple(f"{m}_{s}" for m in METRICS for s in STATS)
+
+# Resolution -> (table, bucket width in seconds, date_trunc unit)
+RESOLUTIONS = {
+    "1m": ("telemetry_rollup_1m", 60, "minute"),
+    "1h": ("telemetry_rollup_1h", 3600, "hour"),
+    "1d": ("telemetry_rollup_1d", 86400, "day"),
+}
+# Spans at most this long may be served from raw readings
+RAW_MAX_SECONDS = 900
+RAW_MAX_POINTS = 10000
+
+_ROLLUP_LOCK = "telemetry_rollups"
+
+
+def _from_readings() -> str:
+    parts = ["count(*)"]
+    for m in METRICS:
+        parts += [f"min(r.{m})", f"max(r.{m})", f"avg(r.{m})", f"percentile_cont(0.95) WITHIN GROUP (ORDER BY r.{m})"]
+    return ", ".join(parts)
+
+
+def _from_rollup() -> str:
+    parts = ["sum(r.samples)"]
+    for m in METRICS:
+        parts += [
+            f"min(r.{m}_min)",
+            f"max(r.{m}_max)",
+            f"sum(r.{m}_avg * r.samples) / NULLIF(sum(r.samples) FILTER (WHERE r.{m}_avg IS NOT NULL), 0)",
+            f"percentile_cont(0.95) WITHIN GROUP (ORDER BY r.{m}_p95)",
+        ]
+    return ", ".join(parts)
+
+
+_UPSERT = (
+    "ON CONFLICT (equipment_id, bucket) DO UPDATE SET "
+    + ", ".join(f"{c} = EXCLUDED.{c}" for c in ROLLUP_COLUMNS)
+)
+
+_CLAIM_SQL = """
+    DELETE FROM telemetry_rollup_dirty d
+    USING (SELECT equipment_id, bucket FROM telemetry_rollup_dirty ORDER BY bucket LIMIT %s) c
+    WHERE d.equipment_id = c.equipment_id AND d.bucket = c.bucket
+    RETURNING d.equipment_id, d.bucket
+"""
+
+_MINUTE_SQL = f"""
+    INSERT INTO telemetry_rollup_1m (equipment_id, bucket, {', '.join(ROLLUP_COLUMNS)})
+    SELECT d.equipment_id, d.bucket, {_from_readings()}
+    FROM unnest(%s::int[], %s::timestamptz[]) AS d(equipment_id, bucket)
+    JOIN telemetry_readings r
+        ON r.equipment_id = d.equipment_id
+        AND r.recorded_at >= d.bucket AND r.recorded_at < d.bucket + INTERVAL '1 minute'
+    GROUP BY d.equipment_id, d.bucket
+    {_UPSERT}
+"""
+
+
+def _coarser_sql(target: str, source: str, unit: str, width: str) -> str:
+    return f"""
+    INSERT INTO {target} (equipment_id, bucket, {', '.join(ROLLUP_COLUMNS)})
+    SELECT d.equipment_id, d.bucket, {_from_rollup()}
+    FROM (
+        SELECT DISTINCT equipment_id, date_trunc('{unit}', bucket, 'UTC') AS bucket
+        FROM unnest(%s::int[], %s::timestamptz[]) AS t(equipment_id, bucket)
+    ) d
+    JOIN {source} r
+        ON r.equipment_id = d.equipment_id
+        AND r.bucket >= d.bucket AND r.bucket < d.bucket + INTERVAL '{width}'
+    GROUP BY d.equipment_id, d.bucket
+    {_UPSERT}
+"""
+
+
+_HOUR_SQL = _coarser_sql("telemetry_rollup_1h", "telemetry_rollup_1m", "hour", "1 hour")
+_DAY_SQL = _coarser_sql("telemetry_rollup_1d", "telemetry_rollup_1h", "day", "1 day")
+
+
+def choose_resolution(start: datetime, end: datetime, max_points: int) -> str:
+    """Coarsest-needed resolution: the finest one whose bucket count fits ``max_points``."""
+    span = (end - start).total_seconds()
+    if span <= RAW_MAX_SECONDS:
+        return "raw"
+    for name, (_, width, _) in RESOLUTIONS.items():
+        if span / width <= max_points:
+            return name
+    return "1d"
+
+
+class TelemetryRollups:
+    def __init__(self, batch_size: int = 5000, partition_check_seconds: float = 12 * 3600):
+        self.batch_size = batch_size
+        self.partition_check_seconds = partition_check_seconds
+        self.passes = 0
+        self.minutes_rolled = 0
+        self._partitions_checked_at = float("-inf")
+
+    async def ensure_partitions(self) -> None:
+        async with apool.connection() as conn:
+            await conn.execute("SELECT ensure_telemetry_partitions()")
+            await conn.commit()
+        self._partitions_checked_at = time.monotonic()
+
+    async def refresh(self) -> int:
+        """Fold one batch of dirty minutes into all three rollups; returns minutes claimed."""
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                # One refresher at a time across workers, so hour/day buckets
+                # always see every committed minute below them.
+                await cur.execute("SELECT pg_try_advisory_xact_lock(hashtext(%s))", (_ROLLUP_LOCK,))
+                if not (await cur.fetchone())[0]:
+                    await conn.rollback()
+                    return 0
+                await cur.execute(_CLAIM_SQL, (self.batch_size,))
+                claimed = await cur.fetchall()
+                if claimed:
+                    params = ([c[0] for c in claimed], [c[1] for c in claimed])
+                    for sql in (_MINUTE_SQL, _HOUR_SQL, _DAY_SQL):
+                        await cur.execute(sql, params)
+            await conn.commit()
+        self.passes += 1
+        self.minutes_rolled += len(claimed)
+        return len(claimed)
+
+    async def mark_all_dirty(self) -> int:
+        """Queue every minute that has raw readings, for a full rebuild."""
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    INSERT INTO telemetry_rollup_dirty (equipment_id, bucket)
+                    SELECT DISTINCT equipment_id, date_trunc('minute', recorded_at, 'UTC')
+                    FROM telemetry_readings
+                    ON CONFLICT DO NOTHING
+                    """
+                )
+                marked = cur.rowcount
+            await conn.commit()
+        return marked
+
+    async def run(self, stop_event: asyncio.Event, interval: float = 5.0):
+        while not stop_event.is_set():
+            try:
+                if time.monotonic() - self._partitions_checked_at >= self.partition_check_seconds:
+                    await self.ensure_partitions()
+                # Drain a backlog in consecutive passes rather than one per interval
+                while await self.refresh() >= self.batch_size and not stop_event.is_set():
+                    pass
+            except Exception as e:
+                print(f"Telemetry rollup failed: {e}")
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        return {"passes": self.passes, "minutes_rolled": self.minutes_rolled}
+
+
+class TelemetryHistoryRepository:
+    @staticmethod
+    async def history(
+        equipment_id: int,
+        start: datetime,
+        end: datetime,
+        metrics: Sequence[str] = METRICS,
+        max_points: int = 500,
+        resolution: Optional[str] = None,
+    ) -> dict:
+        """Column-oriented series for charting, read from the coarsest table that fits."""
+        unknown = set(metrics) - set(METRICS)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+        resolution = resolution or choose_resolution(start, end, max_points)
+        if resolution != "raw" and resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution {resolution!r}")
+
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                if resolution == "raw":
+                    await cur.execute(
+                        f"""
+                        SELECT recorded_at, {', '.join(metrics)}
+                        FROM telemetry_readings
+                        WHERE equipment_id = %s AND recorded_at >= %s AND recorded_at < %s
+                        ORDER BY recorded_at
+                        LIMIT %s
+                        """,
+                        (equipment_id, start, end, RAW_MAX_POINTS),
+                    )
+                else:
+                    table, _, unit = RESOLUTIONS[resolution]
+                    columns = [f"{m}_{s}" for m in metrics for s in STATS]
+                    # Include the bucket that contains ``start``
+                    await cur.execute(
+                        f"""
+                        SELECT bucket, samples, {', '.join(columns)}
+                        FROM {table}
+                        WHERE equipment_id = %s
+                            AND bucket >= date_trunc('{unit}', %s::timestamptz, 'UTC')
+                            AND bucket < %s
+                        ORDER BY bucket
+                        """,
+                        (equipment_id, start, end),
+                    )
+                rows = await cur.fetchall()
+
+        result: Dict[str, object] = {
+            "equipment_id": equipment_id,
+            "resolution": resolution,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "buckets": [r[0].isoformat() for r in rows],
+        }
+        if resolution == "raw":
+            result["samples"] = [1] * len(rows)
+            result["series"] = {m: {"value": [r[1 + i] for r in rows]} for i, m in enumerate(metrics)}
+        else:
+            result["samples"] = [r[1] for r in rows]
+            series: Dict[str, Dict[str, List]] = {}
+            for i, m in enumerate(metrics):
+                series[m] = {s: [r[2 + i * len(STATS) + j] for r in rows] for j, s in enumerate(STATS)}
+            result["series"] = series
+        return result
+
+
+telemetry_rollups = TelemetryRollups(batch_size=int(os.getenv("TELEMETRY_ROLLUP_BATCH", "5000")))
+
+
+async def _backfill() -> None:
+    await apool.open()
+    try:
+        await telemetry_rollups.ensure_partitions()
+        print(f"Queued {await telemetry_rollups.mark_all_dirty()} minute bucket(s)")
+        while await telemetry_rollups.refresh():
+            print(f"Rolled up {telemetry_rollups.minutes_rolled} minute bucket(s)")
+    finally:
+        await apool.close()
+
+
+if __name__ == "__main__":
+    if "--backfill" not in sys.argv[1:]:
+        print("usage: python -m src.models.rollups --backfill")
+        sys.exit(2)
+    asyncio.run(_backfill())
@@ -11,6 +11,8 @@ class MaintenanceCard(BaseModel):
     id: int
     subject: str
     priority: Optional[str] = None
+    equipment_id: Optional[int] = None
+    request_type: Optional[str] = None
 
 
 class MaintenanceBoard(BaseModel):
@@ -26,3 +28,4 @@ class EquipmentHealth(BaseModel):
     name: str
     score: float
     status: str
+    computed_at: Optional[datetime] = None  # when the materialized score was last refreshed
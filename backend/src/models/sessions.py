@@ -0,0 +1,93 @@
+"""Housekeeping for user_sessions.
+
+Configuration via env vars:
+- SESSION_SWEEP_SECONDS=300 (how often expired sessions are deleted)
+- SESSION_SWEEP_BATCH=1000 (rows deleted per statement)
+
+Expired rows are deleted oldest first in bounded batches, each in its own
+short transaction, so the sweep never holds locks on a large part of the
+table and the token index only covers sessions that can still be used.
+Cached tokens need no revocation: the session cache never trusts an entry
+past its expires_at. The per-user session cap is enforced at login (see
+``UserRepository.create_session``).
+"""
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Optional
+
+from .db import apool
+
+
+class SessionSweeper:
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self.swept = 0
+        self.last_sweep_at: Optional[datetime] = None
+
+    async def sweep_batch(self) -> int:
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    DELETE FROM user_sessions s
+                    USING (
+                        SELECT id FROM user_sessions
+                        WHERE expires_at <= %s
+                        ORDER BY expires_at
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    ) e
+                    WHERE s.id = e.id
+                    """,
+                    (datetime.now(timezone.utc), self.batch_size),
+                )
+                deleted = cur.rowcount
+            await conn.commit()
+        self.swept += deleted
+        return deleted
+
+    async def sweep(self, stop_event: Optional[asyncio.Event] = None) -> int:
+        """Delete every expired session, one batch at a time; returns how many were deleted."""
+        total = 0
+        while True:
+            deleted = await self.sweep_batch()
+            total += deleted
+            if deleted < self.batch_size or (stop_event and stop_event.is_set()):
+                break
+        self.last_sweep_at = datetime.now(timezone.utc)
+        return total
+
+    async def stats(self) -> dict:
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    SELECT count(*), count(DISTINCT user_id)
+                    FROM user_sessions
+                    WHERE expires_at > %s
+                    """,
+                    (datetime.now(timezone.utc),),
+                )
+                live, users = await cur.fetchone()
+        return {
+            "live_sessions": live,
+            "users_with_sessions": users,
+            "swept": self.swept,
+            "last_sweep_at": self.last_sweep_at.isoformat() if self.last_sweep_at else None,
+        }
+
+    async def run(self, stop_event: asyncio.Event, interval: float = 300.0):
+        while not stop_event.is_set():
+            try:
+                await self.sweep(stop_event)
+            except Exception as e:
+                print(f"Session sweep failed: {e}")
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+session_sweeper = SessionSweeper(batch_size=int(os.getenv("SESSION_SWEEP_BATCH", "1000")))
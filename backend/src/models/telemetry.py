@@ -0,0 +1,239 @@
+"""Sensor telemetry ingestion: equipment lookup, in-memory buffering and COPY flushes.
+
+Configuration via env vars:
+- TELEMETRY_BATCH_SIZE=5000 (flush as soon as this many readings are pending)
+- TELEMETRY_FLUSH_MS=250 (flush at least this often)
+- TELEMETRY_MAX_PENDING=200000 (reject ingestion beyond this backlog)
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import psycopg
+
+from .db import apool
+
+TELEMETRY_COLUMNS = ("equipment_id", "recorded_at", "temperature", "pressure", "vibration", "humidity")
+
+
+class EquipmentDirectory:
+    """Cached equipment name -> (id, category) map and set of equipment ids, reloaded in one query.
+
+    Unknown names or ids trigger a reload at most every ``miss_reload_seconds``
+    so a sensor reporting a bogus one cannot turn every reading into a query.
+    Names resolve to functional equipment only; any existing id is known.
+    """
+
+    def __init__(self, ttl: float = 60.0, miss_reload_seconds: float = 5.0):
+        self.ttl = ttl
+        self.miss_reload_seconds = miss_reload_seconds
+        self._by_name: Dict[str, Tuple[int, Optional[str]]] = {}
+        self._by_id: Dict[int, Tuple[str, Optional[str]]] = {}
+        self._ids: Set[int] = set()
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def resolve(self, names: Sequence[str]) -> Dict[str, int]:
+        """Map each distinct name to its equipment id, omitting unknown names."""
+        age = time.monotonic() - self._loaded_at
+        missing = any(name not in self._by_name for name in names)
+        if age > self.ttl or (missing and age > self.miss_reload_seconds):
+            await self.reload()
+        return {name: self._by_name[name][0] for name in names if name in self._by_name}
+
+    async def known(self, ids: Iterable[int]) -> Set[int]:
+        """The subset of ``ids`` that exist in the equipment table."""
+        ids = set(ids)
+        age = time.monotonic() - self._loaded_at
+        if age > self.ttl or (not ids <= self._ids and age > self.miss_reload_seconds):
+            await self.reload()
+        return ids & self._ids
+
+    async def describe(self) -> Dict[int, Tuple[str, Optional[str]]]:
+        """Map of equipment id -> (name, category)."""
+        if time.monotonic() - self._loaded_at > self.ttl:
+            await self.reload()
+        return self._by_id
+
+    async def reload(self) -> None:
+        async with self._lock:
+            async with apool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute("SELECT id, name, category, is_functional FROM equipment")
+                    rows = await cur.fetchall()
+            functional = [r for r in rows if r[3]]
+            self._by_name = {r[1]: (r[0], r[2]) for r in functional}
+            self._by_id = {r[0]: (r[1], r[2]) for r in functional}
+            self._ids = {r[0] for r in rows}
+            self._loaded_at = time.monotonic()
+
+
+class TelemetryRepository:
+    @staticmethod
+    async def copy_readings(rows: List[tuple]) -> int:
+        """Bulk-insert readings with COPY FROM STDIN and mark their minutes for the rollup job."""
+        touched = {(row[0], row[1].replace(second=0, microsecond=0)) for row in rows}
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                async with cur.copy(
+                    f"COPY telemetry_readings ({', '.join(TELEMETRY_COLUMNS)}) FROM STDIN"
+                ) as copy:
+                    for row in rows:
+                        await copy.write_row(row)
+                await cur.execute(
+                    """
+                    INSERT INTO telemetry_rollup_dirty (equipment_id, bucket)
+                    SELECT * FROM unnest(%s::int[], %s::timestamptz[])
+                    ON CONFLICT DO NOTHING
+                    """,
+                    ([t[0] for t in touched], [t[1] for t in touched]),
+                )
+            await conn.commit()
+        return len(rows)
+
+    @staticmethod
+    async def dead_letter(rows: List[tuple], error: str) -> None:
+        """Keep readings the database refused, with the reason, for inspection or replay."""
+        async with apool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.executemany(
+                    f"""
+                    INSERT INTO telemetry_dead_letter ({', '.join(TELEMETRY_COLUMNS)}, error)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """,
+                    [(*row, error) for row in rows],
+                )
+            await conn.commit()
+
+
+class BufferFull(Exception):
+    """Raised when the pending backlog would exceed ``max_pending``."""
+
+
+class TelemetryBuffer:
+    """Accumulates readings in memory and writes them in micro-batches.
+
+    Request handlers only append to a list; a single background task owns
+    the database side, so ingestion cost per reading is a tuple append.
+    Accepted readings are not discarded when a write fails: while the database
+    is unreachable the batch goes back to the front of the backlog, and a
+    batch the database rejects is split until the offending readings are
+    isolated in ``telemetry_dead_letter``; the rest are written.
+    """
+
+    def __init__(self, batch_size: int = 5000, flush_interval: float = 0.25, max_pending: int = 200000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.accepted = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+        self.flushes = 0
+        self._pending: List[tuple] = []
+        self._wakeup = asyncio.Event()
+        self._listeners: List[Callable[[List[tuple]], Awaitable[None]]] = []
+
+    def add_listener(self, listener: Callable[[List[tuple]], Awaitable[None]]) -> None:
+        """Run ``listener`` on every batch once it is safely written, e.g. to evaluate alert rules."""
+        self._listeners.append(listener)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add(self, rows: List[tuple]) -> None:
+        if len(self._pending) + len(rows) > self.max_pending:
+            raise BufferFull(f"{len(self._pending)} readings already pending")
+        self._pending.extend(rows)
+        self.accepted += len(rows)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        while self._pending:
+            batch = self._pending[: self.batch_size]
+            del self._pending[: self.batch_size]
+            written, retry = await self._write(batch)
+            if written:
+                self.flushes += 1
+                for listener in self._listeners:
+                    try:
+                        await listener(written)
+                    except Exception as e:
+                        print(f"Telemetry listener failed: {e}")
+            # On retry, let the backlog (and back-pressure) build until the next interval
+            if retry or len(self._pending) < self.batch_size:
+                break
+
+    async def _write(self, batch: List[tuple]) -> Tuple[List[tuple], bool]:
+        """COPY ``batch``, bisecting around readings the database rejects.
+
+        Returns the readings written and whether the database was unreachable,
+        in which case everything not yet written is back in the backlog.
+        """
+        written: List[tuple] = []
+        parts = [batch]
+        while parts:
+            part = parts.pop()
+            try:
+                self.flushed += await TelemetryRepository.copy_readings(part)
+                written += part
+            except psycopg.OperationalError as e:
+                left = part + [row for p in parts for row in p]
+                self._pending[:0] = left
+                print(f"Telemetry flush failed, {len(left)} readings kept for retry: {e}")
+                return written, True
+            except Exception as e:
+                if len(part) > 1:
+                    mid = len(part) // 2
+                    parts += [part[mid:], part[:mid]]
+                else:
+                    await self._dead_letter(part, e)
+        return written, False
+
+    async def _dead_letter(self, rows: List[tuple], error: Exception) -> None:
+        try:
+            await TelemetryRepository.dead_letter(rows, str(error))
+            self.dead_lettered += len(rows)
+            print(f"Telemetry reading rejected, moved to telemetry_dead_letter: {error}")
+        except Exception as e:
+            self.dropped += len(rows)
+            print(f"Telemetry dead-letter write failed, dropped {len(rows)} readings: {e}")
+
+    async def run(self, stop_event: asyncio.Event):
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+        # Drain whatever arrived before shutdown, unless the database is down
+        while self._pending:
+            before = self.pending
+            await self.flush()
+            if self.pending >= before:
+                self.dropped += self.pending
+                print(f"Telemetry shutdown with {self.pending} readings unwritten")
+                break
+
+    def stats(self) -> dict:
+        return {
+            "accepted": self.accepted,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "dead_lettered": self.dead_lettered,
+            "pending": self.pending,
+            "flushes": self.flushes,
+        }
+
+
+equipment_directory = EquipmentDirectory()
+telemetry_buffer = TelemetryBuffer(
+    batch_size=int(os.getenv("TELEMETRY_BATCH_SIZE", "5000")),
+    flush_interval=int(os.getenv("TELEMETRY_FLUSH_MS", "250")) / 1000,
+    max_pending=int(os.getenv("TELEMETRY_MAX_PENDING", "200000")),
+)
@@ -0,0 +1,166 @@
+"""Turns alerts into maintenance requests without flooding the board.
+
+Configuration via env vars:
+- ALERT_SUPPRESSION_SECONDS=300 (write each (equipment, alert) at most this often)
+
+Alerts are coalesced twice: in memory, repeats of one (equipment, alert type)
+within the suppression window are folded into a single pending write; in the
+database, that write lands on the existing open request for the same key
+(bumping alert_count/last_seen_at) instead of inserting a new row.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from src.models.repository import MaintenanceRepository
+from src.models.telemetry import equipment_directory
+from src.services.rules import ReadingBatch, RuleEngine, load_rules
+
+
+@dataclass
+class PendingAlert:
+    equipment_id: Optional[int]
+    alert_key: str
+    subject: str
+    priority: Optional[int]
+    description: str
+    count: int
+    last_seen: datetime
+    status: str = "New"
+    # Failed writes so far; the alert is dropped after MAX_WRITE_ATTEMPTS
+    attempts: int = 0
+
+
+MAX_WRITE_ATTEMPTS = 3
+
+
+class AlertCoalescer:
+    def __init__(self, window: float = 300.0):
+        self.window = window
+        self.offered = 0
+        self.written = 0
+        self.failed = 0
+        self._pending: Dict[Tuple[Optional[int], str], PendingAlert] = {}
+        self._last_written: Dict[Tuple[Optional[int], str], float] = {}
+        self._wakeup = asyncio.Event()
+
+    def offer(
+        self,
+        equipment_id: Optional[int],
+        alert_key: str,
+        subject: str,
+        priority: Optional[int],
+        description: str,
+        count: int = 1,
+        seen_at: Optional[datetime] = None,
+        status: str = "New",
+    ) -> None:
+        """Record ``count`` occurrences of an alert; never touches the database."""
+        key = (equipment_id, alert_key)
+        seen_at = seen_at or datetime.now(timezone.utc)
+        self.offered += count
+        pending = self._pending.get(key)
+        if pending:
+            pending.count += count
+            pending.last_seen = max(pending.last_seen, seen_at)
+            pending.description = description
+        else:
+            self._pending[key] = PendingAlert(
+                equipment_id, alert_key, subject, priority, description, count, seen_at, status
+            )
+            if key not in self._last_written:
+                # First sighting: surface it now rather than at the next tick
+                self._wakeup.set()
+
+    async def flush(self, force: bool = False) -> None:
+        now = time.monotonic()
+        due = [
+            key for key in self._pending
+            if force or now - self._last_written.get(key, float("-inf")) >= self.window
+        ]
+        if not due:
+            return
+        alerts = [self._pending.pop(key) for key in due]
+        try:
+            await MaintenanceRepository.upsert_alerts(alerts)
+            written = alerts
+        except Exception as e:
+            # One bad row fails the whole batch; retry row by row so only it is held back
+            print(f"Alert batch write failed, retrying {len(alerts)} alerts one by one: {e}")
+            written = []
+            for alert in alerts:
+                try:
+                    await MaintenanceRepository.upsert_alerts([alert])
+                    written.append(alert)
+                except Exception as e:
+                    self._requeue(alert, e)
+        for alert in written:
+            self._last_written[(alert.equipment_id, alert.alert_key)] = now
+        self.written += len(written)
+        # Forget keys that have been quiet for a full window
+        for key in [k for k, t in self._last_written.items() if now - t >= self.window and k not in self._pending]:
+            del self._last_written[key]
+
+    def _requeue(self, alert: PendingAlert, error: Exception) -> None:
+        """Put a failed alert back, merged with repeats offered meanwhile, until it has failed too often."""
+        alert.attempts += 1
+        if alert.attempts >= MAX_WRITE_ATTEMPTS:
+            self.failed += alert.count
+            print(f"Dropping alert {alert.alert_key!r} for equipment {alert.equipment_id} after {alert.attempts} failed writes: {error}")
+            return
+        key = (alert.equipment_id, alert.alert_key)
+        newer = self._pending.get(key)
+        if newer:
+            alert.count += newer.count
+            alert.last_seen = max(alert.last_seen, newer.last_seen)
+            alert.description = newer.description
+        self._pending[key] = alert
+
+    async def run(self, stop_event: asyncio.Event, tick: float = 1.0):
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=tick)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Alert flush failed: {e}")
+        await self.flush(force=True)
+
+    def stats(self) -> dict:
+        return {"offered": self.offered, "written": self.written, "failed": self.failed, "pending": len(self._pending)}
+
+
+class TelemetryAlerts:
+    def __init__(self, engine: RuleEngine, coalescer: AlertCoalescer):
+        self.engine = engine
+        self.coalescer = coalescer
+
+    async def on_flush(self, rows: List[tuple]) -> None:
+        equipment = await equipment_directory.describe()
+        categories = {eq_id: category for eq_id, (_, category) in equipment.items()}
+        batch = ReadingBatch.from_rows(rows, categories)
+        # NumPy work runs off the event loop; only the flusher calls in, so the
+        # engine's per-equipment state is never touched concurrently.
+        alerts = await asyncio.to_thread(self.engine.evaluate, batch)
+        for alert in alerts:
+            name = equipment.get(alert.equipment_id, (f"Equipment {alert.equipment_id}", None))[0]
+            self.coalescer.offer(
+                equipment_id=alert.equipment_id,
+                alert_key=alert.rule,
+                subject=f"{alert.subject}: {name}",
+                priority=alert.priority,
+                description=alert.description,
+                count=alert.count,
+                seen_at=datetime.fromtimestamp(alert.last_seen, timezone.utc),
+            )
+
+
+alert_coalescer = AlertCoalescer(window=float(os.getenv("ALERT_SUPPRESSION_SECONDS", "300")))
+telemetry_alerts = TelemetryAlerts(RuleEngine(load_rules()), alert_coalescer)
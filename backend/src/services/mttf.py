@@ -0,0 +1,222 @@
+"""Mean-time-to-failure regression trained on pm_data_training.
+
+Configuration via env vars:
+- MTTF_MODEL_PATH=backend/ml/mttf_model.json (where the trained model is read/written)
+
+The model is a ridge regression over standardized humidity, temperature,
+age and quantity plus a one-hot product type, solved in closed form with
+NumPy and stored as plain JSON. The API loads it once at startup; retrain
+with:
+    python -m src.services.mttf [--csv "CSV/PM DATA Training.csv"] [--alpha 1.0]
+
+Without --csv the pm_data_training table is used.
+"""
+
+import argparse
+import csv
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.models.cache import cache
+from src.models.repository import EquipmentRepository, VersionRepository
+
+NUMERIC_FEATURES = ("humidity", "temperature", "age", "quantity")
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parents[2] / "ml" / "mttf_model.json"
+TRAINING_CSV = Path(__file__).resolve().parents[2] / "CSV" / "PM DATA Training.csv"
+
+
+@dataclass
+class MttfModel:
+    product_types: List[str]
+    means: List[float]
+    stds: List[float]
+    coef: List[float]
+    intercept: float
+    alpha: float
+    trained_at: str
+    training_rows: int
+    metrics: dict = field(default_factory=dict)
+
+    @property
+    def version(self) -> str:
+        return self.trained_at
+
+    def design_matrix(self, product_types: Sequence[str], numeric: np.ndarray) -> np.ndarray:
+        """Standardized numeric columns followed by one-hot product types (unknown types are all zero)."""
+        numeric = np.asarray(numeric, dtype=np.float64)
+        # Missing inputs fall back to the training mean, i.e. 0 after scaling
+        scaled = np.nan_to_num((numeric - np.asarray(self.means)) / np.asarray(self.stds))
+        index = {name: i for i, name in enumerate(self.product_types)}
+        codes = np.fromiter((index.get(t, -1) for t in product_types), dtype=np.int64, count=len(scaled))
+        one_hot = np.zeros((len(scaled), len(self.product_types)))
+        known = codes >= 0
+        one_hot[np.flatnonzero(known), codes[known]] = 1.0
+        return np.hstack([scaled, one_hot])
+
+    def predict(self, product_types: Sequence[str], numeric: np.ndarray) -> np.ndarray:
+        """Vectorized prediction for ``len(product_types)`` rows of NUMERIC_FEATURES."""
+        if not len(product_types):
+            return np.empty(0)
+        return self.design_matrix(product_types, numeric) @ np.asarray(self.coef) + self.intercept
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, indent=2)
+
+    @classmethod
+    def load(cls, path: Path) -> "MttfModel":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+def train(product_types: Sequence[str], numeric: np.ndarray, mttf: np.ndarray, alpha: float = 1.0) -> MttfModel:
+    numeric = np.asarray(numeric, dtype=np.float64)
+    mttf = np.asarray(mttf, dtype=np.float64)
+    means = numeric.mean(axis=0)
+    stds = numeric.std(axis=0)
+    stds[stds == 0] = 1.0
+    model = MttfModel(
+        product_types=sorted(set(product_types)),
+        means=means.tolist(),
+        stds=stds.tolist(),
+        coef=[],
+        intercept=0.0,
+        alpha=alpha,
+        trained_at=datetime.now(timezone.utc).isoformat(),
+        training_rows=len(mttf),
+    )
+    x = model.design_matrix(product_types, numeric)
+    # Center so the intercept is not penalized
+    x_mean = x.mean(axis=0)
+    y_mean = mttf.mean()
+    xc = x - x_mean
+    coef = np.linalg.solve(xc.T @ xc + alpha * np.eye(x.shape[1]), xc.T @ (mttf - y_mean))
+    model.coef = coef.tolist()
+    model.intercept = float(y_mean - x_mean @ coef)
+
+    residuals = mttf - model.predict(product_types, numeric)
+    total = ((mttf - y_mean) ** 2).sum()
+    model.metrics = {
+        "rmse": float(np.sqrt((residuals ** 2).mean())),
+        "r2": float(1 - (residuals ** 2).sum() / total) if total else 0.0,
+    }
+    return model
+
+
+def read_training_csv(path: Path) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    types, numeric, mttf = [], [], []
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            # Headers carry stray whitespace ("MTTF ", "Age ")
+            row = {k.strip(): v for k, v in row.items()}
+            try:
+                numeric.append([float(row["Humidity"]), float(row["Temperature"]), float(row["Age"]), float(row["Quantity"])])
+                mttf.append(float(row["MTTF"]))
+                types.append(row["ProductType"].strip())
+            except (KeyError, ValueError):
+                continue
+    return types, np.array(numeric), np.array(mttf)
+
+
+def read_training_table() -> Tuple[List[str], np.ndarray, np.ndarray]:
+    from src.models.db import pool
+
+    with pool:
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT product_type, humidity, temperature, age, quantity, mttf
+                    FROM pm_data_training
+                    WHERE mttf IS NOT NULL
+                    """
+                )
+                rows = cur.fetchall()
+    return [r[0] for r in rows], np.array([r[1:5] for r in rows], dtype=np.float64), np.array([r[5] for r in rows], dtype=np.float64)
+
+
+def model_path() -> Path:
+    return Path(os.getenv("MTTF_MODEL_PATH", str(DEFAULT_MODEL_PATH)))
+
+
+class MttfService:
+    """Holds the model loaded at startup and serves cached fleet-wide predictions."""
+
+    def __init__(self):
+        self.model: Optional[MttfModel] = None
+
+    def load(self, path: Optional[Path] = None) -> MttfModel:
+        path = path or model_path()
+        if path.exists():
+            self.model = MttfModel.load(path)
+        else:
+            # First run without a trained artifact: fit on the bundled CSV
+            self.model = train(*read_training_csv(TRAINING_CSV))
+            self.model.save(path)
+        return self.model
+
+    async def predict_all(self) -> List[dict]:
+        """Predictions for every equipment, cached until the model, equipment or hour changes.
+
+        Sensor inputs are windowed to whole hours, so within an hour the same
+        equipment version always yields the same predictions.
+        """
+        window_end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        version, _ = await VersionRepository.get_version("equipment")
+        key = f"mttf:{self.model.version}:{version}:{window_end.isoformat()}"
+        return await cache.get_or_load(key, lambda: self._predict_all(window_end), ttl=3600)
+
+    async def _predict_all(self, window_end: datetime) -> List[dict]:
+        rows = await EquipmentRepository.get_prediction_features(window_end)
+        # Quantity has no live source, so it stays at the training mean (NaN)
+        numeric = np.array(
+            [[r[5], r[4], r[3], None] for r in rows], dtype=np.float64
+        ).reshape(len(rows), len(NUMERIC_FEATURES))
+        predictions = self.model.predict([r[2] for r in rows], numeric)
+        return [
+            {
+                "equipment_id": r[0],
+                "name": r[1],
+                "category": r[2],
+                "predicted_mttf": round(float(p), 1),
+                "age_years": round(float(r[3]), 2) if r[3] is not None else None,
+                "temperature": float(r[4]) if r[4] is not None else None,
+                "humidity": float(r[5]) if r[5] is not None else None,
+                "model_version": self.model.version,
+            }
+            for r, p in zip(rows, predictions)
+        ]
+
+    async def predict_one(self, equipment_id: int) -> Optional[dict]:
+        for prediction in await self.predict_all():
+            if prediction["equipment_id"] == equipment_id:
+                return prediction
+        return None
+
+
+mttf_service = MttfService()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the MTTF regression model")
+    parser.add_argument("--csv", type=Path, help="Train from a CSV instead of the pm_data_training table")
+    parser.add_argument("--alpha", type=float, default=1.0, help="Ridge penalty")
+    parser.add_argument("--out", type=Path, default=None, help="Output path (default MTTF_MODEL_PATH)")
+    args = parser.parse_args(argv)
+
+    data = read_training_csv(args.csv) if args.csv else read_training_table()
+    model = train(*data, alpha=args.alpha)
+    out = args.out or model_path()
+    model.save(out)
+    print(f"Trained on {model.training_rows} rows: rmse={model.metrics['rmse']:.2f} r2={model.metrics['r2']:.3f} -> {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Resumable batch MTTF scoring for pm_data_testing and plant CSV exports.
+
+    python -m src.services.pm_scoring                      # score the pm_data_testing table
+    python -m src.services.pm_scoring --csv export.csv     # score a CSV (PM Data Testing layout)
+    python -m src.services.pm_scoring --csv export.csv --workers 8 --chunk-size 100000
+
+The reader hands fixed-size chunks to a process pool: workers parse (CSV)
+and score each chunk with the vectorized model, and the parent writes the
+results back in order with COPY. Each chunk's predictions and its
+checkpoint (rows consumed so far) are committed in one transaction in
+``pm_scoring_runs``, so an interrupted run continues from the last
+committed chunk when started again with the same source and model. A run
+is keyed on a fingerprint of its source (a CSV's resolved path, size and
+mtime; the table's row count and highest uid), so a new export written to
+the same path starts a new run rather than finishing or resuming the old
+one. Use --restart to discard a run's predictions and start over.
+
+CSV input is read line by line; quoted fields with embedded newlines are
+not supported.
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.models.db import pool
+from src.services.mttf import NUMERIC_FEATURES, MttfModel, mttf_service
+
+PREDICTION_COLUMNS = ("run_id", "uid", "product_type", "predicted_mttf")
+
+_worker_model: Optional[MttfModel] = None
+
+
+def _init_worker(model_fields: dict) -> None:
+    global _worker_model
+    _worker_model = MttfModel(**model_fields)
+
+
+def _parse_lines(lines: List[str], columns: dict) -> Tuple[List[int], List[str], np.ndarray, int]:
+    uids, types, numeric = [], [], []
+    skipped = 0
+    for row in csv.reader(lines):
+        try:
+            values = [float(row[columns[name]]) for name in NUMERIC_FEATURES]
+            uid = int(row[columns["uid"]])
+            product_type = row[columns["producttype"]].strip()
+        except (IndexError, ValueError):
+            skipped += 1
+            continue
+        numeric.append(values)
+        uids.append(uid)
+        types.append(product_type)
+    return uids, types, np.array(numeric, dtype=np.float64).reshape(-1, 4), skipped
+
+
+def score_chunk(run_id: str, kind: str, payload, columns: Optional[dict] = None) -> Tuple[List[tuple], int]:
+    """Score one chunk in a worker; returns COPY-ready rows and the number of skipped lines."""
+    if kind == "csv":
+        uids, types, numeric, skipped = _parse_lines(payload, columns)
+    else:
+        uids = [r[0] for r in payload]
+        types = [r[1] for r in payload]
+        numeric = np.array([r[2:6] for r in payload], dtype=np.float64).reshape(-1, 4)
+        skipped = 0
+    predictions = _worker_model.predict(types, numeric)
+    return [(run_id, uid, t, float(p)) for uid, t, p in zip(uids, types, predictions)], skipped
+
+
+def csv_chunks(path: Path, chunk_size: int, skip: int) -> Tuple[dict, Iterator[List[str]]]:
+    """Header column positions and an iterator of raw line chunks after ``skip`` data rows."""
+    f = open(path, "r", encoding="utf-8-sig", newline="")
+    header = next(csv.reader([f.readline()]))
+    # Exports carry stray whitespace and mixed case in headers ("Age ", "ProductType")
+    columns = {name.strip().lower(): i for i, name in enumerate(header)}
+
+    def chunks():
+        with f:
+            lines = itertools.islice(f, skip, None)
+            while chunk := list(itertools.islice(lines, chunk_size)):
+                yield chunk
+
+    return columns, chunks()
+
+
+def table_chunks(chunk_size: int, skip: int) -> Iterator[List[tuple]]:
+    with pool.connection() as conn:
+        # Server-side cursor: rows stream in chunk_size round trips
+        with conn.cursor(name="pm_scoring") as cur:
+            cur.itersize = chunk_size
+            cur.execute(
+                """
+                SELECT uid, product_type, humidity, temperature, age, quantity
+                FROM pm_data_testing
+                ORDER BY uid
+                OFFSET %s
+                """,
+                (skip,),
+            )
+            while chunk := cur.fetchmany(chunk_size):
+                yield chunk
+
+
+def source_fingerprint(csv_path: Optional[Path]) -> str:
+    """Describe the input precisely enough that a changed input never matches an old run."""
+    if csv_path:
+        stat = csv_path.stat()
+        return f"{csv_path.resolve()} size={stat.st_size} mtime_ns={stat.st_mtime_ns}"
+    with pool.connection() as conn:
+        count, max_uid = conn.execute("SELECT count(*), max(uid) FROM pm_data_testing").fetchone()
+        conn.commit()
+    return f"pm_data_testing rows={count} max_uid={max_uid}"
+
+
+def start_run(run_id: str, source: str, model_version: str, restart: bool) -> Optional[int]:
+    """Return the row offset to resume from, or None if the run already finished.
+
+    Raises RuntimeError if ``run_id`` was recorded for a different source.
+    """
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            if restart:
+                cur.execute("DELETE FROM pm_data_predictions WHERE run_id = %s", (run_id,))
+                cur.execute("DELETE FROM pm_scoring_runs WHERE run_id = %s", (run_id,))
+            cur.execute(
+                """
+                INSERT INTO pm_scoring_runs (run_id, source, model_version)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (run_id) DO NOTHING
+                """,
+                (run_id, source, model_version),
+            )
+            cur.execute(
+                "SELECT source, rows_consumed, finished_at FROM pm_scoring_runs WHERE run_id = %s",
+                (run_id,),
+            )
+            recorded_source, rows_consumed, finished_at = cur.fetchone()
+        conn.commit()
+    if recorded_source != source:
+        raise RuntimeError(
+            f"Run {run_id} was recorded for {recorded_source!r}, not {source!r}; pass --restart to score again"
+        )
+    return None if finished_at else rows_consumed
+
+
+def write_chunk(conn, run_id: str, rows: List[tuple], consumed: int) -> None:
+    """COPY one chunk of predictions and advance the checkpoint atomically."""
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY pm_data_predictions ({', '.join(PREDICTION_COLUMNS)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+        cur.execute(
+            """
+            UPDATE pm_scoring_runs
+            SET rows_consumed = rows_consumed + %s, rows_scored = rows_scored + %s, updated_at = now()
+            WHERE run_id = %s
+            """,
+            (consumed, len(rows), run_id),
+        )
+    conn.commit()
+
+
+def run(csv_path: Optional[Path], workers: int, chunk_size: int, restart: bool) -> None:
+    model = mttf_service.load()
+    source = source_fingerprint(csv_path)
+    digest = hashlib.sha256(source.encode()).hexdigest()[:12]
+    run_id = f"{csv_path.name if csv_path else 'pm_data_testing'}@{model.version}#{digest}"
+    skip = start_run(run_id, source, model.version, restart)
+    if skip is None:
+        print(f"Run {run_id} already finished; pass --restart to score again")
+        return
+    print(f"Scoring {source} as run {run_id} ({workers} workers, {chunk_size:,} rows/chunk, resuming at row {skip:,})")
+
+    if csv_path:
+        columns, chunks = csv_chunks(csv_path, chunk_size, skip)
+        kind = "csv"
+    else:
+        columns, chunks = None, table_chunks(chunk_size, skip)
+        kind = "table"
+
+    started = time.perf_counter()
+    scored = skipped_total = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(asdict(model),)) as executor, \
+            pool.connection() as conn:
+        # Bounded window of in-flight chunks; results are written in submission
+        # order so the checkpoint always covers a contiguous prefix of the input.
+        in_flight = deque()
+        for chunk in itertools.chain(chunks, [None]):
+            if chunk is not None:
+                in_flight.append((len(chunk), executor.submit(score_chunk, run_id, kind, chunk, columns)))
+            while in_flight and (chunk is None or len(in_flight) >= workers * 2):
+                consumed, future = in_flight.popleft()
+                rows, skipped = future.result()
+                write_chunk(conn, run_id, rows, consumed)
+                scored += len(rows)
+                skipped_total += skipped
+        conn.execute("UPDATE pm_scoring_runs SET finished_at = now() WHERE run_id = %s", (run_id,))
+        conn.commit()
+
+    elapsed = time.perf_counter() - started
+    print(f"  ✓ {scored:,} rows scored, {skipped_total:,} malformed skipped in {elapsed:.2f}s "
+          f"({scored / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-score PM testing data with the MTTF model")
+    parser.add_argument("--csv", type=Path, help="Score this CSV instead of the pm_data_testing table")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--restart", action="store_true", help="Discard this run's progress and start over")
+    args = parser.parse_args(argv)
+    with pool:
+        try:
+            run(args.csv, args.workers, args.chunk_size, args.restart)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Keeps a preventive maintenance plan for this worker and repairs it on change.
+
+The plan is built from open preventive requests, team capacities and the
+materialized equipment health scores on first use (and again each day).
+Afterwards every maintenance_changes notification flagged ``reschedule``
+re-places just that request (see ``Plan.replan`` in
+``src/services/scheduler.py``). Nothing is written back unless a plan is
+applied, and applying it does not trigger a replan.
+"""
+
+import asyncio
+from datetime import date, datetime
+from typing import List, Optional
+
+from src.models.repository import SchedulingRepository
+from src.services.scheduler import DEFAULT_CAPACITY_HOURS, Job, Plan, build_plan
+
+PRIORITY_RANK = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+DEFAULT_DURATION_HOURS = 1.0
+DEFAULT_HEALTH_SCORE = 100.0
+
+
+def _priority_rank(priority) -> int:
+    """1-4 from the loader's numeric priority (int or digit string) or a level name."""
+    if priority is None:
+        return 1
+    try:
+        rank = int(priority)
+    except (TypeError, ValueError):
+        return PRIORITY_RANK.get(str(priority).strip().lower(), 1)
+    return min(max(rank, 1), 4)
+
+
+def _job(row: tuple) -> Job:
+    request_id, duration, priority, team_id, scheduled, health = row
+    if isinstance(scheduled, datetime):
+        scheduled = scheduled.date()
+    return Job(
+        id=request_id,
+        duration_hours=float(duration) if duration and duration > 0 else DEFAULT_DURATION_HOURS,
+        priority=_priority_rank(priority),
+        team_id=team_id,
+        target_date=scheduled,
+        health_score=float(health) if health is not None else DEFAULT_HEALTH_SCORE,
+    )
+
+
+class PreventiveScheduler:
+    def __init__(self):
+        self.plan: Optional[Plan] = None
+        self.built_at: Optional[datetime] = None
+        self.replans = 0
+        self._lock = asyncio.Lock()
+
+    async def rebuild(self) -> Plan:
+        async with self._lock:
+            rows = await SchedulingRepository.load_preventive_jobs()
+            capacities = await SchedulingRepository.load_team_capacities()
+            # 100k requests take about a second; keep the event loop free meanwhile
+            self.plan = await asyncio.to_thread(
+                build_plan, [_job(r) for r in rows], capacities, date.today()
+            )
+            self.built_at = datetime.now()
+            return self.plan
+
+    async def current(self) -> Plan:
+        if self.plan is None or self.plan.start != date.today():
+            return await self.rebuild()
+        return self.plan
+
+    async def on_change(self, event: dict) -> None:
+        """change_feed listener: repair the plan for the one request that changed."""
+        if self.plan is None:
+            return
+        if event.get("op") == "resync":
+            # Notifications were missed while reconnecting
+            self.plan = None
+            return
+        if not event.get("reschedule", True):
+            return
+        async with self._lock:
+            rows = [] if event.get("op") == "delete" else await SchedulingRepository.load_preventive_jobs(event["id"])
+            if rows:
+                job = _job(rows[0])
+                if job.team_id is not None and job.team_id not in self.plan.calendars:
+                    # A team we have not seen: capacities changed, start over
+                    self.plan = None
+                    return
+                # A stored date that is just the applied plan's output is not a new target
+                previous = self.plan.jobs.get(job.id)
+                if previous is not None and job.target_date == self.plan.scheduled_date(job.id):
+                    job.target_date = previous.target_date
+                self.plan.replan(job)
+            else:
+                self.plan.remove(event["id"])
+            self.replans += 1
+
+    async def apply(self) -> int:
+        """Write the current plan's team and first day onto the requests."""
+        plan = await self.current()
+        ids, team_ids, dates = [], [], []
+        for row in plan.to_rows():
+            ids.append(row["request_id"])
+            team_ids.append(row["team_id"])
+            dates.append(date.fromisoformat(row["scheduled_date"]))
+        return await SchedulingRepository.apply_plan(ids, team_ids, dates)
+
+    async def rows(self, team_id: Optional[int] = None, limit: Optional[int] = None) -> List[dict]:
+        plan = await self.current()
+        rows = plan.to_rows()
+        if team_id is not None:
+            rows = [r for r in rows if r["team_id"] == team_id]
+        return rows[:limit] if limit else rows
+
+    def stats(self) -> dict:
+        return {
+            "built_at": self.built_at.isoformat() if self.built_at else None,
+            "replans": self.replans,
+            "default_capacity_hours": DEFAULT_CAPACITY_HOURS,
+            **(self.plan.summary() if self.plan else {}),
+        }
+
+
+preventive_scheduler = PreventiveScheduler()
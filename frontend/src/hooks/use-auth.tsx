@@ -93,6 +93,13 @@ export function AuthProvider({ children }: { children: ReactNode }) {
     };
 
     const logout = () => {
+        const token = localStorage.getItem('gearguard_token');
+        if (token) {
+            // Revoke the session server-side; the local logout does not wait on it
+            axios.post(`${API_URL}/api/auth/logout`, null, {
+                headers: { Authorization: `Bearer ${token}` },
+            }).catch((error) => console.warn('Logout request failed:', error));
+        }
         setUser(null);
         localStorage.removeItem('gearguard_token');
         router.push('/login');
@@ -75,19 +75,11 @@ export const useEquipment = (id?: number) => {
         queryKey: ['equipment', id],
         queryFn: async () => {
             try {
-                // Add cache buster for cross-machine sync
-                const timestamp = Date.now();
+                // No cache buster: the API answers unchanged polls with 304 via ETag
                 const baseUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
-                const url = id
-                    ? `${baseUrl}/api/equipment/${id}?_t=${timestamp}`
-                    : `${baseUrl}/api/equipment?_t=${timestamp}`;
+                const url = id ? `${baseUrl}/api/equipment/${id}` : `${baseUrl}/api/equipment`;
 
-                const { data } = await axios.get(url, {
-                    headers: {
-                        'Cache-Control': 'no-cache',
-                        'Pragma': 'no-cache'
-                    }
-                });
+                const { data } = await axios.get(url);
                 return data as EquipmentWithHealth[] | EquipmentWithHealth;
             } catch (error) {
                 console.warn("Backend unreached, using mock equipment data");
@@ -1,7 +1,73 @@
-import { useQuery } from '@tanstack/react-query';
+import { useEffect, useState } from 'react';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
 import axios from 'axios';
 import { MaintenanceRequest } from '@/types';
 
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+// Largest page /api/maintenance-requests serves
+const PAGE_LIMIT = 1000;
+
+// Card fields shared by stream deltas and snapshot cards
+interface MaintenanceCard {
+    id: number;
+    subject: string;
+    priority: number | string | null;
+    equipment_id: number | null;
+    request_type: MaintenanceRequest['request_type'] | null;
+}
+
+// Per-card change pushed by /api/maintenance/stream
+interface MaintenanceDelta extends MaintenanceCard {
+    op: 'insert' | 'update' | 'delete';
+    status: MaintenanceRequest['status'];
+}
+
+// Whole board pushed on connect and whenever the client fell behind
+interface MaintenanceSnapshot {
+    board: Record<MaintenanceRequest['status'], MaintenanceCard[]>;
+}
+
+const cardPatch = (card: MaintenanceCard, status: MaintenanceRequest['status']) => ({
+    subject: card.subject,
+    status,
+    priority: card.priority != null ? Number(card.priority) || 1 : 1,
+    equipment_id: card.equipment_id ?? 0,
+    ...(card.request_type && { request_type: card.request_type }),
+});
+
+const newRequest = (card: MaintenanceCard, status: MaintenanceRequest['status']): MaintenanceRequest => ({
+    id: card.id,
+    request_type: 'Corrective',
+    created_at: new Date().toISOString(),
+    ...cardPatch(card, status),
+});
+
+const applyDelta = (requests: MaintenanceRequest[], delta: MaintenanceDelta): MaintenanceRequest[] => {
+    if (delta.op === 'delete') {
+        return requests.filter(r => r.id !== delta.id);
+    }
+    const existing = requests.find(r => r.id === delta.id);
+    if (existing) {
+        return requests.map(r => (r.id === delta.id ? { ...r, ...cardPatch(delta, delta.status) } : r));
+    }
+    return [newRequest(delta, delta.status), ...requests];
+};
+
+// Replace the card fields from a snapshot, keeping what only the full list
+// carries (dates, team, description) for cards that are still present
+const applySnapshot = (requests: MaintenanceRequest[], snapshot: MaintenanceSnapshot): MaintenanceRequest[] => {
+    const known = new Map(requests.map(r => [r.id, r]));
+    const merged: MaintenanceRequest[] = [];
+    for (const [status, cards] of Object.entries(snapshot.board) as [MaintenanceRequest['status'], MaintenanceCard[]][]) {
+        for (const card of cards) {
+            const existing = known.get(card.id);
+            merged.push(existing ? { ...existing, ...cardPatch(card, status) } : newRequest(card, status));
+        }
+    }
+    // Newest first, like /api/maintenance-requests
+    return merged.sort((a, b) => b.id - a.id);
+};
+
 // Mock data for development when backend is not reachable
 const MOCK_REQUESTS: MaintenanceRequest[] = [
     {
@@ -46,36 +112,84 @@ const MOCK_REQUESTS: MaintenanceRequest[] = [
     }
 ];
 
+/**
+ * Keeps the cached request list current from the server's change stream, so
+ * polling is only a slow safety net while the stream is connected.
+ */
+const useMaintenanceStream = () => {
+    const queryClient = useQueryClient();
+    const [connected, setConnected] = useState(false);
+
+    useEffect(() => {
+        if (typeof window === 'undefined' || typeof EventSource === 'undefined') return;
+
+        const source = new EventSource(`${API_URL}/api/maintenance/stream`);
+        source.onopen = () => setConnected(true);
+        source.onerror = () => setConnected(false); // EventSource reconnects on its own
+        source.addEventListener('snapshot', (event) => {
+            // Sent on connect and whenever we fell behind. Apply it in place:
+            // refetching here would send every client to the database at once
+            // after each feed reconnect.
+            const snapshot = JSON.parse((event as MessageEvent).data) as MaintenanceSnapshot;
+            queryClient.setQueryData<MaintenanceRequest[]>(['maintenance_requests'], (current) =>
+                current ? applySnapshot(current, snapshot) : current
+            );
+        });
+        source.addEventListener('delta', (event) => {
+            const delta = JSON.parse((event as MessageEvent).data) as MaintenanceDelta;
+            queryClient.setQueryData<MaintenanceRequest[]>(['maintenance_requests'], (current) =>
+                current ? applyDelta(current, delta) : current
+            );
+        });
+
+        return () => source.close();
+    }, [queryClient]);
+
+    return connected;
+};
+
 export const useMaintenanceRequests = () => {
+    const streaming = useMaintenanceStream();
+
     return useQuery({
         queryKey: ['maintenance_requests'],
         queryFn: async () => {
             try {
-                // Add cache buster to prevent browser caching across machines
-                const timestamp = Date.now();
-                const url = `${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/maintenance-requests?_t=${timestamp}`;
+                // No cache buster or no-cache request headers: the browser keeps
+                // each page (its own URL, so its own ETag) and revalidates it with
+                // If-None-Match; the API answers 304 when nothing changed since
+                // the last poll, and the cached body and X-Next-Cursor are reused.
+                const url = `${API_URL}/api/maintenance-requests`;
                 
                 // Get token from localStorage for authenticated requests
                 const token = typeof window !== 'undefined' ? localStorage.getItem('gearguard_token') : null;
                 
-                const { data } = await axios.get(url, {
-                    headers: {
-                        'Cache-Control': 'no-cache',
-                        'Pragma': 'no-cache',
-                        'X-User-Role': 'viewer', // Default role for backward compatibility
-                        ...(token && { 'Authorization': `Bearer ${token}` })
-                    }
-                });
-                return data as MaintenanceRequest[];
+                // The API pages newest first; the board and calendar need every
+                // request, so follow X-Next-Cursor until the last page.
+                const requests: MaintenanceRequest[] = [];
+                let cursor: string | undefined;
+                do {
+                    const response = await axios.get(url, {
+                        params: { limit: PAGE_LIMIT, ...(cursor && { cursor }) },
+                        headers: {
+                            'X-User-Role': 'viewer', // Default role for backward compatibility
+                            ...(token && { 'Authorization': `Bearer ${token}` })
+                        }
+                    });
+                    requests.push(...(response.data as MaintenanceRequest[]));
+                    cursor = response.headers['x-next-cursor'];
+                } while (cursor);
+                return requests;
             } catch (error) {
                 // Fallback to mock data for development
                 console.warn("Backend not reachable, using mock data", error);
                 return MOCK_REQUESTS;
             }
         },
-        refetchInterval: 3000, // Poll every 3s for faster cross-machine updates
-        refetchOnWindowFocus: true,
+        // Deltas arrive over the stream; fall back to 3s polling only when it is down
+        refetchInterval: streaming ? 60000 : 3000,
+        refetchOnWindowFocus: !streaming,
         refetchOnMount: true,
-        staleTime: 0, // Always consider data stale for fresh fetches
+        staleTime: streaming ? Infinity : 0,
     });
 };
@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import axios from 'axios';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+const PAGE_SIZE = 50;
 
 interface Task {
     id: string;
@@ -17,12 +18,14 @@ export const useMyTasks = () => {
     const [tasks, setTasks] = useState<Task[]>([]);
     const [isLoading, setIsLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
 
     useEffect(() => {
         fetchMyTasks();
     }, []);
 
-    const fetchMyTasks = async () => {
+    // Open tasks only, earliest due first; further pages follow X-Next-Cursor
+    const fetchMyTasks = async (cursor?: string) => {
         try {
             const token = localStorage.getItem('gearguard_token');
             if (!token) {
@@ -32,8 +35,10 @@ export const useMyTasks = () => {
 
             const response = await axios.get(`${API_URL}/api/auth/my-tasks`, {
                 headers: { Authorization: `Bearer ${token}` },
+                params: { limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) },
             });
-            setTasks(response.data);
+            setTasks((prev) => (cursor ? [...prev, ...response.data] : response.data));
+            setNextCursor(response.headers['x-next-cursor'] ?? null);
             setError(null);
         } catch (err) {
             console.error('Failed to fetch tasks:', err);
@@ -43,5 +48,9 @@ export const useMyTasks = () => {
         }
     };
 
-    return { tasks, isLoading, error, refetch: fetchMyTasks };
+    const loadMore = () => {
+        if (nextCursor) fetchMyTasks(nextCursor);
+    };
+
+    return { tasks, isLoading, error, hasMore: nextCursor !== null, loadMore, refetch: () => fetchMyTasks() };
 };
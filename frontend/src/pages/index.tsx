@@ -8,7 +8,7 @@ import { useMyTasks } from '@/hooks/use-my-tasks';
 
 export default function DashboardPage() {
   const { user } = useAuth();
-  const { tasks, isLoading } = useMyTasks();
+  const { tasks, isLoading, hasMore } = useMyTasks();
 
   return (
     <>
@@ -32,7 +32,7 @@ export default function DashboardPage() {
               <ClipboardList className="h-4 w-4 text-slate-500" />
             </CardHeader>
             <CardContent>
-              <div className="text-2xl font-bold">{isLoading ? '...' : tasks.length}</div>
+              <div className="text-2xl font-bold">{isLoading ? '...' : `${tasks.length}${hasMore ? '+' : ''}`}</div>
               <p className="text-xs text-slate-500">Assigned to you</p>
             </CardContent>
           </Card>
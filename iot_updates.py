@@ -1,7 +1,7 @@
 import psycopg2
 import time
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timezone
 
 # Replace with your actual Neon Connection String
 CONN_STRING = "postgresql://[user]:[password]@[host]/neondb?sslmode=require"
@@ -9,6 +9,24 @@ CONN_STRING = "postgresql://[user]:[password]@[host]/neondb?sslmode=require"
 # Path to your Kaggle CSV file (update with your actual path)
 KAGGLE_CSV_PATH = "path/to/your/kaggle_iot_data.csv"
 
+# Write each equipment's alert at most this often; repeats in between are counted
+ALERT_SUPPRESSION_SECONDS = 300
+ALERT_KEY = "Overheating"
+
+# Folds a repeat into the open request for the same (equipment, alert) instead of
+# inserting a new one (unique index uq_maintenance_requests_open_alert)
+UPSERT_ALERT_SQL = """
+    INSERT INTO maintenance_requests
+        (subject, request_type, status, equipment_id, description, alert_key, alert_count, last_seen_at)
+    VALUES (%s, 'Corrective', 'New', %s, %s, %s, %s, %s)
+    ON CONFLICT (COALESCE(equipment_id, 0), alert_key)
+        WHERE alert_key IS NOT NULL AND status IN ('New', 'In Progress')
+    DO UPDATE SET
+        alert_count = maintenance_requests.alert_count + EXCLUDED.alert_count,
+        last_seen_at = GREATEST(maintenance_requests.last_seen_at, EXCLUDED.last_seen_at),
+        description = EXCLUDED.description
+"""
+
 def load_kaggle_data(csv_path):
     """Load IoT sensor data from Kaggle CSV file"""
     try:
@@ -32,7 +50,20 @@ def map_equipment_id(equipment_name, cur):
         print(f"Error mapping equipment: {e}")
         return None
 
+def write_alert(cur, eq_id, equipment_name, description, count):
+    cur.execute(UPSERT_ALERT_SQL, (
+        f"Overheating Alert: {equipment_name}",
+        eq_id,
+        description,
+        ALERT_KEY,
+        count,
+        datetime.now(timezone.utc),
+    ))
+
 def simulate_iot_heartbeat():
+    conn = None
+    # eq_id -> [equipment_name, description, suppressed repeats, last write time]
+    alerts = {}
     try:
         # 1. Connect to NeonDB
         conn = psycopg2.connect(CONN_STRING)
@@ -62,19 +93,21 @@ def simulate_iot_heartbeat():
 
                 # 4. BUSINESS LOGIC: Automatic Corrective Request
                 # If temperature exceeds 95C, auto-create a 'New' request
+                # Repeats within the suppression window are only counted, then
+                # folded into the open request on the next write.
                 if temp > 95.0:
-                    print(f"⚠️ ALERT: {equipment_name} is overheating! Creating request...")
-                    cur.execute("""
-                        INSERT INTO maintenance_requests (subject, request_type, status, equipment_id, description)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """, (
-                        f"Overheating Alert: {equipment_name}",
-                        'Corrective',
-                        'New',
-                        eq_id,
-                        f"Automated alert: Sensor detected critical temperature of {temp:.2f}C"
-                    ))
-                    conn.commit()
+                    description = f"Automated alert: Sensor detected critical temperature of {temp:.2f}C"
+                    state = alerts.get(eq_id)
+                    if state and time.monotonic() - state[3] < ALERT_SUPPRESSION_SECONDS:
+                        state[1] = description
+                        state[2] += 1
+                        print(f"⚠️ ALERT: {equipment_name} is overheating (suppressed, {state[2]} pending)")
+                    else:
+                        count = 1 + (state[2] if state else 0)
+                        print(f"⚠️ ALERT: {equipment_name} is overheating! Updating request...")
+                        write_alert(cur, eq_id, equipment_name, description, count)
+                        conn.commit()
+                        alerts[eq_id] = [equipment_name, description, 0, time.monotonic()]
 
             except ValueError as e:
                 print(f"Error processing row {idx}: Invalid data format - {e}")
@@ -83,6 +116,12 @@ def simulate_iot_heartbeat():
             # 5. Wait between uploads to mimic "Real-Time" intervals
             time.sleep(2)
 
+        # Record repeats that were still being suppressed when the data ran out
+        for eq_id, (equipment_name, description, suppressed, _) in alerts.items():
+            if suppressed:
+                write_alert(cur, eq_id, equipment_name, description, suppressed)
+        conn.commit()
+
     except Exception as e:
         print(f"Error: {e}")
     finally:
@@ -0,0 +1,31 @@
+"""Unit tests for the preventive scheduler's row mapping (no database needed)"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+# db.py requires a URL at import; nothing here connects
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/gearguard")
+
+from src.services.preventive import _job
+
+
+def test_numeric_priorities():
+    assert [_job((1, 2, p, None, None, None)).priority for p in (1, 2, 3, 4)] == [1, 2, 3, 4]
+    assert [_job((1, 2, p, None, None, None)).priority for p in ("1", "3", "4")] == [1, 3, 4]
+
+
+def test_named_priorities():
+    assert [_job((1, 2, p, None, None, None)).priority for p in ("Low", "medium", "High", "CRITICAL")] == [1, 2, 3, 4]
+
+
+def test_missing_or_unknown_priority_is_lowest():
+    assert _job((1, 2, None, None, None, None)).priority == 1
+    assert _job((1, 2, "urgent", None, None, None)).priority == 1
+
+
+if __name__ == "__main__":
+    test_numeric_priorities()
+    test_named_priorities()
+    test_missing_or_unknown_priority_is_lowest()
+    print("Preventive priority tests passed")